@@ -47,6 +47,22 @@ class Settings(BaseSettings):
     OPENAI_MODEL: str = "gpt-4"
     OLLAMA_MODEL: str = "llama3.2:3b"
 
+    # Ollama host pool (comma-separated base URLs, empty = default local host)
+    OLLAMA_HOSTS: str = ""
+    OLLAMA_HEALTH_CHECK_INTERVAL: float = 10.0
+    OLLAMA_FAILURE_THRESHOLD: int = 3
+    OLLAMA_EJECTION_SECONDS: float = 30.0
+
+    # Global LLM scheduler
+    LLM_MAX_CONCURRENCY: int = 8
+    LLM_STARVATION_SECONDS: float = 15.0
+
+    # OpenAI Batch API (deferred execution for background jobs)
+    OPENAI_BATCH_BASE_URL: Optional[str] = None
+    OPENAI_BATCH_MAX_REQUESTS: int = 500
+    OPENAI_BATCH_FLUSH_SECONDS: float = 60.0
+    OPENAI_BATCH_POLL_SECONDS: float = 30.0
+
     # Logging
     LOG_LEVEL: str = "INFO"
     LOG_FORMAT: str = "json"  # json or text
@@ -56,8 +72,110 @@ class Settings(BaseSettings):
     ENABLE_HEALTH_CHECKS: bool = True
 
     # Performance
-    MAX_WORKERS: int = 4
+    MAX_WORKERS: int = 4  # Upper bound for the autoscaled analysis worker pool
     REQUEST_TIMEOUT: int = 30
+    JOB_SECTION_CONCURRENCY: int = 4  # Parallel LLM sections per async job
+
+    # Async job persistence ("sqlite" or "memory")
+    JOB_STORE_BACKEND: str = "sqlite"
+    JOB_STORE_PATH: str = "./analysis_jobs.db"
+    JOB_STORE_FLUSH_INTERVAL: float = 0.2
+    JOB_STORE_BATCH_SIZE: int = 200
+
+    # Async job queue ("local" = per process, "shared" = all processes
+    # using the same sqlite job store claim jobs with leases). Local queues
+    # still lease their jobs in the store, so a restarting process only
+    # recovers jobs whose owner is gone
+    JOB_QUEUE_BACKEND: str = "local"
+    JOB_LEASE_SECONDS: float = 30.0
+    JOB_QUEUE_POLL_INTERVAL: float = 0.5
+
+    # Job progress event fan-out ("local" = subscribers in this process only,
+    # "sqlite" = every process sharing JOB_STORE_PATH)
+    JOB_EVENT_BUS_BACKEND: str = "local"
+    JOB_EVENT_BUS_POLL_INTERVAL: float = 0.02
+    JOB_EVENT_BUS_RETENTION_SECONDS: float = 60.0
+    # Progress events per job per second (0 = every change); intermediate
+    # updates are folded into the next event
+    JOB_PROGRESS_MAX_EVENTS_PER_SECOND: float = 4.0
+
+    # Per-connection WebSocket send queue; when a client falls behind,
+    # "coalesce" merges queued updates per job and "drop_oldest" only drops
+    WS_OUTBOX_MAX_MESSAGES: int = 64
+    WS_OUTBOX_POLICY: str = "coalesce"
+
+    # WebSocket heartbeat and limits: quiet clients are pinged, and closed
+    # if they don't answer or nothing but heartbeats passes for the idle
+    # timeout (0 = never); a user over their cap loses their least recently
+    # active connection, and new connections over the node cap are refused
+    WS_PING_INTERVAL_SECONDS: float = 20.0
+    WS_PING_TIMEOUT_SECONDS: float = 20.0
+    WS_IDLE_TIMEOUT_SECONDS: float = 600.0
+    WS_MAX_CONNECTIONS_PER_USER: int = 5
+    WS_MAX_CONNECTIONS: int = 10000
+
+    # Resumable /analyze/stream: finished streams stay replayable for the
+    # TTL, and a stream nobody follows is cancelled after the grace period.
+    # Streams live in the process that started them, so with several
+    # workers or replicas resuming needs sticky sessions
+    SSE_STREAM_TTL_SECONDS: float = 120.0
+    SSE_RESUME_GRACE_SECONDS: float = 15.0
+    SSE_MAX_STREAMS: int = 1000
+
+    # Assumptions of the computed investment figures (annual fractions)
+    INVESTMENT_DOWN_PAYMENT: float = 0.20
+    INVESTMENT_CLOSING_COSTS: float = 0.03
+    INVESTMENT_MORTGAGE_RATE: float = 0.065
+    INVESTMENT_LOAN_TERM_YEARS: int = 30
+    INVESTMENT_GROSS_RENT_YIELD: float = 0.07  # Rent estimate when none given
+    INVESTMENT_VACANCY_RATE: float = 0.05
+    INVESTMENT_MANAGEMENT_RATE: float = 0.08
+    INVESTMENT_PROPERTY_TAX_RATE: float = 0.011
+    INVESTMENT_INSURANCE_RATE: float = 0.0035
+    INVESTMENT_MAINTENANCE_RATE: float = 0.01
+    INVESTMENT_APPRECIATION_RATE: float = 0.03
+    INVESTMENT_HORIZON_YEARS: int = 5
+
+    # Features extracted from listing descriptions, cached per description
+    LISTING_FEATURE_CACHE_SIZE: int = 10000
+
+    # Monte Carlo ROI simulation: worker processes (0 = one per CPU) and
+    # paths per listing
+    MONTE_CARLO_WORKERS: int = 0
+    MONTE_CARLO_PATHS: int = 20000
+    MONTE_CARLO_MAX_PATHS: int = 100000
+    MONTE_CARLO_MAX_LISTINGS: int = 50
+
+    # Fair scheduling between users (weights by plan, e.g. {"pro": 4})
+    JOB_PLAN_WEIGHTS: dict = {}
+    JOB_MAX_IN_FLIGHT_PER_USER: int = 2  # 0 = unlimited
+
+    # Finished job retention (memory is bounded by JOB_MAX_RETAINED)
+    JOB_TTL_COMPLETED_SECONDS: int = 24 * 3600
+    JOB_TTL_FAILED_SECONDS: int = 3600  # failed and cancelled jobs
+    JOB_MAX_RETAINED: int = 10000
+    JOB_RETENTION_INTERVAL_SECONDS: float = 60.0
+
+    # Admission control: reject interactive jobs whose projected queue wait
+    # exceeds this many seconds (0 = never reject)
+    JOB_ADMISSION_MAX_WAIT_SECONDS: float = 300.0
+    JOB_SECTION_SECONDS_ESTIMATE: float = 10.0  # until latency is observed
+
+    # Identical submissions within this window share one job (0 = off)
+    JOB_DEDUP_WINDOW_SECONDS: float = 600.0
+    JOB_DEDUP_CROSS_USER: bool = False  # share public-listing jobs across users
+
+    # On shutdown, running jobs get this long to finish before their
+    # remaining sections are handed back to the queue
+    JOB_DRAIN_GRACE_SECONDS: float = 20.0
+
+    # Worker autoscaling: grow while projected queue wait exceeds the target
+    # and the LLM backend has headroom; shrink when idle or when section
+    # latency rises above JOB_AUTOSCALE_LATENCY_FACTOR x the recent best
+    JOB_MIN_WORKERS: int = 1
+    JOB_AUTOSCALE_INTERVAL_SECONDS: float = 15.0
+    JOB_AUTOSCALE_TARGET_WAIT_SECONDS: float = 30.0
+    JOB_AUTOSCALE_LATENCY_FACTOR: float = 1.5
 
     class Config:
         env_file = ".env"
@@ -71,6 +189,11 @@ class Settings(BaseSettings):
     def is_development(self) -> bool:
         return self.ENVIRONMENT.lower() == "development"
 
+    @property
+    def ollama_hosts(self) -> list:
+        """Get the configured Ollama host URLs"""
+        return [host.strip() for host in self.OLLAMA_HOSTS.split(",") if host.strip()]
+
     @property
     def cors_origins(self) -> list:
         """Get CORS origins based on environment"""
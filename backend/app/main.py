@@ -100,7 +100,9 @@ app.include_router(model_info.router, prefix="/api")
 async def startup_event():
     """Initialize services on startup"""
     from app.services.async_processor import async_processor
+    from app.services.ollama_pool import ollama_pool
 
+    await ollama_pool.start()
     await async_processor.start()
     logger.logger.info("Async analysis processor started")
 
@@ -109,8 +111,12 @@ async def startup_event():
 async def shutdown_event():
     """Cleanup services on shutdown"""
     from app.services.async_processor import async_processor
+    from app.services.monte_carlo import monte_carlo_pool
+    from app.services.ollama_pool import ollama_pool
 
     await async_processor.stop()
+    await ollama_pool.stop()
+    monte_carlo_pool.shutdown()
     logger.logger.info("Async analysis processor stopped")
 
 
@@ -159,4 +165,55 @@ async def metrics():
         "system_disk_percent": psutil.disk_usage("/").percent,
     }
 
+    sse_stats = analyze_streaming.stream_registry.get_stats()
+    metrics_data.update(
+        {
+            "listingiq_sse_streams_buffered": sse_stats["buffered_streams"],
+            "listingiq_sse_streams_live": sse_stats["live_streams"],
+            "listingiq_sse_streams_resumed_total": sse_stats["resumed"],
+            "listingiq_sse_events_replayed_total": sse_stats["replayed_events"],
+            "listingiq_sse_streams_abandoned_total": sse_stats["abandoned"],
+        }
+    )
+
+    ws_stats = websocket.manager.get_stats()
+    ws_closed = ws_stats["closed"]
+    metrics_data.update(
+        {
+            "listingiq_ws_connections": ws_stats["connections"],
+            "listingiq_ws_connections_peak": ws_stats["peak_connections"],
+            "listingiq_ws_connections_opened_total": ws_stats["opened"],
+            "listingiq_ws_idle_reaped_total": ws_closed.get("idle", 0),
+            "listingiq_ws_ping_timeouts_total": ws_closed.get("ping_timeout", 0),
+            "listingiq_ws_evicted_total": ws_closed.get("replaced", 0),
+            "listingiq_ws_rejected_total": ws_closed.get("rejected", 0),
+            "listingiq_ws_messages_queued": ws_stats["queued_messages"],
+            "listingiq_ws_messages_sent_total": ws_stats["sent"],
+            "listingiq_ws_messages_dropped_total": ws_stats["dropped"],
+            "listingiq_ws_messages_coalesced_total": ws_stats["coalesced"],
+        }
+    )
+
+    from app.services.monte_carlo import monte_carlo_pool
+
+    simulation_stats = monte_carlo_pool.get_stats()
+    metrics_data.update(
+        {
+            "listingiq_simulations_in_flight": simulation_stats["in_flight"],
+            "listingiq_simulations_total": simulation_stats["simulations"],
+            "listingiq_simulation_paths_total": simulation_stats["paths"],
+        }
+    )
+
+    from app.services.listing_features import feature_extractor
+
+    feature_stats = feature_extractor.get_stats()
+    metrics_data.update(
+        {
+            "listingiq_feature_cache_entries": feature_stats["entries"],
+            "listingiq_feature_cache_hits_total": feature_stats["hits"],
+            "listingiq_feature_cache_misses_total": feature_stats["misses"],
+        }
+    )
+
     return metrics_data
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import List, Optional, Dict
+from typing import Any, List, Optional, Dict
 from datetime import datetime
 
 
@@ -14,6 +14,9 @@ class InvestmentPotential(BaseModel):
     cash_flow: Optional[str] = None
     roi_projections: Optional[str] = None
     appreciation_timeline: Optional[str] = None
+    # Computed figures behind the text, and the assumptions used
+    metrics: Optional[Dict[str, Optional[float]]] = None
+    assumptions: Optional[Dict[str, float]] = None
 
 
 class RiskAssessment(BaseModel):
@@ -28,6 +31,17 @@ class RenovationAnalysis(BaseModel):
     renovation_roi: Optional[str] = None
 
 
+class ListingPreview(BaseModel):
+    price: Optional[float] = None
+    price_per_sqft: Optional[float] = None
+    property_age: Optional[int] = None  # Years since year_built
+    bed_bath_ratio: Optional[float] = None
+    sqft_per_bedroom: Optional[float] = None
+    completeness: int = 0  # Percent of the manual fields provided
+    fields_provided: Dict[str, bool] = {}
+    features: Dict[str, Any] = {}  # Extracted from listing_description
+
+
 class InvestmentRecommendation(BaseModel):
     recommendation: Optional[str] = None  # Buy, Hold, Sell
     ideal_buyer: Optional[str] = None
@@ -63,6 +77,9 @@ class PropertyAnalysis(BaseModel):
     # Manual property data
     manual_data: Optional[ManualPropertyData] = None
 
+    # Figures computed locally from manual_data
+    preview: Optional[ListingPreview] = None
+
     # Market and Investment Analysis
     market_analysis: Optional[MarketAnalysis] = None
     investment_potential: Optional[InvestmentPotential] = None
@@ -89,6 +106,19 @@ class AnalysisRequest(BaseModel):
     user_id: Optional[str] = None
 
 
+class SimulationListing(BaseModel):
+    price: str  # As in ManualPropertyData, e.g. "$450,000"
+    monthly_rent: Optional[float] = None  # Default: from the gross rent yield
+    monthly_hoa: float = 0.0
+
+
+class SimulationRequest(BaseModel):
+    listings: List[SimulationListing]
+    years: int = 10
+    paths: Optional[int] = None
+    seed: Optional[int] = None  # Fixes the paths, for reproducible results
+
+
 class AnalysisResponse(BaseModel):
     success: bool
     analysis: Optional[PropertyAnalysis] = None
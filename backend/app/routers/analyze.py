@@ -1,6 +1,8 @@
 # backend/api/analyze.py
 from __future__ import annotations
+import asyncio
 import os
+from contextlib import aclosing
 from fastapi import APIRouter, Depends, HTTPException
 from typing import Optional, Dict, Any
 from datetime import datetime
@@ -12,12 +14,18 @@ from ..models import (
     RiskAssessment,
     RenovationAnalysis,
     InvestmentRecommendation,
+    ListingPreview,
     ManualPropertyData,
     AnalysisRequest,
     AnalysisResponse,
+    SimulationRequest,
 )
+from ..config import settings
 from ..services.database import DatabaseService
+from ..services.listing_preview import parse_price
 from ..services.llm_service import LLMService
+from ..services.monte_carlo import SimulationParams, monte_carlo_pool
+from ..services.section_graph import ANALYSIS_GRAPH, CORE_SECTIONS, SectionNode
 from ..services.supabase import supabase_service
 from ..middleware.auth import require_auth, optional_auth
 
@@ -85,6 +93,52 @@ async def analyze_property(
             return AnalysisResponse(success=False, error=str(e))
 
 
+@router.post("/analyze/simulate", response_model=Dict[str, Any])
+async def simulate_returns(
+    request: SimulationRequest, current_user: dict = Depends(require_auth)
+):
+    """
+    Monte Carlo ROI distributions for one or more listings.
+    Each listing's paths are simulated in a worker process; the response
+    holds per-year percentile bands and the final ROI distribution.
+    """
+    if not 1 <= len(request.listings) <= settings.MONTE_CARLO_MAX_LISTINGS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Between 1 and {settings.MONTE_CARLO_MAX_LISTINGS} listings are required",
+        )
+    if not 5 <= request.years <= 30:
+        raise HTTPException(status_code=400, detail="Years must be between 5 and 30")
+    paths = request.paths or settings.MONTE_CARLO_PATHS
+    if not 1000 <= paths <= settings.MONTE_CARLO_MAX_PATHS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Paths must be between 1000 and {settings.MONTE_CARLO_MAX_PATHS}",
+        )
+
+    prices = [parse_price(listing.price) for listing in request.listings]
+    for index, price in enumerate(prices):
+        if not price:
+            raise HTTPException(
+                status_code=400, detail=f"Listing {index} has no usable price"
+            )
+
+    params = SimulationParams(years=request.years, paths=paths)
+    results = await asyncio.gather(
+        *(
+            monte_carlo_pool.simulate(
+                price,
+                params,
+                monthly_rent=listing.monthly_rent,
+                monthly_hoa=listing.monthly_hoa,
+                seed=None if request.seed is None else request.seed + index,
+            )
+            for index, (listing, price) in enumerate(zip(request.listings, prices))
+        )
+    )
+    return {"success": True, "results": results}
+
+
 @router.get("/analyses", response_model=Dict[str, Any])
 async def get_user_analyses(
     current_user: dict = Depends(optional_auth), limit: int = 50
@@ -198,6 +252,25 @@ async def delete_analysis(
         return {"success": False, "error": str(e)}
 
 
+def _combine_sections(sections: Dict[str, Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """Map generated sections onto the analysis fields; None if none succeeded"""
+    if not sections:
+        return None
+    fields = {
+        "summary": ("summary", "summary"),
+        "overall_score": ("summary", "overall_score"),
+        "key_strengths": ("strengths", "strengths"),
+        "areas_to_research": ("research_areas", "weaknesses"),
+        "hidden_risks": ("risks", "hidden_risks"),
+        "questions_for_realtor": ("questions", "questions"),
+    }
+    return {
+        name: sections[section][key]
+        for name, (section, key) in fields.items()
+        if key in sections.get(section, {})
+    }
+
+
 async def generate_property_analysis(
     *,
     address: str,
@@ -206,64 +279,39 @@ async def generate_property_analysis(
     user_id: str,
     llm_service: LLMService,
 ) -> PropertyAnalysis:
-    """Generate comprehensive property analysis using expert LLM analysis"""
-
-    # Create a comprehensive prompt for the LLM
-    prompt = f"""
-    You are an expert real estate investment analyst. Analyze this property based on the information provided and give your professional assessment.
-
-    PROPERTY DETAILS:
-    Address: {address}
-    Title: {title}
-    {f"Property Type: {manual_data.property_type}" if manual_data and manual_data.property_type else ""}
-    {f"Bedrooms: {manual_data.bedrooms}" if manual_data and manual_data.bedrooms else ""}
-    {f"Bathrooms: {manual_data.bathrooms}" if manual_data and manual_data.bathrooms else ""}
-    {f"Square Feet: {manual_data.square_feet}" if manual_data and manual_data.square_feet else ""}
-    {f"Year Built: {manual_data.year_built}" if manual_data and manual_data.year_built else ""}
-    {f"Lot Size: {manual_data.lot_size}" if manual_data and manual_data.lot_size else ""}
-    {f"Price: {manual_data.price}" if manual_data and manual_data.price else ""}
-    {f"Location Details: {manual_data.location_details}" if manual_data and manual_data.location_details else ""}
-
-    LISTING DESCRIPTION:
-    {manual_data.listing_description if manual_data and manual_data.listing_description else "No description provided"}
-
-    {f"ADDITIONAL NOTES: {manual_data.additional_notes}" if manual_data and manual_data.additional_notes else ""}
-
-    TASK: Provide a concise property analysis in JSON format. Focus only on what you can determine from the provided information:
-
-    {{
-        "summary": "2-3 sentence summary of key property characteristics",
-        "key_strengths": [
-            "3-4 key strengths based on provided data"
-        ],
-        "areas_to_research": [
-            "3-4 areas needing additional research"
-        ],
-        "hidden_risks": [
-            "3-4 potential risks based on provided info"
-        ],
-        "questions_for_realtor": [
-            "5-6 critical questions for the realtor"
-        ]
-    }}
-
-    GUIDELINES:
-    - Only analyze provided information
-    - No market speculation or made-up data
-    - Be concise and factual
-    - Focus on actionable insights
-    """
+    """Generate comprehensive property analysis using expert LLM analysis.
 
-    try:
-        import asyncio
+    Runs the interactive sections of the analysis graph concurrently under
+    one shared deadline; sections that fail fall back individually.
+    """
 
-        # Add timeout to prevent hanging
-        analysis_json = await asyncio.wait_for(
-            llm_service.generate_analysis(prompt),
-            timeout=45.0,  # 45 second timeout
+    # The deadline aborts provider requests instead of leaving them running
+    deadline = asyncio.get_running_loop().time() + 45.0
+
+    async def generate(node: SectionNode, prompt: str):
+        remaining = deadline - asyncio.get_running_loop().time()
+        return await llm_service.generate_analysis(prompt, timeout=max(remaining, 0.0))
+
+    run = ANALYSIS_GRAPH.start(address, manual_data, generate, sections=CORE_SECTIONS)
+    sections: Dict[str, Dict[str, Any]] = {}
+    async with aclosing(run.results()) as results:
+        async for section_key, result in results:
+            if result:
+                sections[section_key] = result
+    preview = sections.pop("preview", None)
+    listing_preview = ListingPreview(**preview) if preview else None
+    investment = sections.pop("investment_potential", None)
+    investment_potential = (
+        InvestmentPotential(**investment)
+        if investment
+        else InvestmentPotential(
+            rental_income="Requires market research and property condition assessment",
+            cash_flow="Based on provided property details only",
+            roi_projections="Market analysis needed for accurate projections",
+            appreciation_timeline="Requires local market research",
         )
-    except (Exception, asyncio.TimeoutError):
-        analysis_json = None
+    )
+    analysis_json = _combine_sections(sections)
 
     if analysis_json:
         # Use LLM-generated analysis
@@ -271,23 +319,19 @@ async def generate_property_analysis(
             property_address=address,
             property_title=title,
             user_id=user_id,
-            overall_score=75,  # Default score for manual analysis
+            overall_score=analysis_json.get("overall_score", 75),
             summary=analysis_json.get(
                 "summary", "Property analysis based on provided information"
             ),
             disclaimer="This report is generated from the information you provided and is for educational/informational purposes only. It is not real estate, investment, or financial advice. Please consult licensed professionals before making decisions.",
             manual_data=manual_data,
+            preview=listing_preview,
             market_analysis=MarketAnalysis(
                 trends="Analysis based on provided property information only",
                 comparables="No comparable market data available",
                 appreciation_potential="Market analysis requires additional research",
             ),
-            investment_potential=InvestmentPotential(
-                rental_income="Requires market research and property condition assessment",
-                cash_flow="Based on provided property details only",
-                roi_projections="Market analysis needed for accurate projections",
-                appreciation_timeline="Requires local market research",
-            ),
+            investment_potential=investment_potential,
             risk_assessment=RiskAssessment(
                 market_risks=["Market conditions require local research"],
                 property_risks=analysis_json.get(
@@ -331,17 +375,13 @@ async def generate_property_analysis(
             summary="Property analysis based on provided information. AI analysis was unavailable.",
             disclaimer="This report is generated from the information you provided and is for educational/informational purposes only. It is not real estate, investment, or financial advice. Please consult licensed professionals before making decisions.",
             manual_data=manual_data,
+            preview=listing_preview,
             market_analysis=MarketAnalysis(
                 trends="Analysis based on provided property information only",
                 comparables="No comparable market data available",
                 appreciation_potential="Market analysis requires additional research",
             ),
-            investment_potential=InvestmentPotential(
-                rental_income="Requires market research and property condition assessment",
-                cash_flow="Based on provided property details only",
-                roi_projections="Market analysis needed for accurate projections",
-                appreciation_timeline="Requires local market research",
-            ),
+            investment_potential=investment_potential,
             risk_assessment=RiskAssessment(
                 market_risks=["Market conditions require local research"],
                 property_risks=[
@@ -1,8 +1,8 @@
 # backend/app/routers/analyze_streaming.py
 from __future__ import annotations
-import asyncio
-import json
-from fastapi import APIRouter, Depends, HTTPException
+import uuid
+from contextlib import aclosing
+from fastapi import APIRouter, Depends, Header, HTTPException
 from fastapi.responses import StreamingResponse
 from typing import AsyncGenerator, Dict, Any, Optional
 from datetime import datetime
@@ -12,70 +12,133 @@ from ..models import (
     AnalysisRequest,
 )
 from ..services.llm_service import LLMService
+from ..services.llm_scheduler import LLMPriority
+from ..services.llm_cancellation import CancelReason
+from ..services.section_graph import ANALYSIS_GRAPH, CORE_SECTIONS, SectionNode
+from ..services.stream_buffer import StreamRegistry
+from ..config import settings
 from ..middleware.auth import require_auth
 
 
 router = APIRouter()
 
 
+# Streamed analyses of this process, replayable by Last-Event-ID. Streams
+# are not shared between uvicorn workers or replicas, so resuming needs
+# sticky sessions; a resume that lands elsewhere starts over (see below)
+stream_registry = StreamRegistry(
+    ttl_seconds=settings.SSE_STREAM_TTL_SECONDS,
+    resume_grace_seconds=settings.SSE_RESUME_GRACE_SECONDS,
+    max_streams=settings.SSE_MAX_STREAMS,
+)
+
+
 @router.post("/analyze/stream")
 async def analyze_property_streaming(
-    request: AnalysisRequest, current_user: dict = Depends(require_auth)
+    request: AnalysisRequest,
+    current_user: dict = Depends(require_auth),
+    last_event_id: Optional[str] = Header(None),
 ):
     """
     Stream property analysis results as they become available.
-    Returns Server-Sent Events (SSE) for real-time updates.
+    Returns Server-Sent Events (SSE) for real-time updates. The first
+    section, a preview computed locally from manual_data, follows
+    analysis_started immediately.
+
+    Every event has an id. Repeating the request with a ``Last-Event-ID``
+    header after a dropped connection replays the events missed since
+    then and continues with the same generation. Unknown or expired ids
+    (or a resume routed to another worker) start a new analysis, and say
+    so: the X-Stream-Resumed header is "false" and analysis_started
+    carries ``restarted_from``, so the client discards what it had.
     """
     if not request.property_address:
         raise HTTPException(status_code=400, detail="Property address is required")
 
     request.user_id = current_user["id"]
 
-    async def generate_analysis_stream() -> AsyncGenerator[str, None]:
-        try:
-            # Send initial response with analysis ID
-            analysis_id = f"analysis_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{request.user_id[:8]}"
-            print(f"🚀 Starting analysis {analysis_id} for {request.property_address}")
+    stream, after = None, 0
+    if last_event_id:
+        stream, after = stream_registry.resume(last_event_id, request.user_id)
+        if stream:
+            print(f"🔁 Resuming analysis {stream.analysis_id} after event {after}")
+        else:
+            print(f"⚠️ Cannot resume {last_event_id} here; starting a new analysis")
+    resumed = stream is not None
+
+    if stream is None:
+        analysis_id = (
+            f"analysis_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+            f"_{request.user_id[:8]}_{uuid.uuid4().hex[:6]}"
+        )
+        stream = stream_registry.start(
+            analysis_id,
+            request.user_id,
+            analysis_events(request, analysis_id, restarted_from=last_event_id),
+        )
 
-            yield f"data: {json.dumps({'type': 'analysis_started', 'analysis_id': analysis_id})}\n\n"
+    headers = {
+        "Cache-Control": "no-cache",
+        "Connection": "keep-alive",
+        "Content-Type": "text/event-stream",
+    }
+    if last_event_id:
+        headers["X-Stream-Resumed"] = "true" if resumed else "false"
+    return StreamingResponse(
+        stream_registry.attach(stream, after),
+        media_type="text/event-stream",
+        headers=headers,
+    )
+
+
+async def analysis_events(
+    request: AnalysisRequest, analysis_id: str, restarted_from: Optional[str] = None
+) -> AsyncGenerator[Dict[str, Any], None]:
+    """Events of one streamed analysis, produced independently of any
+    client connection. ``restarted_from`` is the Last-Event-ID of a stream
+    that could not be resumed"""
+    try:
+        # Send initial response with analysis ID
+        print(f"🚀 Starting analysis {analysis_id} for {request.property_address}")
+
+        started = {"type": "analysis_started", "analysis_id": analysis_id}
+        if restarted_from:
+            started["restarted_from"] = restarted_from
+        yield started
 
-            llm_service = LLMService()
+        llm_service = LLMService()
 
-            # Generate analysis sections with real-time streaming
-            print(f"🔄 Starting streaming analysis for {request.property_address}")
-            try:
-                async for (
-                    section_name,
-                    section_data,
-                ) in generate_progressive_analysis_stream(
+        # Generate analysis sections with real-time streaming
+        print(f"🔄 Starting streaming analysis for {request.property_address}")
+        try:
+            # aclosing: if the stream is abandoned, the section stream is
+            # closed right away and cancels its in-flight LLM requests
+            async with aclosing(
+                generate_progressive_analysis_stream(
                     address=request.property_address,
                     title=request.property_title or request.property_address,
                     manual_data=request.manual_data,
                     user_id=request.user_id,
                     llm_service=llm_service,
                     analysis_id=analysis_id,
-                ):
+                )
+            ) as sections:
+                async for section_name, section_data in sections:
                     print(f"✅ Section {section_name} completed")
-                    yield f"data: {json.dumps({'type': 'section_complete', 'section': section_name, 'data': section_data})}\n\n"
-            except Exception as stream_error:
-                print(f"❌ Streaming error: {stream_error}")
-                yield f"data: {json.dumps({'type': 'error', 'message': str(stream_error)})}\n\n"
+                    yield {
+                        "type": "section_complete",
+                        "section": section_name,
+                        "data": section_data,
+                    }
+        except Exception as stream_error:
+            print(f"❌ Streaming error: {stream_error}")
+            yield {"type": "error", "message": str(stream_error)}
 
-            # Send completion signal
-            yield f"data: {json.dumps({'type': 'analysis_complete', 'analysis_id': analysis_id})}\n\n"
+        # Send completion signal
+        yield {"type": "analysis_complete", "analysis_id": analysis_id}
 
-        except Exception as e:
-            yield f"data: {json.dumps({'type': 'error', 'message': str(e)})}\n\n"
-
-    return StreamingResponse(
-        generate_analysis_stream(),
-        media_type="text/event-stream",
-        headers={
-            "Cache-Control": "no-cache",
-            "Connection": "keep-alive",
-            "Content-Type": "text/event-stream",
-        },
-    )
+    except Exception as e:
+        yield {"type": "error", "message": str(e)}
 
 
 async def generate_progressive_analysis_stream(
@@ -91,73 +154,23 @@ async def generate_progressive_analysis_stream(
 
     print(f"🚀 Starting progressive analysis for {address}")
 
-    from ..services.optimized_prompts import OptimizedPrompts
-
-    # Get optimized prompts
-    prompts = OptimizedPrompts.get_all_prompts(address, manual_data)
-    print(f"📝 Generated {len(prompts)} prompts")
-
-    # Create tasks for parallel execution
-    tasks = {
-        "summary": llm_service.generate_analysis(prompts["summary"]),
-        "strengths": llm_service.generate_analysis(prompts["strengths"]),
-        "research_areas": llm_service.generate_analysis(prompts["research_areas"]),
-        "risks": llm_service.generate_analysis(prompts["risks"]),
-        "questions": llm_service.generate_analysis(prompts["questions"]),
-    }
-    print(f"🔄 Created {len(tasks)} LLM tasks")
-
-    # Track which sections have been yielded
-    yielded_sections = set()
-
-    # Use asyncio.gather with return_when=FIRST_COMPLETED to get results as they finish
-    pending_tasks = {name: asyncio.create_task(coro) for name, coro in tasks.items()}
-
-    while pending_tasks:
-        # Wait for the first task to complete
-        done, pending = await asyncio.wait(
-            pending_tasks.values(), return_when=asyncio.FIRST_COMPLETED
+    async def generate(node: SectionNode, prompt: str):
+        return await llm_service.generate_analysis(
+            prompt, LLMPriority.INTERACTIVE_STREAMING
         )
 
-        for completed_task in done:
-            # Find which section this task belongs to
-            section_name = None
-            for name, task in pending_tasks.items():
-                if task == completed_task:
-                    section_name = name
-                    break
-
-            print(f"🔍 Section identified: {section_name}")
-
-            try:
-                result = completed_task.result()
-                print(f"🔍 LLM result received: {result}")
-
-                if section_name and section_name not in yielded_sections:
-                    yielded_sections.add(section_name)
-
-                    # Format the section data
-                    section_data = format_section_data(section_name, result)
-                    print(
-                        f"🔍 Yielding section: {section_name} with data: {section_data}"
-                    )
-                    yield section_name, section_data
-
-                    # Add a small delay to create gradual progress effect
-                    if len(yielded_sections) < len(tasks):
-                        await asyncio.sleep(0.4)  # 400ms delay between completions
-
-            except Exception as e:
-                print(f"❌ Error in analysis section {section_name}: {e}")
-
-                if section_name and section_name not in yielded_sections:
-                    yielded_sections.add(section_name)
-                    section_data = format_section_data(section_name, None)
-                    yield section_name, section_data
-
-            # Remove completed task from pending
-            if section_name:
-                del pending_tasks[section_name]
+    # Sections are sent the moment they finish; if the stream is abandoned
+    # (closed or cancelled), their in-flight LLM requests are aborted
+    run = ANALYSIS_GRAPH.start(
+        address,
+        manual_data,
+        generate,
+        sections=CORE_SECTIONS,
+        cancel_reason=CancelReason.CLIENT_DISCONNECTED,
+    )
+    async with aclosing(run.results()) as sections:
+        async for section_name, result in sections:
+            yield section_name, format_section_data(section_name, result)
 
 
 def format_section_data(
@@ -165,7 +178,10 @@ def format_section_data(
 ) -> Dict[str, Any]:
     """Format section data for streaming response"""
 
-    if section_name == "summary":
+    if section_name in ("preview", "investment_potential"):
+        # Computed locally, so there is nothing to substitute
+        return result or {}
+    elif section_name == "summary":
         return {
             "summary": result.get(
                 "summary", "Property analysis based on provided information"
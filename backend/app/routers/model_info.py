@@ -1,5 +1,6 @@
 from fastapi import APIRouter
 from app.services.llm_service import LLMService
+from app.services.ollama_pool import ollama_pool
 from app.config import settings
 
 router = APIRouter(prefix="/model-info", tags=["model-info"])
@@ -13,10 +14,15 @@ async def get_model_info():
     """
     Get current LLM model information
     """
-    return {
+    info = {
         "provider": llm_service.provider.value,
         "model": llm_service.model,
         "environment": settings.ENVIRONMENT,
         "is_production": settings.is_production,
         "is_development": settings.is_development,
     }
+
+    if ollama_pool.is_configured():
+        info["ollama_pool"] = ollama_pool.get_stats()
+
+    return info
@@ -2,41 +2,271 @@
 WebSocket endpoints for real-time analysis progress updates
 """
 
-from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Depends
-from typing import Dict, List
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Depends, HTTPException
+from typing import Any, Dict, List, Optional, Set
+import asyncio
 import json
-from ..services.async_processor import async_processor, AnalysisJob
+import time
+from ..config import settings
+from ..services.async_processor import async_processor, ExecutionMode
+from ..services.job_events import Subscription
+from ..services.connection_outbox import ConnectionOutbox
+from ..services.ws_codec import negotiate
+from ..services.admission import QueueFullError
 from ..middleware.auth import get_current_user
 
 
 router = APIRouter()
 
 
+# Close codes sent when the server ends a connection
+CLOSE_IDLE = 4000  # nothing sent either way for WS_IDLE_TIMEOUT_SECONDS
+CLOSE_PING_TIMEOUT = 4001  # no reply to a heartbeat ping
+CLOSE_REPLACED = 4002  # evicted by a newer connection of the same user
+CLOSE_TRY_AGAIN = 1013  # node is at WS_MAX_CONNECTIONS
+
+
+class Connection:
+    """A client socket with its codec, outbound queue and writer task"""
+
+    def __init__(self, websocket: WebSocket, user_id: str, codec: Any):
+        self.websocket = websocket
+        self.user_id = user_id
+        self.codec = codec
+        self.outbox = ConnectionOutbox(
+            settings.WS_OUTBOX_MAX_MESSAGES, settings.WS_OUTBOX_POLICY
+        )
+        self.writer: Optional[asyncio.Task] = None
+        # Job id -> subscription handle held by this connection
+        self.subscriptions: Dict[str, Subscription] = {}
+
+        now = time.monotonic()
+        self.last_seen = now  # any frame from the client, pongs included
+        self.last_active = now  # real traffic in either direction
+        self.ping_sent_at: Optional[float] = None
+        self.close_reason: Optional[str] = None
+
+    def send(self, message: Dict[str, Any]):
+        """Queue a message; never waits on the client"""
+        self.outbox.put(message)
+        self.last_active = time.monotonic()
+
+    async def receive(self) -> Dict[str, Any]:
+        """Next client message, as text JSON or a binary frame in our codec"""
+        message = await self.websocket.receive()
+        if message["type"] == "websocket.disconnect":
+            raise WebSocketDisconnect(message.get("code", 1000))
+        if message.get("text") is not None:
+            return json.loads(message["text"])
+        return self.codec.decode(message["bytes"])
+
+    async def next_message(self) -> Optional[Dict[str, Any]]:
+        """Wait for the next client message, pinging when the client is quiet.
+
+        Returns None when the connection should be reaped: a ping went
+        unanswered for WS_PING_TIMEOUT_SECONDS, or nothing but heartbeats
+        has passed for WS_IDLE_TIMEOUT_SECONDS (``close_reason`` says which).
+        """
+        while self.close_reason is None:
+            now = time.monotonic()
+            if self.ping_sent_at is not None:
+                deadline = self.ping_sent_at + settings.WS_PING_TIMEOUT_SECONDS
+                if now >= deadline:
+                    self.close_reason = "ping_timeout"
+                    break
+            else:
+                deadline = self.last_seen + settings.WS_PING_INTERVAL_SECONDS
+                if now >= deadline:
+                    self.outbox.put({"type": "ping"})
+                    self.ping_sent_at = now
+                    continue
+
+            if settings.WS_IDLE_TIMEOUT_SECONDS:
+                idle_deadline = self.last_active + settings.WS_IDLE_TIMEOUT_SECONDS
+                if now >= idle_deadline:
+                    self.close_reason = "idle"
+                    break
+                deadline = min(deadline, idle_deadline)
+
+            try:
+                async with asyncio.timeout(deadline - now):
+                    message = await self.receive()
+            except TimeoutError:
+                continue
+
+            self.last_seen = time.monotonic()
+            self.ping_sent_at = None
+            if message.get("type") != "pong":
+                self.last_active = self.last_seen
+                return message
+        return None
+
+
 # Store active WebSocket connections
 class ConnectionManager:
+    """Open connections per user, capped per user and per node.
+
+    Connections live in per-user sets so that closing one is constant
+    time; reaped and rejected connections are counted by reason.
+    """
+
     def __init__(self):
-        self.active_connections: Dict[str, List[WebSocket]] = {}
-
-    async def connect(self, websocket: WebSocket, user_id: str):
-        await websocket.accept()
-        if user_id not in self.active_connections:
-            self.active_connections[user_id] = []
-        self.active_connections[user_id].append(websocket)
-
-    def disconnect(self, websocket: WebSocket, user_id: str):
-        if user_id in self.active_connections:
-            self.active_connections[user_id].remove(websocket)
-            if not self.active_connections[user_id]:
-                del self.active_connections[user_id]
-
-    async def send_personal_message(self, message: str, user_id: str):
-        if user_id in self.active_connections:
-            for connection in self.active_connections[user_id]:
-                try:
-                    await connection.send_text(message)
-                except Exception:
-                    # Remove broken connections
-                    self.active_connections[user_id].remove(connection)
+        self.active_connections: Dict[str, Set[Connection]] = {}
+        self.connection_count = 0
+        self.peak_connections = 0
+        self.opened = 0
+        self.closed: Dict[str, int] = {}  # by reason
+        # Outbox totals of connections that have closed
+        self.closed_totals: Dict[str, int] = {
+            "sent": 0,
+            "dropped": 0,
+            "coalesced": 0,
+            "bytes_sent": 0,
+        }
+        self.encodings: Dict[str, int] = {}
+
+    async def connect(self, websocket: WebSocket, user_id: str) -> Optional[Connection]:
+        """Accept a connection, or None if the node is full.
+
+        A user at WS_MAX_CONNECTIONS_PER_USER has their least recently
+        active connection closed to make room, since that is usually a
+        tab or laptop that has gone away. The slot is taken before the
+        first await, so concurrent connects cannot overshoot either cap.
+        """
+        # MessagePack if the client offers it (see services/ws_codec.py),
+        # JSON otherwise; permessage-deflate is negotiated by uvicorn
+        codec, subprotocol = negotiate(websocket.scope.get("subprotocols", []))
+
+        if (
+            settings.WS_MAX_CONNECTIONS
+            and self.connection_count >= settings.WS_MAX_CONNECTIONS
+        ):
+            self._count_closed("rejected")
+            await websocket.accept(subprotocol=subprotocol)
+            await self._close(websocket, CLOSE_TRY_AGAIN, "Too many connections")
+            return None
+
+        evicted = None
+        user_connections = self.active_connections.setdefault(user_id, set())
+        if (
+            settings.WS_MAX_CONNECTIONS_PER_USER
+            and len(user_connections) >= settings.WS_MAX_CONNECTIONS_PER_USER
+        ):
+            evicted = min(user_connections, key=lambda c: c.last_active)
+            evicted.close_reason = "replaced"
+            self._release(evicted)
+
+        connection = Connection(websocket, user_id, codec)
+        self.active_connections.setdefault(user_id, set()).add(connection)
+        self.connection_count += 1
+        self.peak_connections = max(self.peak_connections, self.connection_count)
+
+        try:
+            if evicted:
+                await self._stop_writer(evicted)
+                await self._close(evicted.websocket, CLOSE_REPLACED, "Replaced")
+            await websocket.accept(subprotocol=subprotocol)
+        except BaseException as error:
+            # Handshake failed or was cancelled: give the slot back
+            connection.close_reason = "accept_failed"
+            self._release(connection)
+            if isinstance(error, asyncio.CancelledError):
+                raise
+            return None
+        if connection not in self.active_connections.get(user_id, ()):
+            # Replaced by a newer connection while the handshake ran
+            await self._close(websocket, CLOSE_REPLACED, "Replaced")
+            return None
+
+        self.encodings[codec.name] = self.encodings.get(codec.name, 0) + 1
+        connection.writer = asyncio.create_task(self._write(connection))
+        self.opened += 1
+        return connection
+
+    async def _write(self, connection: Connection):
+        try:
+            websocket = connection.websocket
+            send = (
+                websocket.send_bytes if connection.codec.binary else websocket.send_text
+            )
+            await connection.outbox.run(send, connection.codec.encode)
+        except Exception:
+            # The socket is gone; the receive loop sees the disconnect
+            pass
+
+    async def _close(self, websocket: WebSocket, code: int, reason: str):
+        # A dead peer never completes the close handshake; don't wait on it
+        try:
+            async with asyncio.timeout(5.0):
+                await websocket.close(code=code, reason=reason)
+        except Exception:
+            pass
+
+    def _count_closed(self, reason: str):
+        self.closed[reason] = self.closed.get(reason, 0) + 1
+
+    async def reap(self, connection: Connection):
+        """Close a connection the heartbeat found dead or idle"""
+        await self.disconnect(connection)
+        code = CLOSE_IDLE if connection.close_reason == "idle" else CLOSE_PING_TIMEOUT
+        await self._close(connection.websocket, code, connection.close_reason or "")
+
+    async def disconnect(self, connection: Connection):
+        """Release a connection's bookkeeping (safe to call more than once)"""
+        self._release(connection)
+        await self._stop_writer(connection)
+
+    def _release(self, connection: Connection):
+        """Free a connection's slot and subscriptions without awaiting, so
+        callers can reserve and release slots atomically"""
+        connections = self.active_connections.get(connection.user_id)
+        if not connections or connection not in connections:
+            return
+        connections.discard(connection)
+        if not connections:
+            del self.active_connections[connection.user_id]
+        self.connection_count -= 1
+        self._count_closed(connection.close_reason or "client")
+
+        # Release every subscription so the processor holds no dead sockets
+        for subscription in connection.subscriptions.values():
+            async_processor.unsubscribe(subscription)
+        connection.subscriptions.clear()
+
+        for key, value in connection.outbox.get_stats().items():
+            if key in self.closed_totals:
+                self.closed_totals[key] += value
+
+    async def _stop_writer(self, connection: Connection):
+        if connection.writer:
+            connection.writer.cancel()
+            await asyncio.gather(connection.writer, return_exceptions=True)
+
+    async def send_personal_message(self, message: Dict[str, Any], user_id: str):
+        # Copy: connections may close while messages are queued
+        for connection in list(self.active_connections.get(user_id, ())):
+            connection.send(message)
+
+    def get_stats(self) -> Dict[str, Any]:
+        totals = dict(self.closed_totals)
+        queued = 0
+        for user_connections in self.active_connections.values():
+            for connection in user_connections:
+                outbox_stats = connection.outbox.get_stats()
+                queued += outbox_stats["queued"]
+                for key in totals:
+                    totals[key] += outbox_stats[key]
+        return {
+            "connections": self.connection_count,
+            "peak_connections": self.peak_connections,
+            "users": len(self.active_connections),
+            "opened": self.opened,
+            "closed": dict(self.closed),
+            "queued_messages": queued,
+            "outbox_policy": settings.WS_OUTBOX_POLICY,
+            "encodings": dict(self.encodings),
+            **totals,
+        }
 
 
 manager = ConnectionManager()
@@ -44,89 +274,101 @@ manager = ConnectionManager()
 
 @router.websocket("/ws/analysis/{user_id}")
 async def websocket_endpoint(websocket: WebSocket, user_id: str):
-    """WebSocket endpoint for real-time analysis updates"""
-    await manager.connect(websocket, user_id)
+    """WebSocket endpoint for real-time analysis updates.
+
+    The server pings quiet clients (``{"type": "ping"}``, answered with
+    ``{"type": "pong"}``) and closes connections that stop answering or
+    stay idle, so dead sockets don't accumulate.
+    """
+    connection = await manager.connect(websocket, user_id)
+    if connection is None:
+        return
+    subscriptions = connection.subscriptions
 
     try:
         while True:
             # Keep connection alive and handle incoming messages
-            data = await websocket.receive_text()
-            message = json.loads(data)
+            message = await connection.next_message()
+            if message is None:
+                await manager.reap(connection)
+                break
 
             if message.get("type") == "subscribe_job":
                 job_id = message.get("job_id")
                 if job_id:
                     # Subscribe to job updates
-                    await subscribe_to_job_updates(websocket, user_id, job_id)
+                    await subscribe_to_job_updates(
+                        connection, user_id, job_id, subscriptions
+                    )
 
             elif message.get("type") == "unsubscribe_job":
                 job_id = message.get("job_id")
                 if job_id:
                     # Unsubscribe from job updates
-                    await unsubscribe_from_job_updates(websocket, user_id, job_id)
+                    await unsubscribe_from_job_updates(job_id, subscriptions)
 
     except WebSocketDisconnect:
-        manager.disconnect(websocket, user_id)
+        pass
+    finally:
+        await manager.disconnect(connection)
 
 
-async def subscribe_to_job_updates(websocket: WebSocket, user_id: str, job_id: str):
-    """Subscribe to updates for a specific job"""
+async def subscribe_to_job_updates(
+    connection: Connection,
+    user_id: str,
+    job_id: str,
+    subscriptions: Dict[str, Subscription],
+):
+    """Subscribe to updates for a specific job.
+
+    Sends a full ``job_update`` snapshot, then ``job_delta`` events with
+    increasing ``seq`` holding only changed fields and new sections.
+    Subscribing again (e.g. after a sequence gap) replaces the previous
+    subscription and resends the snapshot. Events go through the
+    connection's outbox, so publishing never waits on this client.
+    """
     job = await async_processor.get_job_status(job_id)
 
-    if not job or job.user_id != user_id:
-        await websocket.send_text(
-            json.dumps({"type": "error", "message": "Job not found or access denied"})
-        )
+    if not job or not job.can_access(user_id):
+        connection.send({"type": "error", "message": "Job not found or access denied"})
         return
 
-    # Send current job status
-    await websocket.send_text(
-        json.dumps(
-            {
-                "type": "job_update",
-                "job_id": job_id,
-                "data": {
-                    "status": job.status.value,
-                    "progress": job.progress,
-                    "current_section": job.current_section,
-                    "results": job.results,
-                    "error_message": job.error_message,
-                    "updated_at": job.updated_at.isoformat(),
-                },
-            }
-        )
-    )
-
-    # Set up progress callback for this job
-    async def progress_callback(job: AnalysisJob):
-        if job.id == job_id:
-            await websocket.send_text(
-                json.dumps(
-                    {
-                        "type": "job_update",
-                        "job_id": job_id,
-                        "data": {
-                            "status": job.status.value,
-                            "progress": job.progress,
-                            "current_section": job.current_section,
-                            "results": job.results,
-                            "error_message": job.error_message,
-                            "updated_at": job.updated_at.isoformat(),
-                        },
-                    }
-                )
-            )
-
-    # Add callback to the processor
-    if job_id not in async_processor.progress_callbacks:
-        async_processor.progress_callbacks[job_id] = []
-    async_processor.progress_callbacks[job_id].append(progress_callback)
-
-
-async def unsubscribe_from_job_updates(websocket: WebSocket, user_id: str, job_id: str):
+    await unsubscribe_from_job_updates(job_id, subscriptions)
+
+    # Subscribe before reading the snapshot so no delta falls in between.
+    # Deltas arriving before the snapshot is queued are held back; from
+    # then on the snapshot's seq fences off every delta it already covers,
+    # including ones the event bus delivers late
+    buffered: List[Dict[str, Any]] = []
+    fence: Optional[int] = None
+
+    def progress_callback(event: Dict[str, Any]):
+        if fence is None:
+            buffered.append(event)
+        elif event["seq"] > fence:
+            connection.send(event)
+
+    subscriptions[job_id] = async_processor.subscribe(job_id, progress_callback)
+
+    # Re-read after subscribing so the snapshot is at least as new as the
+    # first delta the subscription can see (the job may run in another
+    # process, with its state only in the job store)
+    job = await async_processor.get_job_status(job_id) or job
+    snapshot = async_processor.job_snapshot(job)
+    connection.send(snapshot)
+    fence = snapshot["seq"]
+    for event in buffered:
+        if event["seq"] > fence:
+            connection.send(event)
+
+
+async def unsubscribe_from_job_updates(
+    job_id: str, subscriptions: Dict[str, Subscription]
+):
     """Unsubscribe from job updates"""
-    # Remove callback (implementation depends on how callbacks are stored)
-    pass
+    subscription = subscriptions.pop(job_id, None)
+    if subscription:
+        async_processor.unsubscribe(subscription)
 
 
 @router.post("/analysis/async")
@@ -138,10 +380,16 @@ async def start_async_analysis(
         property_address = request.get("property_address")
         property_title = request.get("property_title", property_address)
         manual_data = request.get("manual_data")
+        execution_mode = request.get("execution_mode", ExecutionMode.INTERACTIVE.value)
 
         if not property_address:
             return {"error": "Property address is required"}
 
+        try:
+            execution_mode = ExecutionMode(execution_mode)
+        except ValueError:
+            return {"error": f"Unknown execution mode: {execution_mode}"}
+
         # Convert manual_data to ManualPropertyData if provided
         manual_data_obj = None
         if manual_data:
@@ -155,6 +403,8 @@ async def start_async_analysis(
             property_address=property_address,
             property_title=property_title,
             manual_data=manual_data_obj,
+            execution_mode=execution_mode,
+            plan=(current_user.get("app_metadata") or {}).get("plan"),
         )
 
         return {
@@ -163,6 +413,12 @@ async def start_async_analysis(
             "websocket_url": f"/ws/analysis/{current_user['id']}",
         }
 
+    except QueueFullError as e:
+        raise HTTPException(
+            status_code=503,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after)},
+        )
     except Exception as e:
         return {"error": str(e)}
 
@@ -173,7 +429,7 @@ async def get_job_status(job_id: str, current_user: dict = Depends(get_current_u
     try:
         job = await async_processor.get_job_status(job_id)
 
-        if not job or job.user_id != current_user["id"]:
+        if not job or not job.can_access(current_user["id"]):
             return {"error": "Job not found or access denied"}
 
         return {
@@ -185,6 +441,7 @@ async def get_job_status(job_id: str, current_user: dict = Depends(get_current_u
                 "current_section": job.current_section,
                 "results": job.results,
                 "error_message": job.error_message,
+                "execution_mode": job.execution_mode.value,
                 "created_at": job.created_at.isoformat(),
                 "updated_at": job.updated_at.isoformat(),
                 "estimated_completion": job.estimated_completion.isoformat()
@@ -218,7 +475,12 @@ async def get_processor_stats():
     try:
         stats = async_processor.get_job_statistics()
 
-        return {"success": True, "processor_stats": stats, "cache_enabled": False}
+        return {
+            "success": True,
+            "processor_stats": stats,
+            "websockets": manager.get_stats(),
+            "cache_enabled": False,
+        }
 
     except Exception as e:
         return {"error": str(e)}
@@ -0,0 +1,70 @@
+"""
+Admission control and completion estimates for analysis jobs
+Projects queue wait from observed section latency so the API can turn work
+away with a meaningful Retry-After instead of queueing it indefinitely
+"""
+
+import math
+from typing import Optional
+
+
+class QueueFullError(Exception):
+    """Raised when a job would wait longer than the admission threshold"""
+
+    def __init__(self, projected_wait: float, retry_after: int):
+        self.projected_wait = projected_wait
+        self.retry_after = retry_after
+        super().__init__(
+            f"Analysis queue is full (projected wait {projected_wait:.0f}s). "
+            f"Retry in {retry_after}s."
+        )
+
+
+class QueueEstimator:
+    """EWMA of section and job latency, used for ETAs and admission"""
+
+    def __init__(self, initial_section_seconds: float = 10.0, alpha: float = 0.2):
+        self.alpha = alpha
+        self.section_seconds = initial_section_seconds
+        self.job_seconds_observed: Optional[float] = None
+        self.sections_observed = 0
+        self.jobs_observed = 0
+
+    def record_section(self, seconds: float):
+        self.sections_observed += 1
+        self.section_seconds += self.alpha * (seconds - self.section_seconds)
+
+    def record_job(self, seconds: float):
+        self.jobs_observed += 1
+        if self.job_seconds_observed is None:
+            self.job_seconds_observed = seconds
+        else:
+            self.job_seconds_observed += self.alpha * (
+                seconds - self.job_seconds_observed
+            )
+
+    def remaining_seconds(self, remaining_sections: int, concurrency: int) -> float:
+        """Time to finish ``remaining_sections`` of a running job"""
+        return math.ceil(remaining_sections / max(concurrency, 1)) * (
+            self.section_seconds
+        )
+
+    def job_seconds(self, sections: int, concurrency: int) -> float:
+        """Expected time a worker spends on one job"""
+        if self.job_seconds_observed is not None:
+            return self.job_seconds_observed
+        return self.remaining_seconds(sections, concurrency)
+
+    def projected_wait(
+        self, jobs_ahead: int, workers: int, job_seconds: float
+    ) -> float:
+        """Queue wait for a job with ``jobs_ahead`` queued in front of it"""
+        return jobs_ahead / max(workers, 1) * job_seconds
+
+    def retry_after(
+        self, jobs_queued: int, workers: int, job_seconds: float, max_wait: float
+    ) -> int:
+        """Seconds until the queue drains back below the admission threshold"""
+        throughput = max(workers, 1) / job_seconds  # jobs per second
+        excess_jobs = jobs_queued - max_wait * throughput
+        return max(1, math.ceil(excess_jobs / throughput))
@@ -4,16 +4,33 @@ Handles background jobs with real-time progress updates
 """
 
 import asyncio
+import dataclasses
+import json
+import os
+import socket
+import time
 import uuid
+import zlib
 from datetime import datetime, timedelta
-from typing import Dict, Any, Optional, List, Callable
+from collections import OrderedDict
+from typing import Dict, Any, Optional, List, Callable, Tuple
 from enum import Enum
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from ..config import settings
 from ..models import ManualPropertyData
 from ..services.llm_service import LLMService
-
-# Caching removed for now
-from ..services.optimized_prompts import OptimizedPrompts
+from ..services.llm_scheduler import LLMPriority, llm_scheduler
+from ..services.openai_batch import batch_runner
+from ..services.job_store import JobStore, create_job_store
+from ..services.job_queue import create_job_queue
+from ..services.admission import QueueEstimator, QueueFullError
+from ..services.llm_cancellation import CancelReason, cancellation_stats
+from ..services.job_metrics import JobMetrics
+from ..services.job_dedup import job_fingerprints
+from ..services.autoscaler import PoolSample, WorkerAutoscaler
+from ..services.job_events import JobEventEncoder, Subscription, SubscriptionRegistry
+from ..services.job_event_bus import create_event_bus
+from ..services.section_graph import ANALYSIS_GRAPH, SectionNode, SectionRun
 
 
 class JobStatus(Enum):
@@ -24,7 +41,20 @@ class JobStatus(Enum):
     CANCELLED = "cancelled"
 
 
-@dataclass
+TERMINAL_STATUSES = (JobStatus.COMPLETED, JobStatus.FAILED, JobStatus.CANCELLED)
+
+
+class ExecutionMode(Enum):
+    INTERACTIVE = "interactive"  # Chat completions, processed by workers
+    BATCH = "batch"  # Deferred OpenAI Batch API submission
+
+
+# Sections of every analysis job, and how many of them need the LLM
+ANALYSIS_SECTIONS = [(node.key, node.name) for node in ANALYSIS_GRAPH]
+GENERATED_SECTIONS = [node.key for node in ANALYSIS_GRAPH if not node.local]
+
+
+@dataclass(slots=True)
 class AnalysisJob:
     """Represents an analysis job"""
 
@@ -41,17 +71,149 @@ class AnalysisJob:
     created_at: datetime
     updated_at: datetime
     estimated_completion: Optional[datetime]
+    execution_mode: ExecutionMode = ExecutionMode.INTERACTIVE
+    plan: Optional[str] = None  # Subscription plan, sets fair-share weight
+    fingerprints: List[str] = field(default_factory=list)  # Dedup identity
+    shared_with: List[str] = field(default_factory=list)  # Users attached by dedup
+    event_seq: int = 0  # Seq of the last progress event published
+    batch_ids: Dict[str, str] = field(default_factory=dict)  # Section -> batch
+
+    def can_access(self, user_id: str) -> bool:
+        return user_id == self.user_id or user_id in self.shared_with
+
+    def to_record(self) -> Dict[str, Any]:
+        """Serialize job state for the job store (results are stored per section)"""
+        return {
+            "id": self.id,
+            "user_id": self.user_id,
+            "status": self.status.value,
+            "progress": self.progress,
+            "created_at": self.created_at.isoformat(),
+            "updated_at": self.updated_at.isoformat(),
+            "payload": {
+                "property_address": self.property_address,
+                "property_title": self.property_title,
+                "manual_data": self.manual_data,
+                "current_section": self.current_section,
+                "error_message": self.error_message,
+                "estimated_completion": self.estimated_completion.isoformat()
+                if self.estimated_completion
+                else None,
+                "execution_mode": self.execution_mode.value,
+                "plan": self.plan,
+                "fingerprint": self.fingerprints[0] if self.fingerprints else None,
+                "fingerprints": self.fingerprints,
+                "shared_with": self.shared_with,
+                "event_seq": self.event_seq,
+                "batch_ids": self.batch_ids,
+            },
+        }
+
+    @classmethod
+    def from_record(cls, record: Dict[str, Any]) -> "AnalysisJob":
+        """Rebuild a job from a job store record"""
+        payload = record["payload"]
+        return cls(
+            id=record["id"],
+            user_id=record["user_id"],
+            property_address=payload["property_address"],
+            property_title=payload["property_title"],
+            manual_data=payload.get("manual_data"),
+            status=JobStatus(record["status"]),
+            progress=record["progress"],
+            current_section=payload.get("current_section"),
+            results=record.get("results", {}),
+            error_message=payload.get("error_message"),
+            created_at=datetime.fromisoformat(record["created_at"]),
+            updated_at=datetime.fromisoformat(record["updated_at"]),
+            estimated_completion=datetime.fromisoformat(payload["estimated_completion"])
+            if payload.get("estimated_completion")
+            else None,
+            execution_mode=ExecutionMode(
+                payload.get("execution_mode", ExecutionMode.INTERACTIVE.value)
+            ),
+            plan=payload.get("plan"),
+            fingerprints=payload.get("fingerprints", []),
+            shared_with=payload.get("shared_with", []),
+            event_seq=payload.get("event_seq", 0),
+            batch_ids=payload.get("batch_ids", {}),
+        )
+
+
+# Users with queue-wait metrics kept in memory (least recently active dropped)
+MAX_TRACKED_USERS = 1000
+
+
+@dataclass(slots=True)
+class _QueueWaitStats:
+    """Queue wait of one user's jobs"""
+
+    jobs: int = 0
+    total_wait: float = 0.0
+    max_wait: float = 0.0
+
+    def record(self, wait: float):
+        self.jobs += 1
+        self.total_wait += wait
+        self.max_wait = max(self.max_wait, wait)
 
 
 class AsyncAnalysisProcessor:
     """Handles async analysis processing with progress tracking"""
 
-    def __init__(self):
+    def __init__(
+        self, store: Optional[JobStore] = None, job_queue=None, event_bus=None
+    ):
         self.jobs: Dict[str, AnalysisJob] = {}
-        self.job_queue: asyncio.Queue = asyncio.Queue()
+        self.store = store or create_job_store()
+        self.job_queue = job_queue or create_job_queue(self.store)
+        self.instance_id = f"{socket.gethostname()}-{os.getpid()}"
+        self.leased_jobs: set[str] = set()
+        self.user_queue_waits: OrderedDict[str, _QueueWaitStats] = OrderedDict()
         self.workers: List[asyncio.Task] = []
-        self.progress_callbacks: Dict[str, List[Callable]] = {}
-        self.max_workers = 3  # Configurable
+        self.subscriptions = SubscriptionRegistry()
+        self.events = JobEventEncoder()
+        self.event_bus = event_bus or create_event_bus(self.instance_id)
+        rate = settings.JOB_PROGRESS_MAX_EVENTS_PER_SECOND
+        self.progress_interval = 1.0 / rate if rate > 0 else 0.0
+        self.last_event_at: Dict[str, float] = {}
+        self.pending_events: Dict[str, asyncio.Task] = {}
+        self.batch_tasks: Dict[str, asyncio.Task] = {}
+        self.section_runs: Dict[str, SectionRun] = {}
+        self.metrics = JobMetrics()
+
+        # Fingerprint -> pending/running job, for deduplicating submissions
+        self.dedup_index: Dict[str, str] = {}
+        self.dedup_hits = 0
+        self.dedup_shared_hits = 0
+
+        # Terminal jobs stay in memory as compact records in LRU order, with
+        # their results compressed out of the hot dict
+        self.retained_jobs: OrderedDict[str, None] = OrderedDict()
+        self.archived_results: Dict[str, bytes] = {}
+        self.max_retained_jobs = settings.JOB_MAX_RETAINED
+        self.retention_task: Optional[asyncio.Task] = None
+
+        # Worker pool sized by the autoscaler between min and max workers
+        self.max_workers = settings.MAX_WORKERS
+        self.min_workers = max(1, min(settings.JOB_MIN_WORKERS, self.max_workers))
+        self.target_workers = self.min_workers
+        self.autoscaler = WorkerAutoscaler(
+            self.min_workers,
+            self.max_workers,
+            target_wait_seconds=settings.JOB_AUTOSCALE_TARGET_WAIT_SECONDS,
+            latency_factor=settings.JOB_AUTOSCALE_LATENCY_FACTOR,
+        )
+        self.autoscale_task: Optional[asyncio.Task] = None
+        self.lease_task: Optional[asyncio.Task] = None
+        self._worker_seq = 0
+        self._sections_at_last_sample = 0
+        self._last_sample_at = 0.0
+        self.idle_workers: set[asyncio.Task] = set()
+        self.draining = False
+        self.section_concurrency = settings.JOB_SECTION_CONCURRENCY
+        self.estimator = QueueEstimator(settings.JOB_SECTION_SECONDS_ESTIMATE)
+        self.admission_rejections = 0
         self.is_running = False
 
     async def start(self):
@@ -60,25 +222,106 @@ class AsyncAnalysisProcessor:
             return
 
         self.is_running = True
+        await self.store.open()
+        await self.event_bus.start(
+            self._deliver_event, lambda job_id: bool(self.subscriptions.for_job(job_id))
+        )
 
         # Start worker tasks
-        for i in range(self.max_workers):
-            worker = asyncio.create_task(self._worker(f"worker-{i}"))
-            self.workers.append(worker)
+        for _ in range(self.target_workers):
+            self._spawn_worker()
+
+        await batch_runner.start()
+        self.retention_task = asyncio.create_task(self._retention_loop())
+        self._last_sample_at = time.monotonic()
+        self.autoscale_task = asyncio.create_task(self._autoscale_loop())
+        if not self.job_queue.shared:
+            # With a shared queue, unfinished jobs are picked up again once
+            # their owner's lease expires
+            await self._recover_jobs()
+            if self.store.supports_leases:
+                self.lease_task = asyncio.create_task(self._lease_loop())
+
+        print(
+            f"Started {len(self.workers)} analysis workers "
+            f"(autoscaling {self.min_workers}-{self.max_workers})"
+        )
+
+    async def _recover_jobs(self):
+        """Re-queue jobs that were pending or in progress before a restart.
+
+        Only jobs no live process holds are taken: processes that share the
+        store through per-process queues each keep their own jobs leased
+        (see ``_lease_loop``).
+        """
+        records = await self.store.adopt_orphaned(
+            self.instance_id, settings.JOB_LEASE_SECONDS
+        )
+        records = [r for r in records if r["id"] not in self.jobs]
+        for record in records:
+            job = AnalysisJob.from_record(record)
+            job.status = JobStatus.PENDING
+            job.updated_at = datetime.now()
+            self._track(job)
+            for fingerprint in job.fingerprints:
+                self.dedup_index[fingerprint] = job.id
+            self._persist(job)
+            await self._enqueue(job)
+
+        if records:
+            print(f"Recovered {len(records)} unfinished analysis jobs")
 
-        print(f"Started {self.max_workers} analysis workers")
+    async def stop(self, grace_seconds: Optional[float] = None):
+        """Stop the async processor, draining in-flight jobs.
 
-    async def stop(self):
-        """Stop the async processor"""
+        Idle workers stop immediately; busy ones get ``grace_seconds`` to
+        finish their job. Jobs still running after that are cancelled with
+        their completed sections checkpointed and are resumed, generating
+        only the missing sections, after restart or by another process.
+        """
+        if grace_seconds is None:
+            grace_seconds = settings.JOB_DRAIN_GRACE_SECONDS
         self.is_running = False
+        self.draining = True
 
-        # Cancel all workers
+        busy = []
         for worker in self.workers:
-            worker.cancel()
+            if worker in self.idle_workers:
+                worker.cancel()
+            else:
+                busy.append(worker)
+        if busy and grace_seconds > 0:
+            print(f"Draining {len(busy)} analysis workers ({grace_seconds}s grace)")
+            _, unfinished = await asyncio.wait(busy, timeout=grace_seconds)
+            if unfinished:
+                print(f"Checkpointing {len(unfinished)} unfinished analysis jobs")
+
+        # Cancel remaining workers, batch waiters and background loops
+        tasks = (
+            self.workers
+            + list(self.batch_tasks.values())
+            + list(self.pending_events.values())
+        )
+        for task in (self.retention_task, self.autoscale_task, self.lease_task):
+            if task:
+                tasks.append(task)
+        self.retention_task = self.autoscale_task = self.lease_task = None
+        for task in tasks:
+            task.cancel()
 
         # Wait for workers to finish
-        await asyncio.gather(*self.workers, return_exceptions=True)
+        await asyncio.gather(*tasks, return_exceptions=True)
         self.workers.clear()
+        self.batch_tasks.clear()
+        self.pending_events.clear()
+        self.idle_workers.clear()
+        self.draining = False
+        await batch_runner.stop()
+        await self.event_bus.stop()
+        if not self.job_queue.shared:
+            # Checkpointed jobs can be adopted without waiting out the lease
+            await self.store.release_owned(self.instance_id)
+        await self.store.close()
 
         print("Stopped analysis workers")
 
@@ -89,8 +332,43 @@ class AsyncAnalysisProcessor:
         property_title: str,
         manual_data: Optional[ManualPropertyData],
         progress_callback: Optional[Callable] = None,
+        execution_mode: ExecutionMode = ExecutionMode.INTERACTIVE,
+        plan: Optional[str] = None,
     ) -> str:
-        """Submit a new analysis job"""
+        """Submit a new analysis job.
+
+        A submission identical to a recent pending or running job attaches
+        to that job and returns its id instead of creating a new one.
+        """
+
+        if execution_mode == ExecutionMode.BATCH and not batch_runner.is_available():
+            # Batch API needs OpenAI credentials; run interactively instead
+            execution_mode = ExecutionMode.INTERACTIVE
+
+        manual_dict = manual_data.model_dump(exclude_none=True) if manual_data else None
+        fingerprints = job_fingerprints(
+            user_id,
+            property_address,
+            manual_dict,
+            execution_mode.value,
+            # Other processes could not see users attached here
+            cross_user=settings.JOB_DEDUP_CROSS_USER and not self.job_queue.shared,
+        )
+        self.metrics.submitted.record()
+
+        duplicate = await self._find_duplicate(fingerprints)
+        if duplicate:
+            self.dedup_hits += 1
+            if not duplicate.can_access(user_id):
+                self.dedup_shared_hits += 1
+                duplicate.shared_with.append(user_id)
+                self._persist(duplicate)
+            if progress_callback:
+                self.subscribe(duplicate.id, progress_callback)
+            return duplicate.id
+
+        if execution_mode == ExecutionMode.INTERACTIVE:
+            self._admit()
 
         # No caching - always generate fresh analysis
 
@@ -101,7 +379,7 @@ class AsyncAnalysisProcessor:
             user_id=user_id,
             property_address=property_address,
             property_title=property_title,
-            manual_data=manual_data,
+            manual_data=manual_dict,
             status=JobStatus.PENDING,
             progress=0,
             current_section=None,
@@ -109,64 +387,393 @@ class AsyncAnalysisProcessor:
             error_message=None,
             created_at=datetime.now(),
             updated_at=datetime.now(),
-            estimated_completion=datetime.now() + timedelta(minutes=2),
+            estimated_completion=None,
+            execution_mode=execution_mode,
+            plan=plan,
+            fingerprints=fingerprints,
+        )
+        job.estimated_completion = self._estimate_completion(
+            job, jobs_ahead=self.job_queue.qsize()
         )
 
-        self.jobs[job_id] = job
+        if not self.job_queue.shared:
+            # With a shared queue the store is the source of truth until a
+            # worker in this process claims the job
+            self._track(job)
+            for fingerprint in fingerprints:
+                self.dedup_index[fingerprint] = job_id
+        self._persist(job)
 
-        # Add progress callback if provided
         if progress_callback:
-            if job_id not in self.progress_callbacks:
-                self.progress_callbacks[job_id] = []
-            self.progress_callbacks[job_id].append(progress_callback)
+            self.subscribe(job_id, progress_callback)
 
-        # Add to queue
-        await self.job_queue.put(job_id)
+        await self._enqueue(job)
 
         return job_id
 
+    def subscribe(self, job_id: str, callback: Callable) -> Subscription:
+        """Register ``callback(event)`` for a job's progress events.
+
+        Events are delta dicts from ``JobEventEncoder.delta``; use
+        ``job_snapshot`` for the full state to start from. The handle must
+        be passed to ``unsubscribe`` when the subscriber goes away.
+        """
+        return self.subscriptions.add(job_id, callback)
+
+    def unsubscribe(self, subscription: Subscription) -> bool:
+        return self.subscriptions.remove(subscription)
+
+    def job_snapshot(self, job: AnalysisJob) -> Dict[str, Any]:
+        """Full state event for a new subscriber"""
+        return self.events.snapshot(job)
+
+    async def _find_duplicate(self, fingerprints: List[str]) -> Optional[AnalysisJob]:
+        """Find a recent pending or running job with the same fingerprint"""
+        window = settings.JOB_DEDUP_WINDOW_SECONDS
+        if not window:
+            return None
+        created_after = datetime.now() - timedelta(seconds=window)
+
+        if self.job_queue.shared:
+            record = await self.store.find_active_job(
+                fingerprints[0], created_after.isoformat()
+            )
+            return AnalysisJob.from_record(record) if record else None
+
+        for fingerprint in fingerprints:
+            job = self.jobs.get(self.dedup_index.get(fingerprint, ""))
+            if (
+                job
+                and job.status in (JobStatus.PENDING, JobStatus.IN_PROGRESS)
+                and job.created_at >= created_after
+            ):
+                return job
+        return None
+
+    def _job_seconds(self) -> float:
+        return self.estimator.job_seconds(
+            len(GENERATED_SECTIONS), self.section_concurrency
+        )
+
+    def _admit(self):
+        """Reject new interactive work once projected queue wait is too long"""
+        max_wait = settings.JOB_ADMISSION_MAX_WAIT_SECONDS
+        if not max_wait:
+            return
+
+        queued = self.job_queue.qsize()
+        job_seconds = self._job_seconds()
+        projected_wait = self.estimator.projected_wait(
+            queued, self.max_workers, job_seconds
+        )
+        if projected_wait > max_wait:
+            self.admission_rejections += 1
+            raise QueueFullError(
+                projected_wait,
+                self.estimator.retry_after(
+                    queued, self.max_workers, job_seconds, max_wait
+                ),
+            )
+
+    def _estimate_completion(
+        self, job: AnalysisJob, jobs_ahead: Optional[int] = None
+    ) -> datetime:
+        """Projected completion time from queue position and observed latency"""
+        now = datetime.now()
+        if job.execution_mode == ExecutionMode.BATCH:
+            return job.created_at + timedelta(hours=24)
+
+        if job.status == JobStatus.IN_PROGRESS:
+            remaining = sum(key not in job.results for key in GENERATED_SECTIONS)
+            seconds = self.estimator.remaining_seconds(
+                remaining, self.section_concurrency
+            )
+        else:
+            if jobs_ahead is None:
+                jobs_ahead = self.job_queue.position(job.id, job.user_id)
+            job_seconds = self._job_seconds()
+            seconds = (
+                self.estimator.projected_wait(
+                    jobs_ahead, max(len(self.workers), 1), job_seconds
+                )
+                + job_seconds
+            )
+        return now + timedelta(seconds=seconds)
+
+    async def _enqueue(self, job: AnalysisJob):
+        """Hand a pending job to the worker queue or the batch runner"""
+        if self.job_queue.shared:
+            # Any process may claim it, batch jobs included
+            await self.job_queue.put(job.id, job.user_id, job.plan)
+        elif job.execution_mode == ExecutionMode.BATCH:
+            # Batch jobs wait on the batch runner, not on a worker slot
+            task = asyncio.create_task(self._process_batch_job(job))
+            self.batch_tasks[job.id] = task
+            task.add_done_callback(lambda _: self.batch_tasks.pop(job.id, None))
+        else:
+            # Add to queue
+            await self.job_queue.put(job.id, job.user_id, job.plan)
+
+    def _track(self, job: AnalysisJob):
+        """Keep a job in memory and count it under its status"""
+        previous = self.jobs.get(job.id)
+        if previous:
+            self.metrics.removed(previous.status.value)
+        self.jobs[job.id] = job
+        self.metrics.added(job.status.value)
+
+    def _untrack(self, job_id: str):
+        job = self.jobs.pop(job_id, None)
+        if job:
+            self.metrics.removed(job.status.value)
+
+    def _set_status(self, job: AnalysisJob, status: JobStatus):
+        """Change a job's status, keeping the status counters current"""
+        if self.jobs.get(job.id) is job:
+            self.metrics.transition(job.status.value, status.value)
+        job.status = status
+
+    def _persist(self, job: AnalysisJob):
+        """Queue the job's current state for the durable store"""
+        record = job.to_record()
+        if not self.job_queue.shared:
+            # New rows start out leased to this process (kept by _lease_loop)
+            record["lease_owner"] = self.instance_id
+            record["lease_expires_at"] = time.time() + settings.JOB_LEASE_SECONDS
+        self.store.save_job(record)
+
     async def get_job_status(self, job_id: str) -> Optional[AnalysisJob]:
         """Get current job status"""
-        return self.jobs.get(job_id)
+        job = self.jobs.get(job_id)
+        if job is None or (self.job_queue.shared and job_id not in self.leased_jobs):
+            # Jobs from before a restart, or run by another process, are
+            # only current in the durable store
+            record = await self.store.load(job_id)
+            if record:
+                job = AnalysisJob.from_record(record)
+        elif job_id in self.retained_jobs:
+            self.retained_jobs.move_to_end(job_id)
+            job = dataclasses.replace(job, results=self._archived_results(job_id))
+        elif job.status == JobStatus.PENDING:
+            job.estimated_completion = self._estimate_completion(job)
+        return job
 
     async def cancel_job(self, job_id: str, user_id: str) -> bool:
         """Cancel a job (only if user owns it)"""
+        if self.job_queue.shared:
+            return await self._cancel_shared_job(job_id, user_id)
+
         job = self.jobs.get(job_id)
-        if not job or job.user_id != user_id:
+        if not job or not job.can_access(user_id):
             return False
 
+        if job.status in [JobStatus.PENDING, JobStatus.IN_PROGRESS] and (
+            job.shared_with
+        ):
+            # Other users were attached by deduplication: only this user
+            # leaves, and ownership passes on if the owner cancelled
+            if user_id == job.user_id:
+                job.user_id = job.shared_with.pop(0)
+            else:
+                job.shared_with.remove(user_id)
+            job.updated_at = datetime.now()
+            self._persist(job)
+            return True
+
         if job.status in [JobStatus.PENDING, JobStatus.IN_PROGRESS]:
-            job.status = JobStatus.CANCELLED
+            self._set_status(job, JobStatus.CANCELLED)
             job.updated_at = datetime.now()
+            self._persist(job)
+            batch_task = self.batch_tasks.get(job_id)
+            if batch_task:
+                batch_task.cancel()
+            # Abort in-flight LLM requests rather than letting them finish
+            run = self.section_runs.get(job_id)
+            if run:
+                run.cancel(CancelReason.JOB_CANCELLED)
+            # Subscribers see the terminal state before they are dropped
+            await self._notify_progress(job)
+            self._retire(job)
             return True
 
         return False
 
+    async def _cancel_shared_job(self, job_id: str, user_id: str) -> bool:
+        """Cancel through the store; the owning process notices when it
+        next renews the job's lease"""
+        now = datetime.now()
+        if not await self.store.mark_cancelled(job_id, user_id, now.isoformat()):
+            return False
+
+        job = self.jobs.get(job_id)
+        if job and job.status not in TERMINAL_STATUSES:
+            self._set_status(job, JobStatus.CANCELLED)
+            job.updated_at = now
+            await self._notify_progress(job)
+            self._retire(job)
+        return True
+
+    def _spawn_worker(self):
+        name = f"{self.instance_id}/worker-{self._worker_seq}"
+        self._worker_seq += 1
+        worker = asyncio.create_task(self._worker(name))
+        self.workers.append(worker)
+
+    def _scale_to(self, target: int):
+        """Resize the pool; busy workers leave after their current job"""
+        self.target_workers = target
+        while len(self.workers) < target:
+            self._spawn_worker()
+        for worker in list(self.idle_workers):
+            if len(self.workers) <= target:
+                break
+            self.idle_workers.discard(worker)
+            self.workers.remove(worker)
+            worker.cancel()
+
+    async def _sample_pool(self) -> PoolSample:
+        # Read from the store in shared mode, where most of the backlog may
+        # have been queued by other processes
+        depth = await self.job_queue.refresh_depth()
+        now = time.monotonic()
+        sections = self.metrics.sections.total
+        elapsed = max(now - self._last_sample_at, 1e-6)
+        throughput = (sections - self._sections_at_last_sample) / elapsed
+        self._sections_at_last_sample, self._last_sample_at = sections, now
+
+        workers = len(self.workers)
+        return PoolSample(
+            workers=workers,
+            busy=workers - len(self.idle_workers),
+            queue_depth=depth,
+            projected_wait=self.estimator.projected_wait(
+                depth, workers, self._job_seconds()
+            ),
+            section_latency=self.estimator.section_seconds,
+            throughput=throughput,
+            backend_saturated=llm_scheduler.is_saturated(),
+        )
+
+    async def _autoscale_loop(self):
+        """Periodically resize the worker pool"""
+        while True:
+            await asyncio.sleep(settings.JOB_AUTOSCALE_INTERVAL_SECONDS)
+            try:
+                sample = await self._sample_pool()
+                target = self.autoscaler.decide(sample)
+                if target != sample.workers:
+                    print(
+                        f"Scaling analysis workers {sample.workers} -> {target} "
+                        f"({self.autoscaler.last_reason})"
+                    )
+                    self._scale_to(target)
+            except Exception as e:
+                print(f"Worker autoscaling error: {e}")
+
     async def _worker(self, worker_name: str):
         """Worker task that processes jobs"""
+        current = asyncio.current_task()
         while self.is_running:
+            if len(self.workers) > self.target_workers:
+                # Scaled down while this worker was busy
+                self.workers.remove(current)
+                return
             try:
-                # Get job from queue
-                job_id = await asyncio.wait_for(self.job_queue.get(), timeout=1.0)
-                job = self.jobs.get(job_id)
+                # Get job from queue; an idle worker is cancelled on stop()
+                self.idle_workers.add(current)
+                try:
+                    if self.job_queue.shared:
+                        record = await self.job_queue.get(worker_name)
+                        job = AnalysisJob.from_record(record)
+                        job_id = job.id
+                        self._track(job)
+                    else:
+                        job_id = await self.job_queue.get(worker_name)
+                        job = self.jobs.get(job_id)
+                finally:
+                    self.idle_workers.discard(current)
 
-                if not job or job.status == JobStatus.CANCELLED:
-                    continue
+                try:
+                    if not job or job.status == JobStatus.CANCELLED:
+                        continue
 
-                # Process the job
-                await self._process_job(job, worker_name)
+                    self._record_queue_wait(job)
+
+                    if self.job_queue.shared:
+                        if job.execution_mode == ExecutionMode.BATCH:
+                            # Hold the lease from a background task so the
+                            # worker is free while the batch is pending
+                            task = asyncio.create_task(
+                                self._run_leased(
+                                    job, worker_name, self._process_batch_job(job)
+                                )
+                            )
+                            self.batch_tasks[job.id] = task
+                            task.add_done_callback(
+                                lambda _, job_id=job.id: self.batch_tasks.pop(
+                                    job_id, None
+                                )
+                            )
+                        else:
+                            await self._run_leased(
+                                job, worker_name, self._process_job(job, worker_name)
+                            )
+                        continue
+
+                    # Process the job
+                    await self._process_job(job, worker_name)
+                finally:
+                    await self.job_queue.release(job_id)
 
-            except asyncio.TimeoutError:
-                continue
             except Exception as e:
                 print(f"Worker {worker_name} error: {e}")
                 await asyncio.sleep(1)
 
+    def _record_queue_wait(self, job: AnalysisJob):
+        """Track how long each user's jobs wait before a worker starts them"""
+        stats = self.user_queue_waits.pop(job.user_id, None) or _QueueWaitStats()
+        wait = (datetime.now() - job.created_at).total_seconds()
+        stats.record(wait)
+        self.metrics.queue_wait.record(wait)
+        self.user_queue_waits[job.user_id] = stats
+        while len(self.user_queue_waits) > MAX_TRACKED_USERS:
+            self.user_queue_waits.popitem(last=False)
+
+    async def _run_leased(self, job: AnalysisJob, worker_name: str, work):
+        """Run a claimed job while renewing its lease in the shared store.
+
+        If the lease cannot be renewed the job was cancelled (or re-claimed
+        after this process stalled), so the local work is abandoned.
+        """
+        self.leased_jobs.add(job.id)
+        task = asyncio.create_task(work)
+        try:
+            while not task.done():
+                await asyncio.wait({task}, timeout=self.job_queue.lease_seconds / 3)
+                if task.done():
+                    break
+                if not await self.job_queue.renew(job.id, worker_name):
+                    self._set_status(job, JobStatus.CANCELLED)
+                    task.cancel(CancelReason.JOB_CANCELLED)
+                    await self._notify_progress(job)
+        finally:
+            if not task.done():
+                task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+            self.leased_jobs.discard(job.id)
+            if job.status in TERMINAL_STATUSES:
+                self._retire(job)
+            else:
+                # Abandoned with the lease; the store is authoritative now
+                self._untrack(job.id)
+
     async def _process_job(self, job: AnalysisJob, worker_name: str):
         """Process a single analysis job"""
         try:
-            job.status = JobStatus.IN_PROGRESS
+            started_at = time.monotonic()
+            self._set_status(job, JobStatus.IN_PROGRESS)
             job.updated_at = datetime.now()
+            job.estimated_completion = self._estimate_completion(job)
             await self._notify_progress(job)
 
             llm_service = LLMService()
@@ -174,121 +781,325 @@ class AsyncAnalysisProcessor:
                 ManualPropertyData(**job.manual_data) if job.manual_data else None
             )
 
-            # Get optimized prompts
-            prompts = OptimizedPrompts.get_all_prompts(
-                job.property_address, manual_data_obj
+            async def generate(node: SectionNode, prompt: str):
+                section_started = time.monotonic()
+                result = await llm_service.generate_analysis(
+                    prompt, LLMPriority.BACKGROUND
+                )
+                elapsed = time.monotonic() - section_started
+                self.estimator.record_section(elapsed)
+                self.metrics.section_generation.record(elapsed)
+                self.metrics.sections.record()
+                return result
+
+            # Sections start as soon as their inputs are done, at most
+            # section_concurrency at a time so one job cannot claim every
+            # scheduler slot. Sections checkpointed by an earlier attempt
+            # are not regenerated.
+            resumed = bool(job.results)
+            run = ANALYSIS_GRAPH.start(
+                job.property_address,
+                manual_data_obj,
+                generate,
+                completed=job.results,
+                concurrency=self.section_concurrency,
             )
+            self.section_runs[job.id] = run
+            section_names = dict(ANALYSIS_SECTIONS)
+            total_sections = len(ANALYSIS_SECTIONS)
+            completed_sections = len(job.results)
+
+            sections = run.results()
+            try:
+                async for section_key, section_result in sections:
+                    if job.status == JobStatus.CANCELLED:
+                        return
 
-            # Process each section
-            sections = [
-                ("summary", "Property Summary"),
-                ("strengths", "Key Strengths"),
-                ("research_areas", "Research Areas"),
-                ("risks", "Hidden Risks"),
-                ("questions", "Realtor Questions"),
-                ("market_analysis", "Market Analysis"),
-                ("investment_potential", "Investment Potential"),
-                ("renovation_analysis", "Renovation Analysis"),
-            ]
-
-            total_sections = len(sections)
-
-            for i, (section_key, section_name) in enumerate(sections):
+                    # Fallback data if LLM fails
+                    job.results[section_key] = (
+                        section_result or self._get_fallback_data(section_key)
+                    )
+                    self.store.save_section(
+                        job.id, section_key, job.results[section_key]
+                    )
+                    completed_sections += 1
+                    job.current_section = section_names[section_key]
+                    job.progress = int(completed_sections / total_sections * 100)
+                    job.updated_at = datetime.now()
+                    job.estimated_completion = self._estimate_completion(job)
+                    await self._notify_progress(job)
+            except asyncio.CancelledError:
+                # cancel_job aborted the sections' LLM requests
                 if job.status == JobStatus.CANCELLED:
                     return
+                raise
+            finally:
+                # Abort whatever is still generating, with the reason why
+                self.section_runs.pop(job.id, None)
+                if job.status == JobStatus.CANCELLED:
+                    run.cancel(CancelReason.JOB_CANCELLED)
+                elif self.draining:
+                    run.cancel(CancelReason.SHUTDOWN)
+                else:
+                    run.cancel(CancelReason.OTHER)
+                await sections.aclose()
+
+            # No caching - results are fresh for each analysis
+            if not resumed:
+                self.estimator.record_job(time.monotonic() - started_at)
+            await self._complete_job(job)
 
-                job.current_section = section_name
-                job.progress = int((i / total_sections) * 100)
+        except asyncio.CancelledError:
+            if self.draining and job.status == JobStatus.IN_PROGRESS:
+                # Shutdown grace period ran out: completed sections are
+                # already checkpointed, so hand the rest back to the queue
+                self._set_status(job, JobStatus.PENDING)
+                job.current_section = None
                 job.updated_at = datetime.now()
-                await self._notify_progress(job)
+                self._persist(job)
+            raise
+        except Exception as e:
+            await self._fail_job(job, e)
 
-                # Generate analysis for this section
-                prompt = prompts[section_key]
-                section_result = await llm_service.generate_analysis(prompt)
+    async def _process_batch_job(self, job: AnalysisJob):
+        """Process a job through the OpenAI Batch API"""
+        try:
+            self._set_status(job, JobStatus.IN_PROGRESS)
+            job.current_section = "Queued for batch processing"
+            job.updated_at = datetime.now()
+            await self._notify_progress(job)
 
-                if section_result:
-                    job.results[section_key] = section_result
-                else:
-                    # Fallback data if LLM fails
-                    job.results[section_key] = self._get_fallback_data(section_key)
+            manual_data_obj = (
+                ManualPropertyData(**job.manual_data) if job.manual_data else None
+            )
 
-                # Small delay to prevent overwhelming the LLM
-                await asyncio.sleep(0.5)
+            def checkpoint(section_key: str):
+                def record(batch_id: str):
+                    # Persisted so a restart re-polls the batch rather than
+                    # submitting (and paying for) the prompt again
+                    job.batch_ids[section_key] = batch_id
+                    self._persist(job)
 
-            # Mark as completed
-            job.status = JobStatus.COMPLETED
-            job.progress = 100
-            job.current_section = "Complete"
-            job.updated_at = datetime.now()
-            job.estimated_completion = datetime.now()
+                return record
 
-            # No caching - results are fresh for each analysis
+            def section_result(node):
+                custom_id = f"{job.id}:{node.key}"
+                if node.key in job.batch_ids:
+                    return batch_runner.resume(job.batch_ids[node.key], custom_id)
+                return batch_runner.submit(
+                    custom_id,
+                    node.prompt(job.property_address, manual_data_obj, {}),
+                    on_submitted=checkpoint(node.key),
+                )
 
-            await self._notify_progress(job)
+            # A batch is a single round trip, so every generated section is
+            # submitted at once and dependent sections go without their inputs
+            generated = [node for node in ANALYSIS_GRAPH if not node.local]
+            section_results = await asyncio.gather(
+                *(section_result(node) for node in generated)
+            )
+
+            if job.status == JobStatus.CANCELLED:
+                return
+
+            # With every generated section done, a run of the graph only
+            # computes the local sections
+            batch_results = {
+                node.key: result for node, result in zip(generated, section_results)
+            }
+            run = ANALYSIS_GRAPH.start(
+                job.property_address,
+                manual_data_obj,
+                None,
+                completed=batch_results,
+            )
+            async for section_key, section_result in run.results():
+                batch_results[section_key] = section_result
 
+            for section_key, _ in ANALYSIS_SECTIONS:
+                job.results[section_key] = batch_results[
+                    section_key
+                ] or self._get_fallback_data(section_key)
+                self.store.save_section(job.id, section_key, job.results[section_key])
+
+            await self._complete_job(job)
+
+        except asyncio.CancelledError:
+            if self.draining and job.status == JobStatus.IN_PROGRESS:
+                # Stopped while the batches run: hand the job back with its
+                # batch ids so recovery waits on the same batches
+                self._set_status(job, JobStatus.PENDING)
+                job.current_section = None
+                job.updated_at = datetime.now()
+                self._persist(job)
+            if job.status != JobStatus.CANCELLED:
+                raise
         except Exception as e:
-            job.status = JobStatus.FAILED
-            job.error_message = str(e)
-            job.updated_at = datetime.now()
-            await self._notify_progress(job)
+            await self._fail_job(job, e)
+
+    async def _complete_job(self, job: AnalysisJob):
+        """Mark a job as completed and notify subscribers"""
+        self._set_status(job, JobStatus.COMPLETED)
+        job.progress = 100
+        job.current_section = "Complete"
+        job.updated_at = datetime.now()
+        job.estimated_completion = datetime.now()
+        self.metrics.completed.record()
+        self.metrics.end_to_end.record(
+            (job.updated_at - job.created_at).total_seconds()
+        )
+        await self._notify_progress(job)
+        self._retire(job)
+
+    async def _fail_job(self, job: AnalysisJob, error: Exception):
+        """Mark a job as failed and notify subscribers"""
+        self._set_status(job, JobStatus.FAILED)
+        job.error_message = str(error)
+        job.updated_at = datetime.now()
+        self.metrics.failed.record()
+        await self._notify_progress(job)
+        self._retire(job)
+
+    def _retire(self, job: AnalysisJob):
+        """Move a terminal job to the compact retained set"""
+        if job.id in self.retained_jobs or job.id not in self.jobs:
+            return
+
+        for fingerprint in job.fingerprints:
+            if self.dedup_index.get(fingerprint) == job.id:
+                del self.dedup_index[fingerprint]
+
+        self.archived_results[job.id] = zlib.compress(
+            json.dumps(job.results, default=str).encode("utf-8")
+        )
+        job.results = {}
+        self._forget_events(job.id)
+        self.retained_jobs[job.id] = None
+
+        # Least recently used terminal jobs leave memory first; they remain
+        # in the durable store until the retention loop deletes them there
+        # (see JobStore.delete_expired)
+        while len(self.retained_jobs) > self.max_retained_jobs:
+            evicted_id, _ = self.retained_jobs.popitem(last=False)
+            self._untrack(evicted_id)
+            self.archived_results.pop(evicted_id, None)
+
+    def _archived_results(self, job_id: str) -> Dict[str, Any]:
+        data = self.archived_results.get(job_id)
+        return json.loads(zlib.decompress(data)) if data else {}
 
     def _get_fallback_data(self, section_key: str) -> Dict[str, Any]:
         """Get fallback data when LLM fails"""
-        fallbacks = {
-            "summary": {
-                "summary": "Analysis based on provided information",
-                "overall_score": 75,
-            },
-            "strengths": {"strengths": ["Property analysis completed"]},
-            "research_areas": {"weaknesses": ["Additional research recommended"]},
-            "risks": {"hidden_risks": ["Property condition unknown"]},
-            "questions": {"questions": ["What additional information do you need?"]},
-            "market_analysis": {
-                "trends": "Market analysis unavailable",
-                "comparables": "No comparable data",
-                "appreciation_potential": "Requires research",
-            },
-            "investment_potential": {
-                "rental_income": "Requires market research",
-                "cash_flow": "Analysis unavailable",
-                "roi_projections": "Requires research",
-                "appreciation_timeline": "Unknown",
-            },
-            "renovation_analysis": {
-                "estimated_costs": "Assessment needed",
-                "priority_improvements": ["Property inspection required"],
-                "renovation_roi": "Analysis unavailable",
-            },
-        }
-        return fallbacks.get(section_key, {})
+        return ANALYSIS_GRAPH.fallback(section_key)
 
     async def _notify_progress(self, job: AnalysisJob):
-        """Notify progress callbacks"""
-        callbacks = self.progress_callbacks.get(job.id, [])
-        for callback in callbacks:
+        """Persist job state and publish what changed to subscribers.
+
+        Events are limited to JOB_PROGRESS_MAX_EVENTS_PER_SECOND per job:
+        changes inside the interval are published together once it ends
+        (the delta covers everything since the last event). Terminal
+        states are always published immediately.
+        """
+        delay = 0.0
+        if self.progress_interval and job.status not in TERMINAL_STATUSES:
+            last = self.last_event_at.get(job.id)
+            if last is not None:
+                delay = last + self.progress_interval - time.monotonic()
+
+        if delay <= 0:
+            pending = self.pending_events.pop(job.id, None)
+            if pending and pending is not asyncio.current_task():
+                pending.cancel()
+            await self._publish_progress(job)
+        else:
+            self._persist(job)
+            if job.id not in self.pending_events:
+                self.pending_events[job.id] = asyncio.create_task(
+                    self._publish_later(job, delay)
+                )
+
+    async def _publish_later(self, job: AnalysisJob, delay: float):
+        await asyncio.sleep(delay)
+        if self.pending_events.get(job.id) is asyncio.current_task():
+            del self.pending_events[job.id]
+            await self._publish_progress(job)
+
+    async def _publish_progress(self, job: AnalysisJob):
+        # The delta bumps job.event_seq, which is persisted with the state
+        # it describes
+        event = self.events.delta(job)
+        self._persist(job)
+        if event is not None:
+            self.last_event_at[job.id] = time.monotonic()
+            await self.event_bus.publish(event)
+
+    def _forget_events(self, job_id: str):
+        self.subscriptions.drop_job(job_id)
+        self.events.forget(job_id)
+        self.last_event_at.pop(job_id, None)
+        pending = self.pending_events.pop(job_id, None)
+        if pending:
+            pending.cancel()
+
+    async def _deliver_event(self, event: Dict[str, Any]):
+        """Send an event from the bus to this process's subscribers"""
+        job_id = event["job_id"]
+        for token, callback in list(self.subscriptions.for_job(job_id).items()):
             try:
                 if asyncio.iscoroutinefunction(callback):
-                    await callback(job)
+                    await callback(event)
                 else:
-                    callback(job)
+                    callback(event)
             except Exception as e:
+                # A failing subscriber (usually a closed socket) is dropped
                 print(f"Progress callback error: {e}")
+                self.subscriptions.remove(Subscription(job_id, token))
 
     def get_job_statistics(self) -> Dict[str, Any]:
-        """Get processor statistics"""
-        total_jobs = len(self.jobs)
-        status_counts = {}
-
-        for status in JobStatus:
-            status_counts[status.value] = sum(
-                1 for job in self.jobs.values() if job.status == status
-            )
-
+        """Get processor statistics (constant time in the number of jobs)"""
         return {
-            "total_jobs": total_jobs,
-            "status_counts": status_counts,
+            "total_jobs": len(self.jobs),
+            **self.metrics.snapshot([status.value for status in JobStatus]),
             "active_workers": len(self.workers),
+            "busy_workers": len(self.workers) - len(self.idle_workers),
+            "autoscaler": self.autoscaler.get_stats(),
             "queue_size": self.job_queue.qsize(),
+            "retained_jobs": len(self.retained_jobs),
+            "subscriptions": len(self.subscriptions),
+            "event_bus": self.event_bus.get_stats(),
+            "dedup": {
+                "window_seconds": settings.JOB_DEDUP_WINDOW_SECONDS,
+                "cross_user": settings.JOB_DEDUP_CROSS_USER,
+                "submissions": self.metrics.submitted.total,
+                "hits": self.dedup_hits,
+                "shared_hits": self.dedup_shared_hits,
+                "hit_rate": round(self.dedup_hits / self.metrics.submitted.total, 3)
+                if self.metrics.submitted.total
+                else 0.0,
+            },
+            "admission": {
+                "max_wait_seconds": settings.JOB_ADMISSION_MAX_WAIT_SECONDS,
+                "projected_wait_seconds": round(
+                    self.estimator.projected_wait(
+                        self.job_queue.qsize(), self.max_workers, self._job_seconds()
+                    ),
+                    1,
+                ),
+                "section_latency_seconds": round(self.estimator.section_seconds, 2),
+                "job_seconds": round(self._job_seconds(), 2),
+                "rejections": self.admission_rejections,
+            },
+            "batch": batch_runner.get_stats(),
+            "llm_scheduler": llm_scheduler.get_stats(),
+            "llm_cancellation": cancellation_stats.get_stats(),
+            "user_queue_wait": {
+                user_id: {
+                    "jobs": stats.jobs,
+                    "avg_wait_ms": round(stats.total_wait / stats.jobs * 1000, 1),
+                    "max_wait_ms": round(stats.max_wait * 1000, 1),
+                }
+                for user_id, stats in self.user_queue_waits.items()
+            },
             "is_running": self.is_running,
             "cache_enabled": False,
         }
@@ -296,23 +1107,82 @@ class AsyncAnalysisProcessor:
     def cleanup_old_jobs(self, max_age_hours: int = 24):
         """Clean up old completed/failed jobs"""
         cutoff_time = datetime.now() - timedelta(hours=max_age_hours)
-        jobs_to_remove = []
+        jobs_to_remove = [
+            job_id
+            for job_id in self.retained_jobs
+            if self.jobs[job_id].updated_at < cutoff_time
+        ]
+        self._remove_jobs(jobs_to_remove)
+        return len(jobs_to_remove)
 
-        for job_id, job in self.jobs.items():
-            if (
-                job.status
-                in [JobStatus.COMPLETED, JobStatus.FAILED, JobStatus.CANCELLED]
-                and job.updated_at < cutoff_time
-            ):
-                jobs_to_remove.append(job_id)
+    @staticmethod
+    def _ttl_cutoffs() -> Tuple[datetime, datetime]:
+        """Last-update cutoffs for completed and for failed/cancelled jobs"""
+        now = datetime.now()
+        return (
+            now - timedelta(seconds=settings.JOB_TTL_COMPLETED_SECONDS),
+            now - timedelta(seconds=settings.JOB_TTL_FAILED_SECONDS),
+        )
+
+    def expire_jobs(self) -> int:
+        """Remove terminal jobs past their status-specific TTL"""
+        completed_cutoff, failed_cutoff = self._ttl_cutoffs()
 
-        for job_id in jobs_to_remove:
-            del self.jobs[job_id]
-            if job_id in self.progress_callbacks:
-                del self.progress_callbacks[job_id]
+        jobs_to_remove = []
+        for job_id in self.retained_jobs:
+            job = self.jobs[job_id]
+            cutoff = (
+                completed_cutoff if job.status == JobStatus.COMPLETED else failed_cutoff
+            )
+            if job.updated_at < cutoff:
+                jobs_to_remove.append(job_id)
 
+        self._remove_jobs(jobs_to_remove)
         return len(jobs_to_remove)
 
+    def _remove_jobs(self, job_ids: List[str]):
+        """Forget jobs in memory and in the durable store"""
+        for job_id in job_ids:
+            self._untrack(job_id)
+            self.retained_jobs.pop(job_id, None)
+            self.archived_results.pop(job_id, None)
+            self._forget_events(job_id)
+
+        self.store.delete_jobs(job_ids)
+
+    async def expire_stored_jobs(self) -> int:
+        """Delete expired terminal jobs from the durable store, including
+        jobs evicted from memory, finished before a restart or finished by
+        another process"""
+        completed_cutoff, failed_cutoff = self._ttl_cutoffs()
+        return await self.store.delete_expired(
+            completed_cutoff.isoformat(), failed_cutoff.isoformat()
+        )
+
+    async def _lease_loop(self):
+        """Keep this process's jobs leased in a store shared with other
+        processes, and adopt jobs whose process died"""
+        while True:
+            await asyncio.sleep(settings.JOB_LEASE_SECONDS / 3)
+            try:
+                await self.store.renew_owned(
+                    self.instance_id, settings.JOB_LEASE_SECONDS
+                )
+                await self._recover_jobs()
+            except Exception as e:
+                print(f"Job lease renewal error: {e}")
+
+    async def _retention_loop(self):
+        """Periodically expire terminal jobs"""
+        while True:
+            await asyncio.sleep(settings.JOB_RETENTION_INTERVAL_SECONDS)
+            try:
+                removed = self.expire_jobs() + await self.expire_stored_jobs()
+                if removed:
+                    print(f"Expired {removed} finished analysis jobs")
+            except Exception as e:
+                print(f"Job retention error: {e}")
+
 
 # Global processor instance
 async_processor = AsyncAnalysisProcessor()
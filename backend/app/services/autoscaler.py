@@ -0,0 +1,128 @@
+"""
+Autoscaling for the async analysis worker pool
+Grows the pool while jobs are backing up and the LLM backend has headroom,
+and backs off when backend latency rises or an added worker did not buy
+any extra throughput
+"""
+
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+
+@dataclass(slots=True)
+class PoolSample:
+    """Observations taken once per autoscaling interval"""
+
+    workers: int
+    busy: int
+    queue_depth: int
+    projected_wait: float  # seconds
+    section_latency: float  # seconds, EWMA
+    throughput: float  # sections completed per second since the last sample
+    backend_saturated: bool
+
+
+class WorkerAutoscaler:
+    """Decides the worker count one step at a time.
+
+    Scale up by one while the queue is backed up and every worker is busy;
+    scale down by one when idle. Rising section latency (relative to the
+    best recently seen) or a scale-up after which throughput fell lowers a
+    temporary ceiling, which relaxes again after ``cooldown_seconds``.
+    """
+
+    def __init__(
+        self,
+        min_workers: int,
+        max_workers: int,
+        target_wait_seconds: float = 30.0,
+        latency_factor: float = 1.5,
+        cooldown_seconds: float = 60.0,
+        throughput_tolerance: float = 0.1,
+    ):
+        self.min_workers = min_workers
+        self.max_workers = max_workers
+        self.target_wait_seconds = target_wait_seconds
+        self.latency_factor = latency_factor
+        self.cooldown_seconds = cooldown_seconds
+        self.throughput_tolerance = throughput_tolerance  # ignore noise below this
+
+        self.ceiling = max_workers
+        self.ceiling_lowered_at = 0.0
+        self.baseline_latency: Optional[float] = None
+        self.last_action = "hold"
+        self.last_reason = "starting"
+        self._throughput_before_scale_up: Optional[float] = None
+
+    def decide(self, sample: PoolSample) -> int:
+        """Return the worker count to run until the next sample"""
+        now = time.monotonic()
+        if (
+            self.ceiling < self.max_workers
+            and now - self.ceiling_lowered_at >= self.cooldown_seconds
+        ):
+            self.ceiling += 1
+
+        latency_high = self._update_baseline(sample.section_latency)
+        workers = sample.workers
+        target, reason = workers, "steady"
+
+        if latency_high and workers > self.min_workers:
+            target, reason = workers - 1, "backend latency rising"
+            self._lower_ceiling(target, now)
+        elif (
+            self.last_action == "up"
+            and self._throughput_before_scale_up is not None
+            and sample.throughput
+            < self._throughput_before_scale_up * (1 - self.throughput_tolerance)
+            and workers > self.min_workers
+        ):
+            target, reason = workers - 1, "throughput fell after scaling up"
+            self._lower_ceiling(target, now)
+        elif (
+            sample.queue_depth
+            and sample.busy >= workers
+            and sample.projected_wait > self.target_wait_seconds
+            and not sample.backend_saturated
+            and workers < min(self.ceiling, self.max_workers)
+        ):
+            target, reason = workers + 1, "queue backing up"
+        elif not sample.queue_depth and sample.busy < workers - 1:
+            target, reason = workers - 1, "idle workers"
+
+        target = max(self.min_workers, min(self.max_workers, target))
+        if target > workers:
+            self.last_action = "up"
+            self._throughput_before_scale_up = sample.throughput
+        else:
+            self.last_action = "down" if target < workers else "hold"
+            self._throughput_before_scale_up = None
+        self.last_reason = reason
+        return target
+
+    def _update_baseline(self, latency: float) -> bool:
+        """Track the best recent section latency; True if latency is high"""
+        if self.baseline_latency is None or latency < self.baseline_latency:
+            self.baseline_latency = latency
+            return False
+        # Let the baseline drift up slowly so a permanently slower backend
+        # becomes the new normal instead of pinning the pool at minimum
+        self.baseline_latency += 0.02 * (latency - self.baseline_latency)
+        return latency > self.baseline_latency * self.latency_factor
+
+    def _lower_ceiling(self, ceiling: int, now: float):
+        self.ceiling = max(self.min_workers, ceiling)
+        self.ceiling_lowered_at = now
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "min_workers": self.min_workers,
+            "max_workers": self.max_workers,
+            "ceiling": self.ceiling,
+            "baseline_section_latency_seconds": round(self.baseline_latency, 2)
+            if self.baseline_latency is not None
+            else None,
+            "last_action": self.last_action,
+            "last_reason": self.last_reason,
+        }
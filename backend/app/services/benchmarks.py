@@ -0,0 +1,424 @@
+"""
+Micro-benchmarks for the analysis job pipeline
+Run with: python -m app.services.benchmarks
+"""
+
+import asyncio
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+import uuid
+import zlib
+from datetime import datetime
+from typing import Any, Dict, List
+
+from ..config import settings
+
+# Representative section payload size for a completed analysis
+SAMPLE_SECTION = {
+    "title": "Key Strengths",
+    "content": "Updated kitchen with quartz counters and new appliances. " * 12,
+    "highlights": [
+        f"Highlight {i}: well maintained, close to transit" for i in range(6)
+    ],
+}
+
+# Vocabulary for generated section text, so compression sees prose rather
+# than one repeated sentence
+LISTING_WORDS = (
+    "kitchen bathroom roof foundation windows hvac furnace plumbing wiring "
+    "backyard garage basement attic hardwood carpet tile quartz granite "
+    "appliances renovated original updated inspection permit zoning school "
+    "district commute transit taxes hoa insurance flood radon mold water "
+    "heater electrical panel square feet bedroom lot price comparable sales "
+    "market rent appreciation neighborhood noise parking storage sunlight "
+    "the a and with of near to recently needs could should may check ask"
+).split()
+
+
+class Benchmarks:
+    """Measurements for the async processing pipeline"""
+
+    @staticmethod
+    def memory_per_retained_job(job_count: int = 2000) -> Dict[str, Any]:
+        """Measure memory held per finished job, before and after retirement"""
+        from .async_processor import (
+            ANALYSIS_SECTIONS,
+            AnalysisJob,
+            AsyncAnalysisProcessor,
+            JobStatus,
+        )
+        from .job_store import JobStore
+
+        settings_max = settings.JOB_MAX_RETAINED
+
+        def build_jobs(processor: AsyncAnalysisProcessor):
+            now = datetime.now()
+            for i in range(job_count):
+                job = AnalysisJob(
+                    id=str(uuid.uuid4()),
+                    user_id=f"user-{i % 50}",
+                    property_address=f"{i} Main Street, Springfield",
+                    property_title=f"Listing {i}",
+                    manual_data=None,
+                    status=JobStatus.COMPLETED,
+                    progress=100,
+                    current_section=None,
+                    results={
+                        # Unique text per job, as real analyses would be
+                        key: {
+                            **SAMPLE_SECTION,
+                            "title": name,
+                            "content": f"{SAMPLE_SECTION['content']}({i})",
+                        }
+                        for key, name in ANALYSIS_SECTIONS
+                    },
+                    error_message=None,
+                    created_at=now,
+                    updated_at=now,
+                    estimated_completion=now,
+                )
+                processor.jobs[job.id] = job
+
+        def measure(retire: bool) -> int:
+            processor = AsyncAnalysisProcessor(store=JobStore())
+            processor.max_retained_jobs = max(settings_max, job_count)
+            tracemalloc.start()
+            build_jobs(processor)
+            if retire:
+                for job in list(processor.jobs.values()):
+                    processor._retire(job)
+            current, _ = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            return current
+
+        hot = measure(retire=False)
+        retained = measure(retire=True)
+
+        return {
+            "jobs": job_count,
+            "hot_bytes_per_job": round(hot / job_count),
+            "retained_bytes_per_job": round(retained / job_count),
+            "reduction": f"{(1 - retained / hot) * 100:.1f}%",
+        }
+
+    @staticmethod
+    async def event_bus_latency(
+        events: int = 500, interval: float = 0.005, poll_interval: float = 0.02
+    ) -> Dict[str, Any]:
+        """Measure publish-to-deliver latency across the sqlite event bus.
+
+        Two buses on separate connections to a scratch database stand in
+        for two processes; one publishes, the other tails and delivers.
+        """
+        from .job_event_bus import SQLiteEventBus
+
+        delivered: Dict[int, float] = {}
+        published: Dict[int, float] = {}
+
+        async def deliver(event: Dict[str, Any]):
+            delivered.setdefault(event["n"], time.perf_counter())
+
+        async def ignore(event: Dict[str, Any]):
+            pass
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "events.db")
+            publisher = SQLiteEventBus(path, "publisher", poll_interval=poll_interval)
+            subscriber = SQLiteEventBus(path, "subscriber", poll_interval=poll_interval)
+            await publisher.start(ignore, lambda job_id: False)
+            await subscriber.start(deliver, lambda job_id: True)
+            try:
+                for n in range(events):
+                    published[n] = time.perf_counter()
+                    await publisher.publish(
+                        {"type": "job_delta", "job_id": f"job-{n % 20}", "n": n}
+                    )
+                    await asyncio.sleep(interval)
+                deadline = time.perf_counter() + 5.0
+                while len(delivered) < events and time.perf_counter() < deadline:
+                    await asyncio.sleep(poll_interval)
+            finally:
+                await publisher.stop()
+                await subscriber.stop()
+
+        latencies = sorted(delivered[n] - published[n] for n in delivered)
+
+        def percentile(p: float) -> float:
+            if not latencies:
+                return 0.0
+            return round(
+                latencies[min(int(p * len(latencies)), len(latencies) - 1)] * 1000, 1
+            )
+
+        return {
+            "events": events,
+            "delivered": len(latencies),
+            "poll_interval_ms": poll_interval * 1000,
+            "p50_ms": percentile(0.50),
+            "p95_ms": percentile(0.95),
+            "p99_ms": percentile(0.99),
+        }
+
+    @staticmethod
+    def job_event_stream() -> List[Dict[str, Any]]:
+        """The events one subscriber receives for a typical job"""
+        from .async_processor import (
+            ANALYSIS_SECTIONS,
+            AnalysisJob,
+            JobStatus,
+        )
+        from .job_events import JobEventEncoder
+
+        now = datetime.now()
+        job = AnalysisJob(
+            id=str(uuid.uuid4()),
+            user_id="user-1",
+            property_address="12 Main Street, Springfield",
+            property_title="Listing",
+            manual_data=None,
+            status=JobStatus.PENDING,
+            progress=0,
+            current_section=None,
+            results={},
+            error_message=None,
+            created_at=now,
+            updated_at=now,
+            estimated_completion=now,
+        )
+        rng = random.Random(7)
+        encoder = JobEventEncoder()
+        events = [encoder.snapshot(job)]
+        job.status = JobStatus.IN_PROGRESS
+        for i, (key, name) in enumerate(ANALYSIS_SECTIONS):
+            job.current_section = key
+            events.append(encoder.delta(job))
+            job.results[key] = {
+                "title": name,
+                "content": " ".join(rng.choice(LISTING_WORDS) for _ in range(120)),
+                "highlights": [
+                    " ".join(rng.choice(LISTING_WORDS) for _ in range(8))
+                    for _ in range(6)
+                ],
+            }
+            job.progress = int((i + 1) / len(ANALYSIS_SECTIONS) * 100)
+            job.updated_at = datetime.now()
+            events.append(encoder.delta(job))
+        job.status = JobStatus.COMPLETED
+        job.current_section = None
+        events.append(encoder.delta(job))
+        return events
+
+    @staticmethod
+    def websocket_encodings(rounds: int = 200) -> Dict[str, Dict[str, Any]]:
+        """Bytes per job and CPU per message for each WebSocket encoding.
+
+        Deflate is modelled as permessage-deflate with context takeover
+        (one compressor per connection, sync-flushed per message).
+        """
+        from .ws_codec import JsonCodec, MsgpackCodec
+
+        events = Benchmarks.job_event_stream()
+        results = {}
+        for codec in (JsonCodec(), MsgpackCodec()):
+            for deflate in (False, True):
+                mode = codec.name + ("+deflate" if deflate else "")
+                started = time.process_time()
+                for _ in range(rounds):
+                    compressor = zlib.compressobj(wbits=-15)
+                    total = 0
+                    for event in events:
+                        frame = codec.encode(event)
+                        if isinstance(frame, str):
+                            frame = frame.encode("utf-8")
+                        if deflate:
+                            frame = compressor.compress(frame) + compressor.flush(
+                                zlib.Z_SYNC_FLUSH
+                            )
+                            frame = frame[:-4]  # trailer dropped on the wire
+                        total += len(frame)
+                elapsed = time.process_time() - started
+                results[mode] = {
+                    "messages_per_job": len(events),
+                    "bytes_per_job": total,
+                    "cpu_us_per_message": round(
+                        elapsed / (rounds * len(events)) * 1e6, 1
+                    ),
+                }
+        return results
+
+    @staticmethod
+    def investment_math(listings: int = 100_000, singles: int = 2000) -> Dict[str, Any]:
+        """Listings per second through the investment math, in bulk (one
+        vectorized call) and one listing at a time"""
+        import numpy as np
+
+        from .investment_math import (
+            InvestmentAssumptions,
+            analyze_investments,
+            investment_metrics,
+        )
+
+        assumptions = InvestmentAssumptions()
+        prices = np.random.default_rng(0).uniform(100_000, 2_000_000, listings)
+        started = time.perf_counter()
+        analyze_investments(prices, assumptions)
+        bulk_seconds = time.perf_counter() - started
+
+        started = time.perf_counter()
+        for price in prices[:singles]:
+            investment_metrics(float(price), assumptions)
+        single_seconds = time.perf_counter() - started
+        return {
+            "listings": listings,
+            "bulk_per_second": round(listings / bulk_seconds),
+            "single_us": round(single_seconds / singles * 1e6, 1),
+        }
+
+    @staticmethod
+    def monte_carlo(
+        paths: int = 20_000, years: int = 30, listings: int = 0
+    ) -> Dict[str, Any]:
+        """Simulated paths per second per core: in this process, and over
+        the process pool with ``listings`` simulations (default: two per
+        worker)"""
+        from .investment_math import InvestmentAssumptions
+        from .monte_carlo import MonteCarloPool, SimulationParams, simulate_listing
+
+        params = SimulationParams(years=years, paths=paths)
+        assumptions = InvestmentAssumptions()
+        simulate_listing(500_000, params, assumptions, seed=0)  # warm up
+        started = time.perf_counter()
+        simulate_listing(500_000, params, assumptions, seed=1)
+        single_seconds = time.perf_counter() - started
+
+        pool = MonteCarloPool(settings.MONTE_CARLO_WORKERS)
+        listings = listings or pool.workers * 2
+
+        async def run_pool() -> float:
+            # The first round also starts the workers
+            await asyncio.gather(
+                *(
+                    pool.simulate(500_000, params, assumptions)
+                    for _ in range(pool.workers)
+                )
+            )
+            started = time.perf_counter()
+            await asyncio.gather(
+                *(
+                    pool.simulate(500_000, params, assumptions, seed=seed)
+                    for seed in range(listings)
+                )
+            )
+            return time.perf_counter() - started
+
+        try:
+            pool_seconds = asyncio.run(run_pool())
+        finally:
+            pool.shutdown()
+        return {
+            "paths": paths,
+            "years": years,
+            "single_core_paths_per_second": round(paths / single_seconds),
+            "workers": pool.workers,
+            "pool_paths_per_second": round(listings * paths / pool_seconds),
+            "pool_paths_per_second_per_core": round(
+                listings * paths / pool_seconds / pool.workers
+            ),
+        }
+
+    @staticmethod
+    def feature_extraction(descriptions: int = 5000) -> Dict[str, Any]:
+        """Listing descriptions per second through the feature extractor,
+        on first sight and from its cache"""
+        from .listing_features import FeatureExtractor
+
+        filler = (
+            "Sunny open floor plan with hardwood floors, granite counters and "
+            "a large fenced yard close to schools, parks and shopping. "
+        )
+        mentions = [
+            "HOA $250/month. New roof 2021, HVAC replaced in 2019. 2-car garage.",
+            "Sold as-is, foundation issues. In flood zone AE. No HOA.",
+            "Renovated kitchen, finished basement, solar panels, community pool.",
+            "Furnace 8 years old. Association dues $1,200 per year. No pool.",
+        ]
+        rng = random.Random(0)
+        texts = [
+            filler * 7 + f"Listing {i}. " + rng.choice(mentions) + filler * 2
+            for i in range(descriptions)
+        ]
+
+        extractor = FeatureExtractor(descriptions)
+        started = time.perf_counter()
+        for text in texts:
+            extractor.extract(text)
+        uncached_seconds = time.perf_counter() - started
+        started = time.perf_counter()
+        for text in texts:
+            extractor.extract(text)
+        cached_seconds = time.perf_counter() - started
+        return {
+            "descriptions": descriptions,
+            "average_chars": sum(map(len, texts)) // descriptions,
+            "uncached_per_second": round(descriptions / uncached_seconds),
+            "cached_per_second": round(descriptions / cached_seconds),
+        }
+
+
+def run_benchmarks():
+    """Run the benchmarks and print their results"""
+
+    print("=== Memory per Retained Job ===")
+    memory = Benchmarks.memory_per_retained_job()
+    print(f"Jobs: {memory['jobs']}")
+    print(f"In-flight record: {memory['hot_bytes_per_job']} bytes/job")
+    print(f"Retained record: {memory['retained_bytes_per_job']} bytes/job")
+    print(f"Reduction: {memory['reduction']}")
+
+    print("\n=== Event Bus Publish-to-Deliver Latency ===")
+    latency = asyncio.run(Benchmarks.event_bus_latency())
+    print(f"Events: {latency['delivered']}/{latency['events']} delivered")
+    print(f"Poll interval: {latency['poll_interval_ms']:.0f}ms")
+    print(
+        f"Latency: p50 {latency['p50_ms']}ms, p95 {latency['p95_ms']}ms, "
+        f"p99 {latency['p99_ms']}ms"
+    )
+
+    print("\n=== WebSocket Encodings (per job) ===")
+    for mode, result in Benchmarks.websocket_encodings().items():
+        print(
+            f"{mode:>16}: {result['bytes_per_job']} bytes/job over "
+            f"{result['messages_per_job']} messages, "
+            f"{result['cpu_us_per_message']} us CPU/message"
+        )
+
+    print("\n=== Investment Math ===")
+    investment = Benchmarks.investment_math()
+    print(f"Bulk: {investment['bulk_per_second']:,} listings/s")
+    print(f"Single listing: {investment['single_us']} us")
+
+    print("\n=== Monte Carlo ROI ===")
+    simulation = Benchmarks.monte_carlo()
+    print(f"Paths: {simulation['paths']:,} over {simulation['years']} years")
+    print(f"Single core: {simulation['single_core_paths_per_second']:,} paths/s")
+    print(
+        f"Pool ({simulation['workers']} workers): "
+        f"{simulation['pool_paths_per_second']:,} paths/s, "
+        f"{simulation['pool_paths_per_second_per_core']:,} paths/s/core"
+    )
+
+    print("\n=== Listing Feature Extraction ===")
+    extraction = Benchmarks.feature_extraction()
+    print(
+        f"Descriptions: {extraction['descriptions']:,} of "
+        f"~{extraction['average_chars']:,} chars"
+    )
+    print(f"Uncached: {extraction['uncached_per_second']:,} descriptions/s")
+    print(f"Cached: {extraction['cached_per_second']:,} descriptions/s")
+
+
+if __name__ == "__main__":
+    run_benchmarks()
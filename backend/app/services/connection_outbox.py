@@ -0,0 +1,126 @@
+"""
+Bounded outbound queues for WebSocket connections
+Progress events are queued per connection and sent by a writer task, so
+publishing never waits on a client's network; a slow client only ever
+holds a bounded backlog
+"""
+
+import asyncio
+import json
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List
+
+# Outbox policies when a connection falls behind
+DROP_OLDEST = "drop_oldest"  # discard the oldest queued message when full
+COALESCE = "coalesce"  # also merge queued events for the same job
+
+JOB_EVENT_TYPES = ("job_update", "job_delta")
+
+
+def merge_job_event(queued: Dict[str, Any], event: Dict[str, Any]) -> Dict[str, Any]:
+    """Fold a later delta into a queued snapshot or delta of the same job.
+
+    Fields take the newer value and section results are unioned; a merged
+    delta keeps ``first_seq`` so the client knows which seqs it covers.
+    """
+    data = {**queued["data"], **event["data"]}
+    if "results" in queued["data"] or "results" in event["data"]:
+        data["results"] = {
+            **queued["data"].get("results", {}),
+            **event["data"].get("results", {}),
+        }
+    merged = {**queued, "seq": event["seq"], "data": data}
+    if queued["type"] == "job_delta":
+        merged["first_seq"] = queued.get("first_seq", queued["seq"])
+    return merged
+
+
+class ConnectionOutbox:
+    """Per-connection send queue drained by a single writer task.
+
+    ``put`` never blocks. At ``max_messages`` the oldest message is dropped;
+    with the coalesce policy a job event first merges into the message
+    already queued for that job, so a slow client receives fewer, larger
+    updates instead of falling further behind. Dropped deltas show up as a
+    seq gap, which makes the client resubscribe for a fresh snapshot.
+    """
+
+    def __init__(self, max_messages: int = 64, policy: str = COALESCE):
+        if policy not in (DROP_OLDEST, COALESCE):
+            raise ValueError(f"Unknown outbox policy: {policy}")
+        self.max_messages = max_messages
+        self.policy = policy
+        # Entries are [job_id or None, message] so merges can update in place
+        self._queue: Deque[List[Any]] = deque()
+        self._by_job: Dict[str, List[Any]] = {}
+        self._ready = asyncio.Event()
+
+        self.sent = 0
+        self.dropped = 0
+        self.coalesced = 0
+        self.bytes_sent = 0  # encoded size, before permessage-deflate
+
+    def put(self, message: Dict[str, Any]):
+        job_id = message.get("job_id")
+        if message.get("type") not in JOB_EVENT_TYPES:
+            job_id = None
+
+        if job_id is not None and self.policy == COALESCE:
+            entry = self._by_job.get(job_id)
+            if entry is not None:
+                if message["type"] == "job_update":
+                    entry[1] = message  # A snapshot supersedes everything queued
+                else:
+                    entry[1] = merge_job_event(entry[1], message)
+                self.coalesced += 1
+                return
+
+        while len(self._queue) >= self.max_messages:
+            self._discard(self._queue.popleft())
+            self.dropped += 1
+
+        entry = [job_id, message]
+        self._queue.append(entry)
+        if job_id is not None:
+            self._by_job[job_id] = entry
+        self._ready.set()
+
+    def _discard(self, entry: List[Any]):
+        if entry[0] is not None and self._by_job.get(entry[0]) is entry:
+            del self._by_job[entry[0]]
+
+    async def get(self) -> Dict[str, Any]:
+        while not self._queue:
+            self._ready.clear()
+            await self._ready.wait()
+        entry = self._queue.popleft()
+        self._discard(entry)
+        return entry[1]
+
+    async def run(
+        self,
+        send: Callable[[Any], Awaitable[None]],
+        encode: Callable[[Dict[str, Any]], Any] = json.dumps,
+    ):
+        """Writer loop: send queued messages until cancelled or send fails.
+
+        Messages are encoded only when sent, after any coalescing.
+        """
+        while True:
+            message = await self.get()
+            frame = encode(message)
+            await send(frame)
+            self.sent += 1
+            self.bytes_sent += len(frame)
+
+    def __len__(self) -> int:
+        return len(self._queue)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "queued": len(self._queue),
+            "sent": self.sent,
+            "dropped": self.dropped,
+            "coalesced": self.coalesced,
+            "bytes_sent": self.bytes_sent,
+        }
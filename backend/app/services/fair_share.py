@@ -0,0 +1,52 @@
+"""
+Weighted fair sharing of analysis workers between users
+Start-time fair queueing: each user is charged 1/weight of virtual time per
+job started, and the next job goes to the user with the earliest start tag
+"""
+
+from typing import Dict, Iterable, Optional, Tuple
+
+from ..config import settings
+
+
+def plan_weight(plan: Optional[str]) -> float:
+    """Scheduling weight for a user's plan (1.0 when unknown)"""
+    weight = settings.JOB_PLAN_WEIGHTS.get(plan or "", 1.0)
+    return weight if weight > 0 else 1.0
+
+
+class FairShare:
+    """Virtual-time bookkeeping for start-time fair queueing"""
+
+    def __init__(self, vtime: float = 0.0, vfinish: Optional[Dict[str, float]] = None):
+        self.vtime = vtime
+        self.vfinish: Dict[str, float] = vfinish or {}
+
+    def start_tag(self, user_id: str) -> float:
+        # Users that were idle get no credit for the time they were away
+        return max(self.vfinish.get(user_id, 0.0), self.vtime)
+
+    def choose(self, candidates: Iterable[Tuple[str, str]]) -> Optional[str]:
+        """Pick a user from (user_id, oldest_created_at) pairs"""
+        best = min(
+            candidates,
+            key=lambda c: (self.start_tag(c[0]), c[1]),
+            default=None,
+        )
+        return best[0] if best else None
+
+    def charge(self, user_id: str, weight: float) -> float:
+        """Account for one job started by ``user_id``; returns its new tag"""
+        start = self.start_tag(user_id)
+        self.vtime = start
+        self.vfinish[user_id] = start + 1.0 / weight
+        return self.vfinish[user_id]
+
+    def forget_idle(self, active_users: Iterable[str]):
+        """Drop tags of users that no longer matter for ordering"""
+        active = set(active_users)
+        self.vfinish = {
+            user_id: tag
+            for user_id, tag in self.vfinish.items()
+            if user_id in active or tag > self.vtime
+        }
@@ -0,0 +1,211 @@
+"""
+Deterministic investment math for listings
+Mortgage payments, cap rate, cash-on-cash return, break-even rent and
+projected equity are closed-form, so they are computed here with NumPy
+instead of being asked of the LLM. Every function works on arrays of
+listings at once; a single listing is just an array of one
+"""
+
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+from ..config import settings
+from ..models import ManualPropertyData
+from .listing_features import feature_extractor
+from .listing_preview import parse_price
+
+
+@dataclass(frozen=True, slots=True)
+class InvestmentAssumptions:
+    """Financing and operating assumptions; rates are annual fractions"""
+
+    down_payment: float = 0.20
+    closing_costs: float = 0.03
+    mortgage_rate: float = 0.065
+    loan_term_years: int = 30
+    gross_rent_yield: float = 0.07  # Annual rent as a share of price
+    vacancy_rate: float = 0.05
+    management_rate: float = 0.08  # Share of collected rent
+    property_tax_rate: float = 0.011
+    insurance_rate: float = 0.0035
+    maintenance_rate: float = 0.01
+    appreciation_rate: float = 0.03
+    horizon_years: int = 5
+
+    @classmethod
+    def from_settings(cls) -> "InvestmentAssumptions":
+        return cls(
+            down_payment=settings.INVESTMENT_DOWN_PAYMENT,
+            closing_costs=settings.INVESTMENT_CLOSING_COSTS,
+            mortgage_rate=settings.INVESTMENT_MORTGAGE_RATE,
+            loan_term_years=settings.INVESTMENT_LOAN_TERM_YEARS,
+            gross_rent_yield=settings.INVESTMENT_GROSS_RENT_YIELD,
+            vacancy_rate=settings.INVESTMENT_VACANCY_RATE,
+            management_rate=settings.INVESTMENT_MANAGEMENT_RATE,
+            property_tax_rate=settings.INVESTMENT_PROPERTY_TAX_RATE,
+            insurance_rate=settings.INVESTMENT_INSURANCE_RATE,
+            maintenance_rate=settings.INVESTMENT_MAINTENANCE_RATE,
+            appreciation_rate=settings.INVESTMENT_APPRECIATION_RATE,
+            horizon_years=settings.INVESTMENT_HORIZON_YEARS,
+        )
+
+
+def monthly_payment(principal, annual_rate, years) -> np.ndarray:
+    """Principal and interest payment of fully amortizing loans"""
+    principal = np.asarray(principal, dtype=float)
+    rate = np.asarray(annual_rate, dtype=float) / 12
+    months = np.asarray(years, dtype=float) * 12
+    # Zero-rate loans divide evenly; the placeholder rate avoids 0/0
+    safe_rate = np.where(rate == 0, 1.0, rate)
+    amortizing = principal * safe_rate / -np.expm1(-months * np.log1p(safe_rate))
+    return np.where(rate == 0, principal / months, amortizing)
+
+
+def remaining_balance(principal, annual_rate, years, months_paid) -> np.ndarray:
+    """Loan balance after ``months_paid`` payments"""
+    principal = np.asarray(principal, dtype=float)
+    rate = np.asarray(annual_rate, dtype=float) / 12
+    payment = monthly_payment(principal, annual_rate, years)
+    safe_rate = np.where(rate == 0, 1.0, rate)
+    growth = np.power(1 + safe_rate, months_paid)
+    amortizing = principal * growth - payment * (growth - 1) / safe_rate
+    balance = np.where(rate == 0, principal - payment * months_paid, amortizing)
+    return np.maximum(balance, 0.0)
+
+
+def analyze_investments(
+    prices,
+    assumptions: Optional[InvestmentAssumptions] = None,
+    monthly_rent=None,
+    monthly_hoa=0.0,
+) -> Dict[str, np.ndarray]:
+    """Investment metrics for many listings at once.
+
+    ``prices`` is an array of purchase prices; ``monthly_rent`` (default:
+    the gross rent yield of each price) and ``monthly_hoa`` broadcast
+    against it. Returns one array per metric, aligned with ``prices``.
+    """
+    a = assumptions or InvestmentAssumptions.from_settings()
+    price = np.asarray(prices, dtype=float)
+    if monthly_rent is None:
+        rent = price * a.gross_rent_yield / 12
+    else:
+        rent = np.broadcast_to(np.asarray(monthly_rent, dtype=float), price.shape)
+    hoa = np.broadcast_to(np.asarray(monthly_hoa, dtype=float), price.shape)
+
+    loan = price * (1 - a.down_payment)
+    cash_invested = price * (a.down_payment + a.closing_costs)
+    payment = monthly_payment(loan, a.mortgage_rate, a.loan_term_years)
+    debt_service = payment * 12
+
+    # Owner costs that do not scale with collected rent
+    fixed_costs = (
+        price * (a.property_tax_rate + a.insurance_rate + a.maintenance_rate) + hoa * 12
+    )
+    collected = rent * 12 * (1 - a.vacancy_rate)
+    noi = collected * (1 - a.management_rate) - fixed_costs
+    cash_flow = noi - debt_service
+    # Rent at which collections, net of vacancy and management, cover
+    # the mortgage and fixed costs
+    break_even_rent = (debt_service + fixed_costs) / (
+        12 * (1 - a.vacancy_rate) * (1 - a.management_rate)
+    )
+
+    horizon_months = a.horizon_years * 12
+    future_value = price * (1 + a.appreciation_rate) ** a.horizon_years
+    equity = future_value - remaining_balance(
+        loan, a.mortgage_rate, a.loan_term_years, horizon_months
+    )
+    total_return = equity + cash_flow * a.horizon_years - cash_invested
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return {
+            "price": price,
+            "monthly_rent": rent,
+            "monthly_hoa": hoa,
+            "loan_amount": loan,
+            "cash_invested": cash_invested,
+            "monthly_payment": payment,
+            "noi": noi,
+            "annual_cash_flow": cash_flow,
+            "cap_rate": noi / price,
+            "cash_on_cash": cash_flow / cash_invested,
+            "dscr": np.where(debt_service > 0, noi / debt_service, np.inf),
+            "break_even_rent": break_even_rent,
+            "future_value": future_value,
+            "equity": equity,
+            "total_return": total_return / cash_invested,
+        }
+
+
+def investment_metrics(
+    price: float,
+    assumptions: Optional[InvestmentAssumptions] = None,
+    monthly_rent: Optional[float] = None,
+    monthly_hoa: float = 0.0,
+) -> Dict[str, Optional[float]]:
+    """Investment metrics of one listing, as plain floats"""
+    metrics = analyze_investments(
+        np.array([price]),
+        assumptions,
+        None if monthly_rent is None else np.array([monthly_rent]),
+        monthly_hoa,
+    )
+    # Infinite ratios (no debt service) are reported as None
+    return {
+        name: round(float(values[0]), 4) if np.isfinite(values[0]) else None
+        for name, values in metrics.items()
+    }
+
+
+def investment_section(
+    manual_data: Optional[ManualPropertyData],
+    assumptions: Optional[InvestmentAssumptions] = None,
+) -> Dict[str, Any]:
+    """The investment_potential section, computed from the listing price
+    and any HOA fee named in the description.
+
+    The text fields keep the shape of the generated section; ``metrics``
+    and ``assumptions`` carry the numbers behind them.
+    """
+    a = assumptions or InvestmentAssumptions.from_settings()
+    price = parse_price(manual_data.price if manual_data else None)
+    if not price:
+        return {
+            "rental_income": "Provide a listing price to estimate rental income",
+            "cash_flow": "Provide a listing price to estimate cash flow",
+            "roi_projections": "Provide a listing price to project returns",
+            "appreciation_timeline": "Provide a listing price to project appreciation",
+            "metrics": None,
+            "assumptions": asdict(a),
+        }
+
+    hoa = feature_extractor.extract(manual_data.listing_description)["hoa_monthly"]
+    m = investment_metrics(price, a, monthly_hoa=hoa or 0.0)
+    return {
+        "rental_income": (
+            f"About ${m['monthly_rent']:,.0f}/month at a {a.gross_rent_yield:.1%} "
+            f"gross yield; break-even rent is ${m['break_even_rent']:,.0f}/month"
+        ),
+        "cash_flow": (
+            f"{'+' if m['annual_cash_flow'] >= 0 else '-'}"
+            f"${abs(m['annual_cash_flow']) / 12:,.0f}/month after a "
+            f"${m['monthly_payment']:,.0f} mortgage payment"
+            f"{f', ${hoa:,.0f} HOA' if hoa else ''} and operating costs "
+            f"(cap rate {m['cap_rate']:.2%})"
+        ),
+        "roi_projections": (
+            f"Cash-on-cash return of {m['cash_on_cash']:.1%} on "
+            f"${m['cash_invested']:,.0f} invested; {a.horizon_years}-year total "
+            f"return of {m['total_return']:.0%}"
+        ),
+        "appreciation_timeline": (
+            f"At {a.appreciation_rate:.1%} a year, worth about "
+            f"${m['future_value']:,.0f} in {a.horizon_years} years with "
+            f"${m['equity']:,.0f} of equity"
+        ),
+        "metrics": m,
+        "assumptions": asdict(a),
+    }
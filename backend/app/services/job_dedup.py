@@ -0,0 +1,72 @@
+"""
+Content-addressed identity for analysis jobs
+Identical submissions (same user, address and property details) map to the
+same fingerprint so retries and double-clicks can share one running job
+"""
+
+import hashlib
+import json
+import re
+from typing import Any, Dict, List, Optional
+
+# Street suffixes and unit words spelled several ways in listings
+ADDRESS_ABBREVIATIONS = {
+    "street": "st",
+    "avenue": "ave",
+    "road": "rd",
+    "drive": "dr",
+    "boulevard": "blvd",
+    "lane": "ln",
+    "court": "ct",
+    "place": "pl",
+    "terrace": "ter",
+    "highway": "hwy",
+    "parkway": "pkwy",
+    "circle": "cir",
+    "apartment": "apt",
+    "suite": "ste",
+    "unit": "apt",
+    "north": "n",
+    "south": "s",
+    "east": "e",
+    "west": "w",
+}
+
+# Fields a user types about their own situation rather than the listing
+PRIVATE_FIELDS = ("additional_notes",)
+
+
+def normalize_address(address: str) -> str:
+    """Lowercase, strip punctuation and abbreviate common address words"""
+    words = re.sub(r"[^\w\s]", " ", address.lower()).split()
+    return " ".join(ADDRESS_ABBREVIATIONS.get(word, word) for word in words)
+
+
+def is_public_listing(manual_data: Optional[Dict[str, Any]]) -> bool:
+    """Whether the inputs describe only the listing, nothing user-specific"""
+    return not any((manual_data or {}).get(field) for field in PRIVATE_FIELDS)
+
+
+def _digest(*parts: Any) -> str:
+    encoded = json.dumps(parts, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+def job_fingerprints(
+    user_id: str,
+    property_address: str,
+    manual_data: Optional[Dict[str, Any]],
+    execution_mode: str,
+    cross_user: bool = False,
+) -> List[str]:
+    """Fingerprints a submission is known by, most specific first.
+
+    The first is scoped to the user; with ``cross_user`` a second,
+    user-independent fingerprint is added for public-listing inputs.
+    """
+    address = normalize_address(property_address)
+    data = manual_data or {}
+    fingerprints = [_digest("user", user_id, address, data, execution_mode)]
+    if cross_user and is_public_listing(manual_data):
+        fingerprints.append(_digest("public", address, data, execution_mode))
+    return fingerprints
@@ -0,0 +1,234 @@
+"""
+Fan-out of job progress events between processes
+With several uvicorn workers or replicas, the process running a job is
+often not the one holding a subscriber's WebSocket; the event bus delivers
+every published event to subscribers in all processes
+"""
+
+import asyncio
+import json
+import sqlite3
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from ..config import settings
+from .job_metrics import LatencyHistogram
+
+# deliver(event) sends an event to this process's subscribers;
+# wants(job_id) says whether this process has any for the job
+Deliver = Callable[[Dict[str, Any]], Awaitable[None]]
+Wants = Callable[[str], bool]
+
+
+class LocalEventBus:
+    """Delivers events to subscribers in this process only"""
+
+    shared = False
+
+    def __init__(self):
+        self._deliver: Optional[Deliver] = None
+        self.published = 0
+
+    async def start(self, deliver: Deliver, wants: Wants):
+        self._deliver = deliver
+
+    async def stop(self):
+        pass
+
+    async def publish(self, event: Dict[str, Any]):
+        self.published += 1
+        if self._deliver:
+            await self._deliver(event)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {"backend": "local", "published": self.published}
+
+
+class SQLiteEventBus(LocalEventBus):
+    """Event bus on a SQLite table shared by every process on the host.
+
+    Events are delivered to local subscribers immediately and appended to
+    ``analysis_job_events`` in batches; each process tails the table,
+    checking ``PRAGMA data_version`` (which only changes when another
+    connection commits) every ``poll_interval`` seconds so an idle bus
+    costs no queries. Rows older than ``retention_seconds`` are pruned.
+    """
+
+    shared = True
+
+    def __init__(
+        self,
+        path: str,
+        instance_id: str,
+        poll_interval: float = 0.02,
+        retention_seconds: float = 60.0,
+    ):
+        super().__init__()
+        self.path = path
+        self.instance_id = instance_id
+        self.poll_interval = poll_interval
+        self.retention_seconds = retention_seconds
+
+        self._conn: Optional[sqlite3.Connection] = None
+        self._wants: Optional[Wants] = None
+        self._outbox: List[Tuple[str, str, str, float]] = []
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._last_id = 0
+        self._data_version = -1
+        self._pruned_at = 0.0
+
+        self.received = 0
+        self.delivery_latency = LatencyHistogram()
+
+    async def start(self, deliver: Deliver, wants: Wants):
+        if self._task:
+            return
+        self._deliver = deliver
+        self._wants = wants
+        await asyncio.to_thread(self._connect)
+        self._task = asyncio.create_task(self._poll_loop())
+
+    def _connect(self):
+        conn = sqlite3.connect(
+            self.path, check_same_thread=False, isolation_level=None, timeout=10.0
+        )
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS analysis_job_events (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                job_id TEXT NOT NULL,
+                origin TEXT NOT NULL,
+                event TEXT NOT NULL,
+                created_at REAL NOT NULL
+            )
+            """
+        )
+        # Only events published after startup are of interest
+        row = conn.execute("SELECT MAX(id) FROM analysis_job_events").fetchone()
+        self._last_id = row[0] or 0
+        self._conn = conn
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        if self._conn is not None:
+            # Hand over events published during shutdown
+            await asyncio.to_thread(self._exchange, self._take_outbox(), False)
+            self._conn.close()
+            self._conn = None
+
+    async def publish(self, event: Dict[str, Any]):
+        self._outbox.append(
+            (event["job_id"], self.instance_id, json.dumps(event), time.time())
+        )
+        self._wakeup.set()
+        await super().publish(event)
+
+    def _take_outbox(self) -> List[Tuple[str, str, str, float]]:
+        outbox, self._outbox = self._outbox, []
+        return outbox
+
+    async def _poll_loop(self):
+        while True:
+            try:
+                async with asyncio.timeout(self.poll_interval):
+                    await self._wakeup.wait()
+            except TimeoutError:
+                pass
+            self._wakeup.clear()
+
+            outbox = self._take_outbox()
+            try:
+                rows = await asyncio.to_thread(self._exchange, outbox, True)
+            except Exception as e:
+                print(f"Job event bus error: {e}")
+                self._outbox[:0] = outbox
+                continue
+
+            for job_id, event, created_at in rows:
+                self.received += 1
+                self.delivery_latency.record(max(time.time() - created_at, 0.0))
+                try:
+                    await self._deliver(json.loads(event))
+                except Exception as e:
+                    print(f"Job event delivery error: {e}")
+
+    def _exchange(
+        self, outbox: List[Tuple[str, str, str, float]], read: bool
+    ) -> List[Tuple[str, str, float]]:
+        """Append our events, then read other processes' new ones"""
+        conn = self._conn
+        if outbox:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.executemany(
+                    """
+                    INSERT INTO analysis_job_events (job_id, origin, event, created_at)
+                    VALUES (?, ?, ?, ?)
+                    """,
+                    outbox,
+                )
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+
+        now = time.time()
+        if now - self._pruned_at >= self.retention_seconds / 2:
+            self._pruned_at = now
+            conn.execute(
+                "DELETE FROM analysis_job_events WHERE created_at < ?",
+                (now - self.retention_seconds,),
+            )
+
+        if not read:
+            return []
+        data_version = conn.execute("PRAGMA data_version").fetchone()[0]
+        if data_version == self._data_version:
+            return []
+        self._data_version = data_version
+
+        rows = conn.execute(
+            """
+            SELECT id, job_id, event, created_at FROM analysis_job_events
+            WHERE id > ? AND origin != ?
+            ORDER BY id
+            """,
+            (self._last_id, self.instance_id),
+        ).fetchall()
+        if not rows:
+            return []
+        self._last_id = rows[-1][0]
+        # Events for jobs nobody here watches are skipped without parsing
+        return [
+            (job_id, event, created_at)
+            for _, job_id, event, created_at in rows
+            if self._wants(job_id)
+        ]
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "backend": "sqlite",
+            "published": self.published,
+            "received": self.received,
+            "publish_to_deliver": self.delivery_latency.snapshot(),
+        }
+
+
+def create_event_bus(instance_id: str) -> LocalEventBus:
+    """Create the event bus selected by JOB_EVENT_BUS_BACKEND"""
+    if settings.JOB_EVENT_BUS_BACKEND == "sqlite":
+        return SQLiteEventBus(
+            settings.JOB_STORE_PATH,
+            instance_id,
+            poll_interval=settings.JOB_EVENT_BUS_POLL_INTERVAL,
+            retention_seconds=settings.JOB_EVENT_BUS_RETENTION_SECONDS,
+        )
+    if settings.JOB_EVENT_BUS_BACKEND == "local":
+        return LocalEventBus()
+    raise ValueError(f"Unknown job event bus backend: {settings.JOB_EVENT_BUS_BACKEND}")
@@ -0,0 +1,127 @@
+"""
+Progress events for analysis jobs
+Subscribers get one full snapshot, then sequence-numbered deltas carrying
+only the fields that changed and the sections completed since the last
+event, so the bytes sent per job grow linearly with its sections. The
+sequence number lives on the job (``event_seq``) and is persisted with it,
+so snapshots taken by any process line up with the deltas it publishes
+"""
+
+import itertools
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Optional, Set
+
+
+def job_fields(job: Any) -> Dict[str, Any]:
+    """Serializable view of a job's scalar fields"""
+    return {
+        "status": job.status.value,
+        "progress": job.progress,
+        "current_section": job.current_section,
+        "error_message": job.error_message,
+        "updated_at": job.updated_at.isoformat(),
+        "estimated_completion": job.estimated_completion.isoformat()
+        if job.estimated_completion
+        else None,
+    }
+
+
+@dataclass(slots=True)
+class _EventState:
+    """What subscribers of one job have been told so far"""
+
+    fields: Dict[str, Any] = field(default_factory=dict)
+    result_keys: Set[str] = field(default_factory=set)
+
+
+class JobEventEncoder:
+    """Turns job state changes into snapshot and delta events"""
+
+    def __init__(self):
+        self.states: Dict[str, _EventState] = {}
+
+    def snapshot(self, job: Any) -> Dict[str, Any]:
+        """Full job state, tagged with the sequence number of the last delta"""
+        return {
+            "type": "job_update",
+            "job_id": job.id,
+            "seq": job.event_seq,
+            "data": {**job_fields(job), "results": job.results},
+        }
+
+    def delta(self, job: Any) -> Optional[Dict[str, Any]]:
+        """Changes since the previous event, or None if nothing changed.
+
+        ``data.results`` holds only newly completed sections and is merged
+        into the client's results; every other field replaces its value.
+        """
+        state = self.states.setdefault(job.id, _EventState())
+        current = job_fields(job)
+        data = {
+            name: value
+            for name, value in current.items()
+            if state.fields.get(name, ...) != value
+        }
+        new_results = {
+            key: result
+            for key, result in job.results.items()
+            if key not in state.result_keys
+        }
+        if new_results:
+            data["results"] = new_results
+        if not data:
+            return None
+
+        job.event_seq += 1
+        state.fields = current
+        state.result_keys.update(new_results)
+        return {
+            "type": "job_delta",
+            "job_id": job.id,
+            "seq": job.event_seq,
+            "data": data,
+        }
+
+    def forget(self, job_id: str):
+        self.states.pop(job_id, None)
+
+
+@dataclass(frozen=True, slots=True)
+class Subscription:
+    """Handle returned by ``subscribe``; pass it back to ``unsubscribe``"""
+
+    job_id: str
+    token: int
+
+
+class SubscriptionRegistry:
+    """Progress callbacks per job, removable through their handles"""
+
+    def __init__(self):
+        self.callbacks: Dict[str, Dict[int, Callable]] = {}
+        self._tokens = itertools.count(1)
+        self._count = 0
+
+    def add(self, job_id: str, callback: Callable) -> Subscription:
+        subscription = Subscription(job_id, next(self._tokens))
+        self.callbacks.setdefault(job_id, {})[subscription.token] = callback
+        self._count += 1
+        return subscription
+
+    def remove(self, subscription: Subscription) -> bool:
+        callbacks = self.callbacks.get(subscription.job_id)
+        if not callbacks or callbacks.pop(subscription.token, None) is None:
+            return False
+        self._count -= 1
+        if not callbacks:
+            del self.callbacks[subscription.job_id]
+        return True
+
+    def for_job(self, job_id: str) -> Dict[int, Callable]:
+        return self.callbacks.get(job_id, {})
+
+    def drop_job(self, job_id: str):
+        self._count -= len(self.callbacks.pop(job_id, {}))
+
+    def __len__(self) -> int:
+        return self._count
@@ -0,0 +1,136 @@
+"""
+Incrementally maintained metrics for the analysis job processor
+Counters are updated on state transitions and latencies go into fixed-size
+log-bucketed histograms, so reading statistics never scans jobs
+"""
+
+import math
+import time
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+
+class LatencyHistogram:
+    """Streaming histogram with logarithmic buckets.
+
+    Bucket bounds grow by ``growth`` from ``min_value`` so any percentile is
+    accurate to within one bucket (about 9% with the default growth).
+    """
+
+    def __init__(
+        self, min_value: float = 0.001, max_value: float = 3600.0, growth: float = 1.09
+    ):
+        self.min_value = min_value
+        self.growth = growth
+        self._log_growth = math.log(growth)
+        self.buckets: List[int] = [0] * (self._index(max_value) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def _index(self, value: float) -> int:
+        if value <= self.min_value:
+            return 0
+        return int(math.log(value / self.min_value) / self._log_growth) + 1
+
+    def record(self, value: float):
+        index = min(self._index(value), len(self.buckets) - 1)
+        self.buckets[index] += 1
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+
+    def percentile(self, p: float) -> float:
+        """Upper bound of the bucket holding the p-th fraction of samples"""
+        if not self.count:
+            return 0.0
+        rank = p * self.count
+        seen = 0
+        for index, bucket_count in enumerate(self.buckets):
+            seen += bucket_count
+            if seen >= rank:
+                upper = self.min_value * self.growth**index
+                return min(upper, self.max)
+        return self.max
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "avg_ms": round(self.total / self.count * 1000, 1) if self.count else 0.0,
+            "p50_ms": round(self.percentile(0.50) * 1000, 1),
+            "p95_ms": round(self.percentile(0.95) * 1000, 1),
+            "p99_ms": round(self.percentile(0.99) * 1000, 1),
+            "max_ms": round(self.max * 1000, 1),
+        }
+
+
+class RateMeter:
+    """Events per minute over a sliding window of one-second slots"""
+
+    def __init__(self, window_seconds: int = 60):
+        self.window = window_seconds
+        self.slots: List[int] = [0] * window_seconds
+        self.stamps: List[int] = [0] * window_seconds
+        self.total = 0
+
+    def record(self, count: int = 1, now: Optional[float] = None):
+        second = int(now if now is not None else time.monotonic())
+        index = second % self.window
+        if self.stamps[index] != second:
+            self.stamps[index] = second
+            self.slots[index] = 0
+        self.slots[index] += count
+        self.total += count
+
+    def per_minute(self, now: Optional[float] = None) -> float:
+        second = int(now if now is not None else time.monotonic())
+        recent = sum(
+            count
+            for count, stamp in zip(self.slots, self.stamps)
+            if second - stamp < self.window
+        )
+        return round(recent * 60 / self.window, 1)
+
+
+class JobMetrics:
+    """Status counters, latency histograms and throughput for jobs"""
+
+    def __init__(self):
+        self.status_counts: Counter = Counter()
+        self.queue_wait = LatencyHistogram()
+        self.section_generation = LatencyHistogram()
+        self.end_to_end = LatencyHistogram()
+        self.submitted = RateMeter()
+        self.completed = RateMeter()
+        self.failed = RateMeter()
+        self.sections = RateMeter()
+
+    def added(self, status: str):
+        self.status_counts[status] += 1
+
+    def removed(self, status: str):
+        self.status_counts[status] -= 1
+
+    def transition(self, old: str, new: str):
+        if old != new:
+            self.status_counts[old] -= 1
+            self.status_counts[new] += 1
+
+    def snapshot(self, statuses: List[str]) -> Dict[str, Any]:
+        return {
+            "status_counts": {
+                status: self.status_counts[status] for status in statuses
+            },
+            "latency": {
+                "queue_wait": self.queue_wait.snapshot(),
+                "section_generation": self.section_generation.snapshot(),
+                "end_to_end": self.end_to_end.snapshot(),
+            },
+            "throughput": {
+                "jobs_submitted_per_min": self.submitted.per_minute(),
+                "jobs_completed_per_min": self.completed.per_minute(),
+                "jobs_failed_per_min": self.failed.per_minute(),
+                "sections_per_min": self.sections.per_minute(),
+                "jobs_completed_total": self.completed.total,
+            },
+        }
@@ -0,0 +1,188 @@
+"""
+Job queues feeding AsyncAnalysisProcessor workers
+The local queue serves a single process; the shared queue lets every
+uvicorn worker and replica on a host claim jobs from the SQLite job store
+"""
+
+import asyncio
+from collections import Counter, deque
+from typing import Any, Deque, Dict, Optional
+
+from ..config import settings
+from .fair_share import FairShare, plan_weight
+from .job_store import JobStore
+
+
+class LocalJobQueue:
+    """In-process queue with weighted fair ordering across users.
+
+    Each user has a FIFO of job ids; the next job comes from the user with
+    the earliest fair-share start tag among users below the in-flight cap.
+    """
+
+    shared = False
+
+    def __init__(self, max_in_flight_per_user: int = 0):
+        self.max_in_flight_per_user = max_in_flight_per_user
+        self._queues: Dict[str, Deque[str]] = {}
+        self._weights: Dict[str, float] = {}
+        self._in_flight: Counter = Counter()
+        self._running: Dict[str, str] = {}  # job_id -> user_id
+        self._fair_share = FairShare()
+        self._changed = asyncio.Condition()
+        self._size = 0
+
+    async def put(self, job_id: str, user_id: str, plan: Optional[str] = None):
+        async with self._changed:
+            self._queues.setdefault(user_id, deque()).append(job_id)
+            self._weights[user_id] = plan_weight(plan)
+            self._size += 1
+            self._changed.notify()
+
+    async def get(self, worker_name: str) -> str:
+        """Wait for the next job id a worker may start"""
+        async with self._changed:
+            while True:
+                user_id = self._fair_share.choose(
+                    (user_id, "") for user_id in self._eligible_users()
+                )
+                if user_id is not None:
+                    break
+                await self._changed.wait()
+
+            queue = self._queues[user_id]
+            job_id = queue.popleft()
+            if not queue:
+                del self._queues[user_id]
+            self._size -= 1
+            self._in_flight[user_id] += 1
+            self._running[job_id] = user_id
+            self._fair_share.charge(user_id, self._weights.get(user_id, 1.0))
+            self._fair_share.forget_idle(self._queues)
+            return job_id
+
+    def _eligible_users(self):
+        cap = self.max_in_flight_per_user
+        return [
+            user_id
+            for user_id in self._queues
+            if not cap or self._in_flight[user_id] < cap
+        ]
+
+    async def release(self, job_id: str):
+        """Mark a job as finished, freeing its user's in-flight slot"""
+        async with self._changed:
+            user_id = self._running.pop(job_id, None)
+            if user_id is None:
+                return
+            self._in_flight[user_id] -= 1
+            if self._in_flight[user_id] <= 0:
+                del self._in_flight[user_id]
+            self._changed.notify_all()
+
+    def qsize(self) -> int:
+        return self._size
+
+    async def refresh_depth(self) -> int:
+        return self._size
+
+    def position(self, job_id: str, user_id: str) -> int:
+        """Approximate number of jobs that will start before this one,
+        assuming users are served in turn"""
+        queue = self._queues.get(user_id)
+        if not queue or job_id not in queue:
+            return 0
+        index = queue.index(job_id)
+        return index + sum(
+            min(len(other), index + 1)
+            for other_id, other in self._queues.items()
+            if other_id != user_id
+        )
+
+
+class SharedJobQueue:
+    """Lease-based queue on top of a job store shared between processes.
+
+    Workers claim the oldest pending job with a lease; the owner renews the
+    lease while it works, and a job whose owner dies becomes claimable again
+    once the lease expires.
+    """
+
+    shared = True
+
+    def __init__(
+        self,
+        store: JobStore,
+        lease_seconds: float = 30.0,
+        poll_interval: float = 0.5,
+        max_in_flight_per_user: int = 0,
+    ):
+        if not store.supports_leases:
+            raise ValueError("Shared job queue requires the sqlite job store")
+        self.store = store
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+        self.max_in_flight_per_user = max_in_flight_per_user
+        self._wakeup = asyncio.Event()
+        self._depth = 0
+
+    async def put(self, job_id: str, user_id: str, plan: Optional[str] = None):
+        # The job row is already in the store; wake local workers so they
+        # don't wait for the next poll
+        self._depth += 1
+        self._wakeup.set()
+
+    async def get(self, worker_name: str) -> Optional[Dict[str, Any]]:
+        """Wait for and claim the next job record"""
+        while True:
+            record = await self.store.claim_job(
+                worker_name, self.lease_seconds, self.max_in_flight_per_user
+            )
+            if record:
+                self._depth = max(self._depth - 1, 0)
+                return record
+
+            await self.refresh_depth()
+            self._wakeup.clear()
+            # asyncio.timeout rather than wait_for: on Python 3.11 wait_for
+            # can swallow a cancel that races its timeout, pinning the worker
+            try:
+                async with asyncio.timeout(self.poll_interval):
+                    await self._wakeup.wait()
+            except TimeoutError:
+                pass
+
+    async def release(self, job_id: str):
+        # In-flight counts come from live leases in the store
+        pass
+
+    async def renew(self, job_id: str, worker_name: str) -> bool:
+        return await self.store.renew_lease(job_id, worker_name, self.lease_seconds)
+
+    def qsize(self) -> int:
+        """Pending jobs across all processes, as of the last refresh plus
+        this process's puts and claims since"""
+        return self._depth
+
+    async def refresh_depth(self) -> int:
+        """Re-read the pending count from the store"""
+        self._depth = await self.store.count_pending()
+        return self._depth
+
+    def position(self, job_id: str, user_id: str) -> int:
+        # Ordering lives in the store; assume the job is behind everything
+        return self._depth
+
+
+def create_job_queue(store: JobStore) -> Any:
+    """Create the job queue selected by JOB_QUEUE_BACKEND"""
+    if settings.JOB_QUEUE_BACKEND == "shared":
+        return SharedJobQueue(
+            store,
+            lease_seconds=settings.JOB_LEASE_SECONDS,
+            poll_interval=settings.JOB_QUEUE_POLL_INTERVAL,
+            max_in_flight_per_user=settings.JOB_MAX_IN_FLIGHT_PER_USER,
+        )
+    if settings.JOB_QUEUE_BACKEND == "local":
+        return LocalJobQueue(settings.JOB_MAX_IN_FLIGHT_PER_USER)
+    raise ValueError(f"Unknown job queue backend: {settings.JOB_QUEUE_BACKEND}")
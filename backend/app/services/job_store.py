@@ -0,0 +1,612 @@
+"""
+Durable storage for async analysis jobs
+Persists job state, per-section results and progress so pending work
+survives restarts and deploys
+"""
+
+import asyncio
+import json
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional, Tuple
+
+from ..config import settings
+from .fair_share import FairShare, plan_weight
+
+# Statuses that still need a worker after a restart
+INCOMPLETE_STATUSES = ("pending", "in_progress")
+TERMINAL_STATUSES = ("completed", "failed", "cancelled")
+
+# Pending jobs, plus in-progress jobs whose owner stopped renewing the lease
+CLAIMABLE_SQL = """
+    (status = 'pending'
+     OR (status = 'in_progress'
+         AND (lease_expires_at IS NULL OR lease_expires_at < :now)))
+"""
+
+
+class JobStore:
+    """Base job store: keeps nothing, used when persistence is disabled.
+
+    Records are plain dicts produced by ``AnalysisJob.to_record()``; section
+    results are stored separately so a completed section is one small write.
+    """
+
+    async def open(self):
+        """Prepare the backend for use"""
+
+    async def close(self):
+        """Flush outstanding writes and release resources"""
+
+    def save_job(self, record: Dict[str, Any]):
+        """Queue a write of the job's state (without section results)"""
+
+    def save_section(self, job_id: str, section_key: str, result: Dict[str, Any]):
+        """Queue a write of one completed section"""
+
+    def delete_jobs(self, job_ids: List[str]):
+        """Queue removal of jobs and their sections"""
+
+    async def flush(self):
+        """Write all queued changes"""
+
+    async def delete_expired(self, completed_before: str, failed_before: str) -> int:
+        """Delete terminal jobs last updated before their status's cutoff,
+        including jobs this process no longer (or never) held in memory;
+        returns how many were deleted"""
+        return 0
+
+    async def load(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Load one job record with its section results"""
+        return None
+
+    async def load_incomplete(self) -> List[Dict[str, Any]]:
+        """Load every job that was pending or in progress"""
+        return []
+
+    async def adopt_orphaned(
+        self, owner: str, lease_seconds: float
+    ) -> List[Dict[str, Any]]:
+        """Lease to ``owner`` every unfinished job that no live process
+        holds, and return them"""
+        return await self.load_incomplete()
+
+    async def renew_owned(self, owner: str, lease_seconds: float):
+        """Extend the leases of every unfinished job ``owner`` holds"""
+
+    async def release_owned(self, owner: str):
+        """Drop ``owner``'s leases so its jobs can be adopted right away"""
+
+    async def find_active_job(
+        self, fingerprint: str, created_after: str
+    ) -> Optional[Dict[str, Any]]:
+        """Find a pending or running job submitted since ``created_after``
+        with the given dedup fingerprint"""
+        return None
+
+    @property
+    def supports_leases(self) -> bool:
+        """Whether several processes can share jobs through this store"""
+        return False
+
+
+class SQLiteJobStore(JobStore):
+    """SQLite job store in WAL mode with write-behind batching.
+
+    Writes are coalesced in memory (the latest state per job wins) and
+    committed in a single transaction every ``flush_interval`` seconds, or
+    sooner once ``batch_size`` changes are waiting.
+    """
+
+    def __init__(self, path: str, flush_interval: float = 0.2, batch_size: int = 200):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+
+        self._conn: Optional[sqlite3.Connection] = None
+        self._db_lock = threading.Lock()
+        self._flush_lock = asyncio.Lock()
+        self._flush_needed = asyncio.Event()
+        self._flush_task: Optional[asyncio.Task] = None
+
+        self._pending_jobs: Dict[str, Dict[str, Any]] = {}
+        self._pending_sections: Dict[Tuple[str, str], str] = {}
+        self._pending_deletes: set[str] = set()
+
+    async def open(self):
+        if self._conn is not None:
+            return
+        await asyncio.to_thread(self._connect)
+        self._flush_task = asyncio.create_task(self._flush_loop())
+
+    @property
+    def supports_leases(self) -> bool:
+        return True
+
+    def _connect(self):
+        # Autocommit mode: transactions are opened explicitly so that job
+        # claims can take the write lock up front (BEGIN IMMEDIATE)
+        conn = sqlite3.connect(
+            self.path, check_same_thread=False, isolation_level=None, timeout=10.0
+        )
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS analysis_jobs (
+                id TEXT PRIMARY KEY,
+                user_id TEXT NOT NULL,
+                status TEXT NOT NULL,
+                progress INTEGER NOT NULL,
+                created_at TEXT NOT NULL,
+                updated_at TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                lease_owner TEXT,
+                lease_expires_at REAL
+            );
+            CREATE INDEX IF NOT EXISTS idx_analysis_jobs_status
+                ON analysis_jobs (status, created_at);
+            CREATE INDEX IF NOT EXISTS idx_analysis_jobs_user
+                ON analysis_jobs (user_id, status);
+            CREATE INDEX IF NOT EXISTS idx_analysis_jobs_fingerprint
+                ON analysis_jobs (json_extract(payload, '$.fingerprint'));
+            CREATE TABLE IF NOT EXISTS analysis_job_users (
+                user_id TEXT PRIMARY KEY,
+                vfinish REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS analysis_job_meta (
+                key TEXT PRIMARY KEY,
+                value REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS analysis_job_sections (
+                job_id TEXT NOT NULL,
+                section TEXT NOT NULL,
+                result TEXT NOT NULL,
+                PRIMARY KEY (job_id, section)
+            );
+            """
+        )
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(analysis_jobs)")}
+        if "lease_owner" not in columns:
+            conn.execute("ALTER TABLE analysis_jobs ADD COLUMN lease_owner TEXT")
+            conn.execute("ALTER TABLE analysis_jobs ADD COLUMN lease_expires_at REAL")
+        self._conn = conn
+
+    @contextmanager
+    def _transaction(self):
+        """Hold the database write lock for the duration of the block"""
+        with self._db_lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._conn
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+    async def close(self):
+        if self._flush_task:
+            self._flush_task.cancel()
+            await asyncio.gather(self._flush_task, return_exceptions=True)
+            self._flush_task = None
+        await self.flush()
+        if self._conn is not None:
+            with self._db_lock:
+                self._conn.close()
+            self._conn = None
+
+    def save_job(self, record: Dict[str, Any]):
+        self._pending_jobs[record["id"]] = record
+        self._pending_deletes.discard(record["id"])
+        self._maybe_flush_soon()
+
+    def save_section(self, job_id: str, section_key: str, result: Dict[str, Any]):
+        self._pending_sections[(job_id, section_key)] = json.dumps(result)
+        self._maybe_flush_soon()
+
+    def delete_jobs(self, job_ids: List[str]):
+        for job_id in job_ids:
+            self._pending_jobs.pop(job_id, None)
+            self._pending_deletes.add(job_id)
+        self._pending_sections = {
+            key: value
+            for key, value in self._pending_sections.items()
+            if key[0] not in self._pending_deletes
+        }
+        self._maybe_flush_soon()
+
+    def _maybe_flush_soon(self):
+        pending = (
+            len(self._pending_jobs)
+            + len(self._pending_sections)
+            + len(self._pending_deletes)
+        )
+        if pending >= self.batch_size:
+            self._flush_needed.set()
+
+    async def _flush_loop(self):
+        while True:
+            try:
+                await asyncio.wait_for(
+                    self._flush_needed.wait(), timeout=self.flush_interval
+                )
+            except asyncio.TimeoutError:
+                pass
+            self._flush_needed.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                print(f"Job store flush error: {e}")
+
+    async def flush(self):
+        if self._conn is None:
+            return
+
+        async with self._flush_lock:
+            if not (
+                self._pending_jobs or self._pending_sections or self._pending_deletes
+            ):
+                return
+
+            jobs, self._pending_jobs = self._pending_jobs, {}
+            sections, self._pending_sections = self._pending_sections, {}
+            deletes, self._pending_deletes = self._pending_deletes, set()
+
+            job_rows = [
+                (
+                    r["id"],
+                    r["user_id"],
+                    r["status"],
+                    r["progress"],
+                    r["created_at"],
+                    r["updated_at"],
+                    json.dumps(r["payload"], default=str),
+                    r.get("lease_owner"),
+                    r.get("lease_expires_at"),
+                )
+                for r in jobs.values()
+            ]
+            section_rows = [
+                (job_id, section, result)
+                for (job_id, section), result in sections.items()
+            ]
+            delete_rows = [(job_id,) for job_id in deletes]
+
+            try:
+                await asyncio.to_thread(
+                    self._write_batch, job_rows, section_rows, delete_rows
+                )
+            except Exception:
+                # Put the batch back unless a newer write superseded it
+                for job_id, record in jobs.items():
+                    self._pending_jobs.setdefault(job_id, record)
+                for key, result in sections.items():
+                    self._pending_sections.setdefault(key, result)
+                self._pending_deletes |= deletes
+                raise
+
+    def _write_batch(self, job_rows, section_rows, delete_rows):
+        with self._transaction() as conn:
+            # A job that already reached a terminal state (e.g. cancelled from
+            # another process) is never moved back by a stale buffered write.
+            # Leases are only set on insert; afterwards they change through
+            # claims and renewals
+            conn.executemany(
+                """
+                INSERT INTO analysis_jobs
+                    (id, user_id, status, progress, created_at, updated_at, payload,
+                     lease_owner, lease_expires_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (id) DO UPDATE SET
+                    status = excluded.status,
+                    progress = excluded.progress,
+                    updated_at = excluded.updated_at,
+                    payload = excluded.payload
+                WHERE analysis_jobs.status NOT IN ('completed', 'failed', 'cancelled')
+                """,
+                job_rows,
+            )
+            conn.executemany(
+                """
+                INSERT OR REPLACE INTO analysis_job_sections (job_id, section, result)
+                VALUES (?, ?, ?)
+                """,
+                section_rows,
+            )
+            conn.executemany(
+                "DELETE FROM analysis_job_sections WHERE job_id = ?", delete_rows
+            )
+            conn.executemany("DELETE FROM analysis_jobs WHERE id = ?", delete_rows)
+
+    async def delete_expired(self, completed_before: str, failed_before: str) -> int:
+        await self.flush()
+        return await asyncio.to_thread(
+            self._delete_expired, completed_before, failed_before
+        )
+
+    def _delete_expired(self, completed_before: str, failed_before: str) -> int:
+        expired = """
+            (status = 'completed' AND updated_at < :completed_before)
+            OR (status IN ('failed', 'cancelled') AND updated_at < :failed_before)
+        """
+        params = {"completed_before": completed_before, "failed_before": failed_before}
+        with self._transaction() as conn:
+            conn.execute(
+                "DELETE FROM analysis_job_sections WHERE job_id IN "
+                f"(SELECT id FROM analysis_jobs WHERE {expired})",
+                params,
+            )
+            deleted = conn.execute(
+                f"DELETE FROM analysis_jobs WHERE {expired}", params
+            ).rowcount
+            # Fair-share tags of users with no jobs left, unless they still
+            # run ahead of virtual time (as FairShare.forget_idle)
+            conn.execute(
+                """
+                DELETE FROM analysis_job_users
+                WHERE user_id NOT IN (SELECT user_id FROM analysis_jobs)
+                  AND vfinish <= COALESCE(
+                      (SELECT value FROM analysis_job_meta WHERE key = 'vtime'), 0)
+                """
+            )
+        return deleted
+
+    async def claim_job(
+        self, owner: str, lease_seconds: float, max_in_flight_per_user: int = 0
+    ) -> Optional[Dict[str, Any]]:
+        """Atomically lease the next claimable job to ``owner``.
+
+        A job is claimable when it is pending, or in progress with a lease
+        that has expired because its previous owner died. Users are served
+        in weighted fair-share order (state kept in the database so every
+        process agrees), skipping users already at the in-flight cap.
+        """
+        await self.flush()
+        return await asyncio.to_thread(
+            self._claim_job, owner, lease_seconds, max_in_flight_per_user
+        )
+
+    def _claim_job(
+        self, owner: str, lease_seconds: float, max_in_flight_per_user: int
+    ) -> Optional[Dict[str, Any]]:
+        now = time.time()
+        with self._transaction() as conn:
+            candidates = conn.execute(
+                f"""
+                SELECT j.user_id, MIN(j.created_at),
+                       json_extract(j.payload, '$.plan'),
+                       u.vfinish,
+                       (SELECT COUNT(*) FROM analysis_jobs r
+                        WHERE r.user_id = j.user_id AND r.status = 'in_progress'
+                          AND r.lease_expires_at >= :now)
+                FROM analysis_jobs j
+                LEFT JOIN analysis_job_users u ON u.user_id = j.user_id
+                WHERE {CLAIMABLE_SQL}
+                GROUP BY j.user_id
+                """,
+                {"now": now},
+            ).fetchall()
+            candidates = [
+                c
+                for c in candidates
+                if not max_in_flight_per_user or c[4] < max_in_flight_per_user
+            ]
+            if not candidates:
+                return None
+
+            vtime_row = conn.execute(
+                "SELECT value FROM analysis_job_meta WHERE key = 'vtime'"
+            ).fetchone()
+            fair_share = FairShare(
+                vtime=vtime_row[0] if vtime_row else 0.0,
+                vfinish={c[0]: c[3] for c in candidates if c[3] is not None},
+            )
+            user_id = fair_share.choose((c[0], c[1]) for c in candidates)
+            plan = next(c[2] for c in candidates if c[0] == user_id)
+            vfinish = fair_share.charge(user_id, plan_weight(plan))
+
+            row = conn.execute(
+                f"""
+                UPDATE analysis_jobs
+                SET status = 'in_progress', lease_owner = :owner,
+                    lease_expires_at = :expires
+                WHERE id = (
+                    SELECT id FROM analysis_jobs
+                    WHERE user_id = :user_id AND {CLAIMABLE_SQL}
+                    ORDER BY created_at
+                    LIMIT 1
+                )
+                RETURNING id
+                """,
+                {
+                    "owner": owner,
+                    "expires": now + lease_seconds,
+                    "user_id": user_id,
+                    "now": now,
+                },
+            ).fetchone()
+            conn.execute(
+                "INSERT OR REPLACE INTO analysis_job_users (user_id, vfinish) "
+                "VALUES (?, ?)",
+                (user_id, vfinish),
+            )
+            conn.execute(
+                "INSERT OR REPLACE INTO analysis_job_meta (key, value) "
+                "VALUES ('vtime', ?)",
+                (fair_share.vtime,),
+            )
+
+        records = self._read_jobs("WHERE id = ?", (row[0],))
+        return records[0] if records else None
+
+    async def renew_lease(self, job_id: str, owner: str, lease_seconds: float) -> bool:
+        """Extend a lease; False means the job was cancelled or re-claimed"""
+        return await asyncio.to_thread(self._renew_lease, job_id, owner, lease_seconds)
+
+    def _renew_lease(self, job_id: str, owner: str, lease_seconds: float) -> bool:
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                """
+                UPDATE analysis_jobs SET lease_expires_at = ?
+                WHERE id = ? AND lease_owner = ? AND status = 'in_progress'
+                """,
+                (time.time() + lease_seconds, job_id, owner),
+            )
+            return cursor.rowcount > 0
+
+    async def mark_cancelled(self, job_id: str, user_id: str, updated_at: str) -> bool:
+        """Cancel a job immediately so every process sees it"""
+        await self.flush()
+        return await asyncio.to_thread(
+            self._mark_cancelled, job_id, user_id, updated_at
+        )
+
+    def _mark_cancelled(self, job_id: str, user_id: str, updated_at: str) -> bool:
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                """
+                UPDATE analysis_jobs SET status = 'cancelled', updated_at = ?
+                WHERE id = ? AND user_id = ? AND status IN ('pending', 'in_progress')
+                """,
+                (updated_at, job_id, user_id),
+            )
+            return cursor.rowcount > 0
+
+    async def count_pending(self) -> int:
+        """Count jobs waiting for a worker in any process"""
+        return await asyncio.to_thread(self._count_pending)
+
+    def _count_pending(self) -> int:
+        with self._db_lock:
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM analysis_jobs WHERE status = 'pending'"
+            ).fetchone()[0]
+
+    async def load(self, job_id: str) -> Optional[Dict[str, Any]]:
+        if job_id in self._pending_deletes:
+            return None
+        await self.flush()
+        records = await asyncio.to_thread(self._read_jobs, "WHERE id = ?", (job_id,))
+        return records[0] if records else None
+
+    async def load_incomplete(self) -> List[Dict[str, Any]]:
+        await self.flush()
+        placeholders = ", ".join("?" for _ in INCOMPLETE_STATUSES)
+        return await asyncio.to_thread(
+            self._read_jobs,
+            f"WHERE status IN ({placeholders}) ORDER BY created_at",
+            INCOMPLETE_STATUSES,
+        )
+
+    async def adopt_orphaned(
+        self, owner: str, lease_seconds: float
+    ) -> List[Dict[str, Any]]:
+        """Lease to ``owner`` every unfinished job whose lease is missing or
+        expired, i.e. left by a process that stopped or died.
+
+        Used with per-process queues: each process renews the leases of the
+        jobs it holds, so processes sharing the database never both run a
+        job after one of them restarts.
+        """
+        await self.flush()
+        job_ids = await asyncio.to_thread(self._adopt_orphaned, owner, lease_seconds)
+        if not job_ids:
+            return []
+        placeholders = ", ".join("?" for _ in job_ids)
+        return await asyncio.to_thread(
+            self._read_jobs,
+            f"WHERE id IN ({placeholders}) ORDER BY created_at",
+            tuple(job_ids),
+        )
+
+    def _adopt_orphaned(self, owner: str, lease_seconds: float) -> List[str]:
+        now = time.time()
+        with self._transaction() as conn:
+            rows = conn.execute(
+                """
+                UPDATE analysis_jobs
+                SET lease_owner = :owner, lease_expires_at = :expires
+                WHERE status IN ('pending', 'in_progress')
+                  AND (lease_expires_at IS NULL OR lease_expires_at < :now)
+                RETURNING id
+                """,
+                {"owner": owner, "expires": now + lease_seconds, "now": now},
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    async def renew_owned(self, owner: str, lease_seconds: float):
+        await asyncio.to_thread(self._renew_owned, owner, time.time() + lease_seconds)
+
+    async def release_owned(self, owner: str):
+        await self.flush()
+        await asyncio.to_thread(self._renew_owned, owner, None)
+
+    def _renew_owned(self, owner: str, expires: Optional[float]):
+        with self._transaction() as conn:
+            conn.execute(
+                """
+                UPDATE analysis_jobs SET lease_expires_at = ?
+                WHERE lease_owner = ? AND status IN ('pending', 'in_progress')
+                """,
+                (expires, owner),
+            )
+
+    async def find_active_job(
+        self, fingerprint: str, created_after: str
+    ) -> Optional[Dict[str, Any]]:
+        await self.flush()
+        placeholders = ", ".join("?" for _ in INCOMPLETE_STATUSES)
+        records = await asyncio.to_thread(
+            self._read_jobs,
+            "WHERE json_extract(payload, '$.fingerprint') = ? "
+            f"AND status IN ({placeholders}) AND created_at >= ? "
+            "ORDER BY created_at DESC LIMIT 1",
+            (fingerprint, *INCOMPLETE_STATUSES, created_after),
+        )
+        return records[0] if records else None
+
+    def _read_jobs(self, where: str, params: tuple) -> List[Dict[str, Any]]:
+        with self._db_lock:
+            rows = self._conn.execute(
+                "SELECT id, user_id, status, progress, created_at, updated_at, "
+                f"payload FROM analysis_jobs {where}",
+                params,
+            ).fetchall()
+
+            records = []
+            for row in rows:
+                sections = self._conn.execute(
+                    "SELECT section, result FROM analysis_job_sections "
+                    "WHERE job_id = ?",
+                    (row[0],),
+                ).fetchall()
+                records.append(
+                    {
+                        "id": row[0],
+                        "user_id": row[1],
+                        "status": row[2],
+                        "progress": row[3],
+                        "created_at": row[4],
+                        "updated_at": row[5],
+                        "payload": json.loads(row[6]),
+                        "results": {
+                            section: json.loads(result) for section, result in sections
+                        },
+                    }
+                )
+            return records
+
+
+def create_job_store() -> JobStore:
+    """Create the job store selected by JOB_STORE_BACKEND"""
+    if settings.JOB_STORE_BACKEND == "sqlite":
+        return SQLiteJobStore(
+            settings.JOB_STORE_PATH,
+            flush_interval=settings.JOB_STORE_FLUSH_INTERVAL,
+            batch_size=settings.JOB_STORE_BATCH_SIZE,
+        )
+    if settings.JOB_STORE_BACKEND == "memory":
+        return JobStore()
+    raise ValueError(f"Unknown job store backend: {settings.JOB_STORE_BACKEND}")
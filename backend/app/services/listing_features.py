@@ -0,0 +1,361 @@
+"""
+Structured features from free-text listing descriptions
+Matching is two-stage, like a multi-pattern prefilter: one pass of a
+keyword regex over the lowercased text finds the few places a feature can
+be mentioned (every pattern contains one of its keywords), and one
+compiled regex alternating over all feature patterns then runs only
+around those places; the outer named group of each match says which
+feature it is. Results are cached by a hash of the description, since
+the same listing text is analyzed repeatedly (previews, retries, the
+sections of one job)
+"""
+
+import hashlib
+import re
+from collections import OrderedDict
+from datetime import date
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from ..config import settings
+
+_NUMBER_WORDS = {
+    "one": 1,
+    "two": 2,
+    "three": 3,
+    "four": 4,
+    "five": 5,
+    "six": 6,
+    "seven": 7,
+    "eight": 8,
+    "nine": 9,
+    "ten": 10,
+}
+_NUMBER = r"(?:\d{1,2}|one|two|three|four|five|six|seven|eight|nine|ten)"
+_YEAR = r"(?:19|20)\d{2}"
+_AMOUNT = r"\d[\d,]*(?:\.\d+)?"
+_PERIOD = r"monthly|month|mo|yearly|year|yr|annually|annual|annum|quarterly|quarter|qtr"
+_HVAC = r"(?:hvac|furnace|a/?c\b|air[- ]condition(?:ing|er)?|heat\s+pump)"
+_REMODELED = r"(?:renovated|remodeled|updated|new|gourmet|modern)"
+
+# (group name, pattern); group names inside patterns must be unique too.
+# Where two patterns can start at the same position, the first one wins.
+_PATTERNS: List[Tuple[str, str]] = [
+    ("no_hoa", r"\bno\s+(?:hoa|association\s+(?:fees?|dues))\b"),
+    (
+        "hoa",
+        rf"\b(?:hoa|association)(?:\s+(?:fees?|dues))?\s*(?:of|is|are|:|=)?\s*"
+        rf"(?:only\s+)?\$\s?(?P<hoa_amount>{_AMOUNT})"
+        rf"(?:\s*(?:/|per|a|an)?\s*(?P<hoa_period>{_PERIOD})\b)?",
+    ),
+    (
+        "hoa_after",
+        rf"\$\s?(?P<hoa_amount_after>{_AMOUNT})\s*(?:/|per|a|an)?\s*"
+        rf"(?P<hoa_period_after>{_PERIOD})\s+(?:hoa|association)\b",
+    ),
+    ("roof_new", r"\b(?:brand[- ])?new\s+roof\b"),
+    (
+        "roof_year",
+        rf"\broof\s+(?:was\s+)?(?:replaced|installed|redone|updated|new)\s+"
+        rf"(?:in\s+)?(?P<roof_year_value>{_YEAR})\b",
+    ),
+    ("roof_year_before", rf"\b(?P<roof_year_before_value>{_YEAR})\s+roof\b"),
+    (
+        "roof_age",
+        rf"\broof\s+(?:is\s+)?(?:only\s+)?(?P<roof_age_value>{_NUMBER})\s+"
+        rf"(?:years?|yrs?)\s+old\b",
+    ),
+    (
+        "roof_age_before",
+        rf"\b(?P<roof_age_before_value>{_NUMBER})[- ](?:years?|yrs?)[- ]old\s+roof\b",
+    ),
+    ("hvac_new", rf"\b(?:brand[- ])?new\s+{_HVAC}"),
+    (
+        "hvac_year",
+        rf"\b{_HVAC}\s+(?:was\s+)?(?:replaced|installed|updated|new)\s+"
+        rf"(?:in\s+)?(?P<hvac_year_value>{_YEAR})\b",
+    ),
+    ("hvac_year_before", rf"\b(?P<hvac_year_before_value>{_YEAR})\s+{_HVAC}"),
+    (
+        "hvac_age",
+        rf"\b{_HVAC}\s+(?:is\s+)?(?:only\s+)?(?P<hvac_age_value>{_NUMBER})\s+"
+        rf"(?:years?|yrs?)\s+old\b",
+    ),
+    (
+        "hvac_age_before",
+        rf"\b(?P<hvac_age_before_value>{_NUMBER})[- ](?:years?|yrs?)[- ]old\s+{_HVAC}",
+    ),
+    ("no_garage", r"\bno\s+garage\b"),
+    (
+        "garage_spaces",
+        rf"\b(?P<garage_count>{_NUMBER})[- ](?:car|stall)\s+"
+        rf"(?:attached\s+|detached\s+|oversized\s+)?garage\b",
+    ),
+    ("garage", r"\bgarage\b"),
+    ("community_pool", r"\b(?:community|shared|neighborhood)\s+pool\b"),
+    ("no_pool", r"\bno\s+pool\b"),
+    ("pool", r"\bpool\b(?!\s+table)"),
+    (
+        "as_is",
+        # "as is" alone is ordinary prose ("such as is typical")
+        r"\b(?:sold|sells|selling|offered|conveys|conveyed)\s+(?:strictly\s+)?"
+        r"as[- ]is\b|\bas[- ]is\s+(?:condition|sale|basis)\b|\bas[- ]is,?\s+where[- ]is\b"
+        r"|\b(?:investor|handyman)\s+special\b"
+        r"|\bfixer[- ]upper\b|\bneeds\s+(?:tlc|work)\b",
+    ),
+    ("not_flood_zone", r"\bnot\s+in\s+(?:a\s+)?flood\s*(?:zone|plain)\b"),
+    ("flood_zone", r"\bflood\s*(?:zone|plain|insurance)\b"),
+    (
+        "renovated_kitchen",
+        rf"\b{_REMODELED}\s+kitchen\b"
+        r"|\bkitchen\s+(?:was\s+|has\s+been\s+)?(?:fully\s+)?(?:renovated|remodeled|updated)\b",
+    ),
+    (
+        "renovated_bathroom",
+        rf"\b{_REMODELED}\s+bath(?:room)?s?\b"
+        r"|\bbath(?:room)?s?\s+(?:were\s+|was\s+|have\s+been\s+)?(?:fully\s+)?"
+        r"(?:renovated|remodeled|updated)\b",
+    ),
+    ("finished_basement", r"\bfinished\s+basement\b"),
+    ("solar", r"\bsolar(?:\s+panels?)?\b"),
+    (
+        "foundation_issues",
+        r"\bfoundation\s+(?:issues?|problems?|repairs?|cracks?|settling)\b"
+        r"|\bcracked\s+foundation\b",
+    ),
+]
+
+_MATCHER = re.compile(
+    "|".join(f"(?P<{name}>{pattern})" for name, pattern in _PATTERNS), re.IGNORECASE
+)
+
+# Every pattern above contains one of these keywords; a literal
+# alternation after \b lets the regex engine skip quickly to candidates
+_KEYWORDS = re.compile(
+    r"\b(?:hoa|association|roof|hvac|furnace|a/?c\b|air[- ]condition|heat\s+pump"
+    r"|garage|pool|as[- ]is|special|fixer|tlc|needs\s+work|flood|kitchen|bath"
+    r"|basement|solar|foundation)"
+)
+# How far a feature mention reaches before and after its keyword. A window
+# end is moved on to the end of its sentence (or at least of the token it
+# cuts), so a period or other qualifier just past it is not lost
+_BEFORE, _AFTER = 48, 64
+_SENTENCE_END = re.compile(r"[.!?;]\s|\n")
+_TOKEN_END = re.compile(r"\S*")
+
+_MONTHS_PER_PERIOD = {
+    "monthly": 1,
+    "month": 1,
+    "mo": 1,
+    "quarterly": 3,
+    "quarter": 3,
+    "qtr": 3,
+    "yearly": 12,
+    "year": 12,
+    "yr": 12,
+    "annually": 12,
+    "annual": 12,
+    "annum": 12,
+}
+
+
+def _candidate_spans(text: str) -> Iterator[Tuple[int, int]]:
+    """Merged windows around keyword hits, in order"""
+    lowered = text.lower()
+    if len(lowered) != len(text):  # Case folding moved offsets: scan it all
+        yield 0, len(text)
+        return
+    start = end = -1
+    for hit in _KEYWORDS.finditer(lowered):
+        window_start = max(hit.start() - _BEFORE, 0)
+        if window_start > end:
+            if end >= 0:
+                yield start, end
+            start = window_start
+        end = _window_end(text, hit.end() + _AFTER)
+    if end >= 0:
+        yield start, end
+
+
+def _window_end(text: str, end: int) -> int:
+    """``end`` moved to the next sentence boundary, looking at most _AFTER
+    characters further, or else to the end of the token it falls in"""
+    if end + _AFTER >= len(text):
+        boundary = _SENTENCE_END.search(text, min(end, len(text)))
+        return boundary.start() + 1 if boundary else len(text)
+    boundary = _SENTENCE_END.search(text, end, end + _AFTER)
+    if boundary:
+        return boundary.start() + 1
+    return _TOKEN_END.match(text, end).end()
+
+
+def _number(text: str) -> int:
+    text = text.lower()
+    return _NUMBER_WORDS[text] if text in _NUMBER_WORDS else int(text)
+
+
+def _monthly(amount: str, period: Optional[str]) -> float:
+    months = _MONTHS_PER_PERIOD.get((period or "month").lower(), 1)
+    return round(float(amount.replace(",", "")) / months, 2)
+
+
+def _age_since(year: str) -> Optional[int]:
+    age = date.today().year - int(year)
+    return age if age >= 0 else None
+
+
+# group name -> (feature, value from the match)
+_HANDLERS: Dict[str, Tuple[str, Callable[[re.Match], Any]]] = {
+    "no_hoa": ("hoa_monthly", lambda m: 0.0),
+    "hoa": ("hoa_monthly", lambda m: _monthly(m["hoa_amount"], m["hoa_period"])),
+    "hoa_after": (
+        "hoa_monthly",
+        lambda m: _monthly(m["hoa_amount_after"], m["hoa_period_after"]),
+    ),
+    "roof_new": ("roof_age", lambda m: 0),
+    "roof_year": ("roof_age", lambda m: _age_since(m["roof_year_value"])),
+    "roof_year_before": ("roof_age", lambda m: _age_since(m["roof_year_before_value"])),
+    "roof_age": ("roof_age", lambda m: _number(m["roof_age_value"])),
+    "roof_age_before": ("roof_age", lambda m: _number(m["roof_age_before_value"])),
+    "hvac_new": ("hvac_age", lambda m: 0),
+    "hvac_year": ("hvac_age", lambda m: _age_since(m["hvac_year_value"])),
+    "hvac_year_before": ("hvac_age", lambda m: _age_since(m["hvac_year_before_value"])),
+    "hvac_age": ("hvac_age", lambda m: _number(m["hvac_age_value"])),
+    "hvac_age_before": ("hvac_age", lambda m: _number(m["hvac_age_before_value"])),
+    "no_garage": ("garage_spaces", lambda m: 0),
+    "garage_spaces": ("garage_spaces", lambda m: _number(m["garage_count"])),
+    "garage": ("garage_spaces", lambda m: 1),
+    "community_pool": ("community_pool", lambda m: True),
+    "no_pool": ("pool", lambda m: False),
+    "pool": ("pool", lambda m: True),
+    "as_is": ("as_is", lambda m: True),
+    "not_flood_zone": ("flood_zone", lambda m: False),
+    "flood_zone": ("flood_zone", lambda m: True),
+    "renovated_kitchen": ("renovated_kitchen", lambda m: True),
+    "renovated_bathroom": ("renovated_bathroom", lambda m: True),
+    "finished_basement": ("finished_basement", lambda m: True),
+    "solar": ("solar", lambda m: True),
+    "foundation_issues": ("foundation_issues", lambda m: True),
+}
+
+# Features whose most specific mention wins over a vaguer one (a "2-car
+# garage" over a later bare "garage", a flood zone over "not in a flood
+# plain" elsewhere), rather than simply the last mention
+_PREFER_LARGEST = {"garage_spaces", "flood_zone", "pool"}
+
+
+def extract_features(text: Optional[str]) -> Dict[str, Any]:
+    """Features mentioned in a description; None (or False) where it is silent.
+
+    Ages are in years, HOA fees are monthly.
+    """
+    features: Dict[str, Any] = {
+        "hoa_monthly": None,
+        "roof_age": None,
+        "hvac_age": None,
+        "garage_spaces": None,
+        "pool": None,
+        "community_pool": False,
+        "as_is": False,
+        "flood_zone": None,
+        "renovated_kitchen": False,
+        "renovated_bathroom": False,
+        "finished_basement": False,
+        "solar": False,
+        "foundation_issues": False,
+    }
+    if not text:
+        return features
+
+    matches = (
+        match
+        for start, end in _candidate_spans(text)
+        for match in _MATCHER.finditer(text, start, end)
+    )
+    for match in matches:
+        feature, value = _HANDLERS[match.lastgroup]
+        value = value(match)
+        if value is None:
+            continue
+        current = features[feature]
+        if feature in _PREFER_LARGEST and current is not None:
+            value = max(current, value)
+        features[feature] = value
+    return features
+
+
+def describe_features(features: Dict[str, Any]) -> List[str]:
+    """Short phrases for the features that were found, for prompts"""
+    phrases = []
+    if features["hoa_monthly"] is not None:
+        phrases.append(
+            f"HOA ${features['hoa_monthly']:,.0f}/month"
+            if features["hoa_monthly"]
+            else "no HOA"
+        )
+    for name in ("roof", "hvac"):
+        age = features[f"{name}_age"]
+        if age is not None:
+            label = "HVAC" if name == "hvac" else name
+            phrases.append(f"new {label}" if age == 0 else f"{label} {age} years old")
+    if features["garage_spaces"] is not None:
+        spaces = features["garage_spaces"]
+        phrases.append(f"{spaces}-car garage" if spaces else "no garage")
+    if features["pool"] is not None:
+        phrases.append("pool" if features["pool"] else "no pool")
+    if features["flood_zone"] is not None:
+        phrases.append(
+            "in a flood zone" if features["flood_zone"] else "not in a flood zone"
+        )
+    labels = {
+        "community_pool": "community pool",
+        "as_is": "sold as-is",
+        "renovated_kitchen": "renovated kitchen",
+        "renovated_bathroom": "renovated bathroom",
+        "finished_basement": "finished basement",
+        "solar": "solar",
+        "foundation_issues": "foundation issues",
+    }
+    phrases.extend(label for name, label in labels.items() if features[name])
+    return phrases
+
+
+class FeatureExtractor:
+    """``extract_features`` with an LRU cache keyed by description hash.
+
+    Keys are 16-byte digests, so the cache never holds description text.
+    Callers get their own copy of the cached features.
+    """
+
+    def __init__(self, max_entries: int = 10000):
+        self.max_entries = max_entries
+        self._cache: OrderedDict[bytes, Dict[str, Any]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def extract(self, text: Optional[str]) -> Dict[str, Any]:
+        if not text:
+            return extract_features(text)
+        key = hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+        features = self._cache.get(key)
+        if features is not None:
+            self._cache.move_to_end(key)
+            self.hits += 1
+            return dict(features)
+
+        self.misses += 1
+        features = extract_features(text)
+        self._cache[key] = features
+        if len(self._cache) > self.max_entries:
+            self._cache.popitem(last=False)
+        return dict(features)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "entries": len(self._cache),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+# Global instance
+feature_extractor = FeatureExtractor(settings.LISTING_FEATURE_CACHE_SIZE)
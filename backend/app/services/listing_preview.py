@@ -0,0 +1,99 @@
+"""
+Instant listing preview computed from the manual property data
+Deterministic figures (price per square foot, age, room ratios, which
+fields were provided and the features named in the description) that
+need no LLM, so they are ready microseconds
+after a request arrives and are shown while the generated sections load
+"""
+
+import re
+from datetime import date
+from typing import Any, Dict, Optional
+
+from ..models import ManualPropertyData
+from .listing_features import feature_extractor
+
+# Fields that make the analysis more specific when provided
+PREVIEW_FIELDS = (
+    "price",
+    "square_feet",
+    "bedrooms",
+    "bathrooms",
+    "year_built",
+    "property_type",
+    "lot_size",
+    "location_details",
+    "listing_description",
+)
+
+_PRICE = re.compile(
+    r"(?P<dollar>\$\s*)?(?P<amount>\d[\d,]*(?:\.\d+)?)"
+    r"(?:\s*(?P<word>thousand|million|billion)|\s?(?P<letter>mm|k|m|b))?(?![a-z])"
+    # A rate ("$3,200/mo", "$250 per month") is rent or a fee, not a price
+    r"(?P<period>\s*(?:/|per\b|an?\b)\s*(?:mo|month|wk|week|yr|year|annum)s?\b"
+    r"|\s*(?:monthly|weekly|yearly|annually)\b)?",
+    re.IGNORECASE,
+)
+_MULTIPLIERS = {
+    "k": 1e3,
+    "thousand": 1e3,
+    "m": 1e6,
+    "mm": 1e6,
+    "million": 1e6,
+    "b": 1e9,
+    "billion": 1e9,
+}
+
+
+def parse_price(text: Optional[str]) -> Optional[float]:
+    """Purchase price in a price string: "$450,000", "450k", "$1.2 million".
+
+    The first dollar amount wins; without one, the largest bare amount
+    (so "2 bed 300k" is 300,000). Amounts per period are skipped.
+    """
+    if not text:
+        return None
+    dollars, bare = [], []
+    for match in _PRICE.finditer(text):
+        if match["period"]:
+            continue
+        scale = (match["word"] or match["letter"] or "").lower()
+        amount = float(match["amount"].replace(",", "")) * _MULTIPLIERS.get(scale, 1)
+        if amount:
+            (dollars if match["dollar"] else bare).append(amount)
+    if dollars:
+        return dollars[0]
+    return max(bare, default=None)
+
+
+def _ratio(numerator: Optional[float], denominator: Optional[float], digits: int):
+    if not numerator or not denominator:
+        return None
+    return round(numerator / denominator, digits)
+
+
+def compute_preview(
+    manual_data: Optional[ManualPropertyData], today: Optional[date] = None
+) -> Dict[str, Any]:
+    """Locally derived figures for a listing; missing inputs give None"""
+    data = manual_data or ManualPropertyData()
+    year = (today or date.today()).year
+
+    price = parse_price(data.price)
+    property_age = None
+    if data.year_built and 1600 <= data.year_built <= year + 2:
+        property_age = max(year - data.year_built, 0)
+
+    fields_provided = {name: bool(getattr(data, name)) for name in PREVIEW_FIELDS}
+    return {
+        "price": price,
+        "price_per_sqft": _ratio(price, data.square_feet, 2),
+        "property_age": property_age,
+        "bed_bath_ratio": _ratio(data.bedrooms, data.bathrooms, 2),
+        "sqft_per_bedroom": _ratio(data.square_feet, data.bedrooms, 1),
+        "completeness": round(
+            100 * sum(fields_provided.values()) / len(fields_provided)
+        ),
+        "fields_provided": fields_provided,
+        "features": feature_extractor.extract(data.listing_description),
+    }
@@ -0,0 +1,88 @@
+"""
+Cancellation accounting for LLM generations
+Tracks how far each generation got so that abandoned requests (cancelled
+jobs, disconnected clients, expired deadlines) can report the tokens and
+seconds of backend work they saved
+"""
+
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+
+class CancelReason:
+    """Messages passed to ``Task.cancel`` to say why LLM work was dropped"""
+
+    JOB_CANCELLED = "job_cancelled"
+    CLIENT_DISCONNECTED = "client_disconnected"
+    DEADLINE = "deadline"
+    SHUTDOWN = "shutdown"
+    OTHER = "cancelled"
+
+
+@dataclass(slots=True)
+class GenerationProgress:
+    """How far one generation has streamed"""
+
+    started_at: Optional[float] = None  # None while waiting for a slot
+    tokens: int = 0
+
+    def start(self):
+        self.started_at = time.monotonic()
+
+    def add_token(self):
+        self.tokens += 1
+
+
+class CancellationStats:
+    """Aggregate work saved by cancelling generations early"""
+
+    def __init__(self, alpha: float = 0.2):
+        self.alpha = alpha
+        self.seconds_per_token: Optional[float] = None
+        self.cancelled: Dict[str, int] = {}
+        self.tokens_saved = 0
+        self.seconds_saved = 0.0
+
+    def record_completed(self, progress: GenerationProgress):
+        """Learn the per-token generation time from finished streams"""
+        if progress.started_at is None or not progress.tokens:
+            return
+        rate = (time.monotonic() - progress.started_at) / progress.tokens
+        if self.seconds_per_token is None:
+            self.seconds_per_token = rate
+        else:
+            self.seconds_per_token += self.alpha * (rate - self.seconds_per_token)
+
+    def record_cancelled(
+        self, reason: str, progress: GenerationProgress, max_tokens: int
+    ) -> Dict[str, Any]:
+        """Account for a generation abandoned after ``progress.tokens``"""
+        tokens_saved = max(max_tokens - progress.tokens, 0)
+        seconds_saved = tokens_saved * (self.seconds_per_token or 0.0)
+
+        self.cancelled[reason] = self.cancelled.get(reason, 0) + 1
+        self.tokens_saved += tokens_saved
+        self.seconds_saved += seconds_saved
+
+        return {
+            "reason": reason,
+            "started": progress.started_at is not None,
+            "tokens_generated": progress.tokens,
+            "tokens_saved": tokens_saved,
+            "seconds_saved": round(seconds_saved, 2),
+        }
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "cancelled": dict(self.cancelled),
+            "tokens_saved": self.tokens_saved,
+            "seconds_saved": round(self.seconds_saved, 1),
+            "seconds_per_token": round(self.seconds_per_token, 4)
+            if self.seconds_per_token
+            else None,
+        }
+
+
+# Global cancellation statistics for this process
+cancellation_stats = CancellationStats()
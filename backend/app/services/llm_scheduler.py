@@ -0,0 +1,161 @@
+"""
+Global scheduler for LLM backend calls
+Bounds concurrent generations and hands out slots by priority class so
+background jobs never make interactive users wait
+"""
+
+import asyncio
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from enum import IntEnum
+from typing import Any, Deque, Dict, Tuple
+
+from ..config import settings
+
+
+class LLMPriority(IntEnum):
+    """Priority classes, lower value is served first"""
+
+    INTERACTIVE_STREAMING = 0
+    INTERACTIVE_BLOCKING = 1
+    BACKGROUND = 2
+
+
+class _ClassMetrics:
+    """Queue-time metrics for one priority class"""
+
+    def __init__(self, window: int = 1000):
+        self.granted = 0
+        self.promoted = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.recent_waits: Deque[float] = deque(maxlen=window)
+
+    def record(self, wait: float, promoted: bool):
+        self.granted += 1
+        self.promoted += int(promoted)
+        self.total_wait += wait
+        self.max_wait = max(self.max_wait, wait)
+        self.recent_waits.append(wait)
+
+    def snapshot(self, queued: int) -> Dict[str, Any]:
+        waits = sorted(self.recent_waits)
+
+        def percentile(p: float) -> float:
+            if not waits:
+                return 0.0
+            return waits[min(len(waits) - 1, int(p * len(waits)))]
+
+        return {
+            "queued": queued,
+            "granted": self.granted,
+            "promoted": self.promoted,
+            "avg_wait_ms": round(self.total_wait / self.granted * 1000, 1)
+            if self.granted
+            else 0.0,
+            "p50_wait_ms": round(percentile(0.50) * 1000, 1),
+            "p95_wait_ms": round(percentile(0.95) * 1000, 1),
+            "max_wait_ms": round(self.max_wait * 1000, 1),
+        }
+
+
+class LLMScheduler:
+    """Priority scheduler with aging-based starvation protection"""
+
+    def __init__(self, max_concurrency: int = 8, starvation_seconds: float = 15.0):
+        self.max_concurrency = max_concurrency
+        self.starvation_seconds = starvation_seconds
+        self.active = 0
+        self.waiters: Dict[LLMPriority, Deque[Tuple[float, asyncio.Future]]] = {
+            priority: deque() for priority in LLMPriority
+        }
+        self.metrics = {priority: _ClassMetrics() for priority in LLMPriority}
+
+    @asynccontextmanager
+    async def slot(self, priority: LLMPriority):
+        """Hold one backend slot for the duration of the block"""
+        await self.acquire(priority)
+        try:
+            yield
+        finally:
+            self.release()
+
+    async def acquire(self, priority: LLMPriority):
+        """Wait until a slot is granted to this priority class"""
+        if self.active < self.max_concurrency and not self._has_waiters():
+            self.active += 1
+            self.metrics[priority].record(0.0, promoted=False)
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        entry = (time.monotonic(), future)
+        self.waiters[priority].append(entry)
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # Granted just as we were cancelled: hand the slot on
+                self.release()
+            elif entry in self.waiters[priority]:
+                self.waiters[priority].remove(entry)
+            raise
+
+    def release(self):
+        """Return a slot and grant it to the next waiter"""
+        self.active -= 1
+        self._dispatch()
+
+    def is_saturated(self) -> bool:
+        """Every slot is taken and requests are queueing"""
+        return self.active >= self.max_concurrency and self._has_waiters()
+
+    def _has_waiters(self) -> bool:
+        return any(self.waiters.values())
+
+    def _dispatch(self):
+        while self.active < self.max_concurrency and self._has_waiters():
+            priority, promoted = self._next_priority()
+            enqueued_at, future = self.waiters[priority].popleft()
+            if future.done():
+                continue
+            self.active += 1
+            self.metrics[priority].record(
+                time.monotonic() - enqueued_at, promoted=promoted
+            )
+            future.set_result(None)
+
+    def _next_priority(self) -> Tuple[LLMPriority, bool]:
+        """Pick the class to serve: any class starved past the threshold
+        goes first (oldest head wins), otherwise strict priority order"""
+        now = time.monotonic()
+        starved = [
+            (queue[0][0], priority)
+            for priority, queue in self.waiters.items()
+            if queue and now - queue[0][0] >= self.starvation_seconds
+        ]
+        highest = min(p for p, queue in self.waiters.items() if queue)
+        if starved:
+            priority = min(starved)[1]
+            return priority, priority != highest
+        return highest, False
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get per-class queue-time metrics"""
+        return {
+            "max_concurrency": self.max_concurrency,
+            "active": self.active,
+            "classes": {
+                priority.name.lower(): self.metrics[priority].snapshot(
+                    len(self.waiters[priority])
+                )
+                for priority in LLMPriority
+            },
+        }
+
+
+# Global scheduler shared by every LLM call in this process
+llm_scheduler = LLMScheduler(
+    max_concurrency=settings.LLM_MAX_CONCURRENCY,
+    starvation_seconds=settings.LLM_STARVATION_SECONDS,
+)
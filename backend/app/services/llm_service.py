@@ -3,12 +3,18 @@ LLM Service for ListingIQ
 Supports both Ollama (dev) and OpenAI (prod) based on environment configuration
 """
 
+import asyncio
 import os
 import json
 from typing import Dict, Any, Optional
 import openai
-import ollama
 from enum import Enum
+from .llm_cancellation import CancelReason, GenerationProgress, cancellation_stats
+from .llm_scheduler import LLMPriority, llm_scheduler
+from .ollama_pool import ollama_pool
+
+# Upper bound on generated tokens per section
+MAX_TOKENS = 800
 
 
 class LLMProvider(Enum):
@@ -24,12 +30,10 @@ class LLMService:
         self.model = self._get_model()
         self.environment = self._get_environment_info()
 
-        # Initialize clients based on provider
+        # Initialize clients based on provider; Ollama clients are owned by
+        # ollama_pool and shared across services
         if self.provider == LLMProvider.OPENAI:
             self.openai_client = openai.AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-        elif self.provider == LLMProvider.OLLAMA:
-            # Ollama client is synchronous, we'll handle async in the methods
-            pass
 
         print(
             f"{self.environment} - Using {self.provider.value.upper()} with model: {self.model}"
@@ -82,26 +86,55 @@ class LLMService:
         else:
             return "🔧 DEVELOPMENT"
 
-    async def generate_analysis(self, prompt: str) -> Optional[Dict[str, Any]]:
-        """Generate property analysis using the configured LLM provider"""
+    async def generate_analysis(
+        self,
+        prompt: str,
+        priority: LLMPriority = LLMPriority.INTERACTIVE_BLOCKING,
+        timeout: Optional[float] = None,
+    ) -> Optional[Dict[str, Any]]:
+        """Generate property analysis using the configured LLM provider.
+
+        Every call waits for a slot from the global scheduler, so
+        interactive requests are served ahead of background jobs.
+        Responses are streamed: cancelling the calling task (pass a
+        ``CancelReason`` to ``Task.cancel``) or hitting ``timeout`` aborts
+        the provider request instead of letting it run to completion.
+        """
         print(f"🤖 Starting LLM generation with {self.provider.value}")
+        progress = GenerationProgress()
         try:
-            if self.provider == LLMProvider.OPENAI:
-                result = await self._generate_openai(prompt)
-                print(f"🤖 OpenAI result: {result}")
-                return result
-            elif self.provider == LLMProvider.OLLAMA:
-                result = await self._generate_ollama(prompt)
-                print(f"🤖 Ollama result: {result}")
-                return result
+            async with asyncio.timeout(timeout):
+                async with llm_scheduler.slot(priority):
+                    progress.start()
+                    if self.provider == LLMProvider.OPENAI:
+                        result = await self._generate_openai(prompt, progress)
+                        print(f"🤖 OpenAI result: {result}")
+                    else:
+                        result = await self._generate_ollama(prompt, progress)
+                        print(f"🤖 Ollama result: {result}")
+            cancellation_stats.record_completed(progress)
+            return result
+        except TimeoutError:
+            saved = cancellation_stats.record_cancelled(
+                CancelReason.DEADLINE, progress, MAX_TOKENS
+            )
+            print(f"⏱️ LLM generation deadline expired: {saved}")
+            return None
+        except asyncio.CancelledError as e:
+            reason = e.args[0] if e.args else CancelReason.OTHER
+            saved = cancellation_stats.record_cancelled(reason, progress, MAX_TOKENS)
+            print(f"🛑 LLM generation cancelled: {saved}")
+            raise
         except Exception as e:
             print(f"❌ LLM generation error ({self.provider.value}): {e}")
             return None
 
-    async def _generate_openai(self, prompt: str) -> Optional[Dict[str, Any]]:
+    async def _generate_openai(
+        self, prompt: str, progress: GenerationProgress
+    ) -> Optional[Dict[str, Any]]:
         """Generate analysis using OpenAI"""
         try:
-            response = await self.openai_client.chat.completions.create(
+            stream = await self.openai_client.chat.completions.create(
                 model=self.model,
                 messages=[
                     {
@@ -111,52 +144,75 @@ class LLMService:
                     {"role": "user", "content": prompt},
                 ],
                 temperature=0.2,  # Lower temperature for faster, more consistent responses
-                max_tokens=800,  # Further reduced for faster response
+                max_tokens=MAX_TOKENS,  # Further reduced for faster response
                 timeout=15,  # Reduced timeout for faster failure
+                stream=True,
             )
 
-            analysis_text = response.choices[0].message.content.strip()
+            parts = []
+            try:
+                async for chunk in stream:
+                    if chunk.choices and chunk.choices[0].delta.content:
+                        parts.append(chunk.choices[0].delta.content)
+                        progress.add_token()
+            finally:
+                # Closing the stream aborts the request if we were cancelled
+                await stream.close()
+
+            analysis_text = "".join(parts).strip()
             return self._parse_json_response(analysis_text)
 
         except Exception as e:
             print(f"❌ OpenAI API error: {e}")
             return None
 
-    async def _generate_ollama(self, prompt: str) -> Optional[Dict[str, Any]]:
+    async def _generate_ollama(
+        self, prompt: str, progress: GenerationProgress
+    ) -> Optional[Dict[str, Any]]:
         """Generate analysis using Ollama"""
         try:
-            # Ollama is synchronous, so we run it in a thread
-            import asyncio
-
-            def _ollama_generate():
-                response = ollama.chat(
-                    model=self.model,
-                    messages=[
-                        {
-                            "role": "system",
-                            "content": "You are an expert real estate analyst. Provide concise, actionable insights. Focus on key points only.",
-                        },
-                        {"role": "user", "content": prompt},
-                    ],
-                    options={
-                        "temperature": 0.2,  # Lower temperature for faster responses
-                        "num_predict": 800,  # Further reduced for faster response
-                        "num_ctx": 2048,  # Reduced context window for speed
-                    },
+            messages = [
+                {
+                    "role": "system",
+                    "content": "You are an expert real estate analyst. Provide concise, actionable insights. Focus on key points only.",
+                },
+                {"role": "user", "content": prompt},
+            ]
+            options = {
+                "temperature": 0.2,  # Lower temperature for faster responses
+                "num_predict": MAX_TOKENS,  # Further reduced for faster response
+                "num_ctx": 2048,  # Reduced context window for speed
+            }
+
+            if ollama_pool.is_configured():
+                # Multiple hosts: let the pool pick the least loaded one
+                analysis_text = await ollama_pool.chat(
+                    self.model, messages, options, progress
                 )
-                return response["message"]["content"]
+                return self._parse_json_response(analysis_text)
 
-            # Run in thread pool to avoid blocking
-            loop = asyncio.get_event_loop()
-            analysis_text = await loop.run_in_executor(None, _ollama_generate)
+            # Shared async client: cancelling a request closes its HTTP stream
+            # without tearing down the connection pool other jobs use
+            stream = await ollama_pool.default_client.chat(
+                model=self.model, messages=messages, options=options, stream=True
+            )
+            parts = []
+            try:
+                async for part in stream:
+                    parts.append(part["message"]["content"])
+                    progress.add_token()
+            finally:
+                # Closing the stream aborts generation if we were cancelled
+                await stream.aclose()
 
-            return self._parse_json_response(analysis_text)
+            return self._parse_json_response("".join(parts))
 
         except Exception as e:
             print(f"❌ Ollama API error: {e}")
             return None
 
-    def _parse_json_response(self, analysis_text: str) -> Optional[Dict[str, Any]]:
+    @staticmethod
+    def _parse_json_response(analysis_text: str) -> Optional[Dict[str, Any]]:
         """Parse JSON from LLM response with improved error handling"""
         try:
             # Clean the response text
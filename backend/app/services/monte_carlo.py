@@ -0,0 +1,227 @@
+"""
+Monte Carlo ROI simulation for listings
+Where the investment math gives point estimates, this simulates thousands
+of holding periods with uncertain appreciation, rent growth, vacancy,
+expense growth and mortgage rate, and reports percentile bands. Each
+listing's paths are simulated as whole arrays in a worker process, so a
+batch spreads over the CPU cores and the event loop never runs the math
+"""
+
+import asyncio
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from ..config import settings
+from .investment_math import InvestmentAssumptions, monthly_payment, remaining_balance
+
+PERCENTILES = (5, 25, 50, 75, 95)
+
+
+@dataclass(frozen=True, slots=True)
+class SimulationParams:
+    """Uncertainty of each input; means come from InvestmentAssumptions.
+    All figures are annual fractions."""
+
+    years: int = 10
+    paths: int = 20_000
+    appreciation_volatility: float = 0.05
+    rent_growth: float = 0.03
+    rent_growth_volatility: float = 0.03
+    rent_appreciation_correlation: float = 0.5
+    vacancy_volatility: float = 0.03
+    expense_growth: float = 0.03
+    expense_growth_volatility: float = 0.02
+    rate_volatility: float = 0.0075  # Spread of the rate locked at purchase
+
+
+def _bands(values: np.ndarray) -> Dict[str, List[float]]:
+    """Per-year percentiles of a (paths, years) array"""
+    levels = np.percentile(values, PERCENTILES, axis=0)
+    return {
+        f"p{p}": np.round(level, 2).tolist() for p, level in zip(PERCENTILES, levels)
+    }
+
+
+def _grown(start, growth: np.ndarray) -> np.ndarray:
+    """Yearly levels that start at ``start`` and then compound ``growth``"""
+    levels = np.empty_like(growth)
+    levels[:, 0] = 1.0
+    np.cumprod(1 + growth[:, :-1], axis=1, out=levels[:, 1:])
+    levels *= start
+    return levels
+
+
+def simulate_listing(
+    price: float,
+    params: SimulationParams,
+    assumptions: InvestmentAssumptions,
+    monthly_rent: Optional[float] = None,
+    monthly_hoa: float = 0.0,
+    seed: Optional[int] = None,
+) -> Dict[str, Any]:
+    """Simulate ``params.paths`` holding periods of one listing.
+
+    Runs in worker processes. Returns per-year percentile bands of
+    property value, equity, cumulative cash flow and ROI, plus the
+    distribution of the final ROI.
+    """
+    started = time.perf_counter()
+    rng = np.random.default_rng(seed)
+    a = assumptions
+    shape = (params.paths, params.years)
+
+    # Property value: independent yearly appreciation
+    appreciation_shocks = rng.standard_normal(shape)
+    value = price * np.cumprod(
+        1 + a.appreciation_rate + params.appreciation_volatility * appreciation_shocks,
+        axis=1,
+    )
+
+    # Rent growth moves partly with appreciation
+    rho = params.rent_appreciation_correlation
+    rent_shocks = rho * appreciation_shocks + np.sqrt(1 - rho**2) * rng.standard_normal(
+        shape
+    )
+    rent_growth = params.rent_growth + params.rent_growth_volatility * rent_shocks
+    base_rent = (
+        price * a.gross_rent_yield / 12 if monthly_rent is None else monthly_rent
+    )
+    collected = _grown(base_rent * 12, rent_growth)
+    vacancy = np.clip(
+        a.vacancy_rate + params.vacancy_volatility * rng.standard_normal(shape),
+        0.0,
+        1.0,
+    )
+    collected *= (1 - vacancy) * (1 - a.management_rate)
+
+    expense_growth = (
+        params.expense_growth
+        + params.expense_growth_volatility * rng.standard_normal(shape)
+    )
+    fixed_costs = _grown(
+        price * (a.property_tax_rate + a.insurance_rate + a.maintenance_rate)
+        + monthly_hoa * 12,
+        expense_growth,
+    )
+
+    # One locked mortgage rate per path
+    rate = np.clip(
+        a.mortgage_rate + params.rate_volatility * rng.standard_normal((shape[0], 1)),
+        0.0,
+        None,
+    )
+    loan = price * (1 - a.down_payment)
+    cash_invested = price * (a.down_payment + a.closing_costs)
+    debt_service = monthly_payment(loan, rate, a.loan_term_years) * 12
+
+    cash_flow = np.cumsum(collected - fixed_costs - debt_service, axis=1)
+    months_paid = 12 * np.arange(1, params.years + 1)
+    equity = value - remaining_balance(loan, rate, a.loan_term_years, months_paid)
+    roi = (equity + cash_flow - cash_invested) / cash_invested
+
+    final_roi = roi[:, -1]
+    annualized = np.power(np.maximum(1 + final_roi, 0.0), 1 / params.years) - 1
+    return {
+        "paths": params.paths,
+        "years": list(range(1, params.years + 1)),
+        "percentiles": list(PERCENTILES),
+        "bands": {
+            "property_value": _bands(value),
+            "equity": _bands(equity),
+            "cumulative_cash_flow": _bands(cash_flow),
+            "roi": _bands(roi),
+        },
+        "final": {
+            "roi": {
+                f"p{p}": round(float(v), 4)
+                for p, v in zip(PERCENTILES, np.percentile(final_roi, PERCENTILES))
+            },
+            "annualized_return": {
+                f"p{p}": round(float(v), 4)
+                for p, v in zip(PERCENTILES, np.percentile(annualized, PERCENTILES))
+            },
+            "mean_roi": round(float(final_roi.mean()), 4),
+            "probability_of_loss": round(float((final_roi < 0).mean()), 4),
+        },
+        "seconds": round(time.perf_counter() - started, 4),
+    }
+
+
+class MonteCarloPool:
+    """Runs simulations in a process pool, one listing per task.
+
+    The pool is created on first use with ``workers`` processes (default:
+    one per CPU). Workers are spawned rather than forked so they don't
+    inherit the server's threads and open connections.
+    """
+
+    def __init__(self, workers: int = 0):
+        self.workers = workers or os.cpu_count() or 1
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self.in_flight = 0
+        self.simulations = 0
+        self.paths = 0
+        self.worker_seconds = 0.0
+
+    def _pool(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return self._executor
+
+    async def simulate(
+        self,
+        price: float,
+        params: SimulationParams,
+        assumptions: Optional[InvestmentAssumptions] = None,
+        monthly_rent: Optional[float] = None,
+        monthly_hoa: float = 0.0,
+        seed: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        loop = asyncio.get_running_loop()
+        self.in_flight += 1
+        try:
+            result = await loop.run_in_executor(
+                self._pool(),
+                simulate_listing,
+                price,
+                params,
+                assumptions or InvestmentAssumptions.from_settings(),
+                monthly_rent,
+                monthly_hoa,
+                seed,
+            )
+        finally:
+            self.in_flight -= 1
+        self.simulations += 1
+        self.paths += params.paths
+        self.worker_seconds += result["seconds"]
+        return result
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "workers": self.workers,
+            "in_flight": self.in_flight,
+            "simulations": self.simulations,
+            "paths": self.paths,
+            "paths_per_worker_second": round(self.paths / self.worker_seconds)
+            if self.worker_seconds
+            else None,
+        }
+
+
+# Global instance
+monte_carlo_pool = MonteCarloPool(settings.MONTE_CARLO_WORKERS)
@@ -0,0 +1,295 @@
+"""
+Load-balanced pool of Ollama hosts
+Routes each generation to the healthy host with the fewest outstanding
+requests and the best observed latency
+"""
+
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Set
+
+import ollama
+
+from ..config import settings
+from .llm_cancellation import GenerationProgress
+
+
+@dataclass
+class OllamaHost:
+    """Runtime state for a single Ollama endpoint"""
+
+    url: str
+    client: ollama.AsyncClient
+    outstanding: int = 0
+    ewma_latency: Optional[float] = None  # seconds
+    consecutive_failures: int = 0
+    consecutive_successes: int = 0  # Requests since the last failure
+    ejections: int = 0
+    ejected_until: float = 0.0
+    available_models: Set[str] = field(default_factory=set)
+    loaded_models: Set[str] = field(default_factory=set)
+    total_requests: int = 0
+    total_failures: int = 0
+
+    @property
+    def is_ejected(self) -> bool:
+        return self.ejected_until > 0.0
+
+
+class NoHealthyHostError(Exception):
+    """Raised when the pool has no host it can route to"""
+
+
+def _model_names(response: Any) -> Set[str]:
+    """Extract model names from an Ollama list/ps response"""
+    models = response.get("models", []) if response else []
+    names = set()
+    for model in models:
+        name = model.get("model") or model.get("name")
+        if name:
+            names.add(name)
+    return names
+
+
+class OllamaBackendPool:
+    """Least-outstanding-requests balancer over several Ollama hosts"""
+
+    def __init__(
+        self,
+        hosts: List[str],
+        health_check_interval: float = 10.0,
+        failure_threshold: int = 3,
+        ejection_seconds: float = 30.0,
+        max_ejection_seconds: float = 300.0,
+        ewma_alpha: float = 0.3,
+        recovery_requests: int = 10,
+    ):
+        self.hosts: List[OllamaHost] = [
+            OllamaHost(url=url, client=ollama.AsyncClient(host=url)) for url in hosts
+        ]
+        self.health_check_interval = health_check_interval
+        self.failure_threshold = failure_threshold
+        self.ejection_seconds = ejection_seconds
+        self.max_ejection_seconds = max_ejection_seconds
+        self.ewma_alpha = ewma_alpha
+        # Successful requests in a row that clear a host's ejection backoff
+        self.recovery_requests = recovery_requests
+        self._health_task: Optional[asyncio.Task] = None
+        self._default_client: Optional[ollama.AsyncClient] = None
+
+    def is_configured(self) -> bool:
+        """Check if any Ollama hosts were configured"""
+        return bool(self.hosts)
+
+    @property
+    def default_client(self) -> ollama.AsyncClient:
+        """Client for the default host (OLLAMA_HOST) used when no pool hosts
+        are configured; one per process, so its connections are reused"""
+        if self._default_client is None:
+            self._default_client = ollama.AsyncClient()
+        return self._default_client
+
+    async def start(self):
+        """Run an initial health check and start the background checker"""
+        if not self.is_configured() or self._health_task:
+            return
+
+        await self.check_health()
+        self._health_task = asyncio.create_task(self._health_loop())
+        print(f"Started Ollama pool with {len(self.hosts)} hosts")
+
+    async def stop(self):
+        """Stop the background health checker and close the default client"""
+        if self._health_task:
+            self._health_task.cancel()
+            await asyncio.gather(self._health_task, return_exceptions=True)
+            self._health_task = None
+        if self._default_client is not None:
+            await self._default_client.close()
+            self._default_client = None
+
+    async def chat(
+        self,
+        model: str,
+        messages: List[Dict[str, str]],
+        options: Optional[Dict[str, Any]] = None,
+        progress: Optional[GenerationProgress] = None,
+    ) -> str:
+        """Run a chat completion on the best available host.
+
+        The response is streamed so cancelling the caller closes the
+        connection and stops generation on the host. A failed request is
+        retried once on a different host before the error is raised.
+        """
+        tried: Set[str] = set()
+        last_error: Optional[Exception] = None
+
+        for _ in range(min(2, len(self.hosts))):
+            host = self._pick_host(model, exclude=tried)
+            tried.add(host.url)
+
+            host.outstanding += 1
+            host.total_requests += 1
+            started = time.monotonic()
+            parts = []
+            try:
+                stream = await host.client.chat(
+                    model=model, messages=messages, options=options, stream=True
+                )
+                try:
+                    async for part in stream:
+                        parts.append(part["message"]["content"])
+                        if progress:
+                            progress.add_token()
+                finally:
+                    await stream.aclose()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self._record_failure(host)
+                last_error = e
+                if progress:
+                    # The retry generates from scratch
+                    progress.tokens = 0
+                print(f"❌ Ollama host {host.url} failed: {e}")
+                continue
+            finally:
+                host.outstanding -= 1
+
+            self._record_success(host, time.monotonic() - started)
+            host.loaded_models.add(model)
+            return "".join(parts)
+
+        raise last_error or NoHealthyHostError("No Ollama host could serve request")
+
+    def _pick_host(self, model: str, exclude: Set[str]) -> OllamaHost:
+        """Choose the host with the lowest expected completion time"""
+        candidates = [
+            h for h in self.hosts if not h.is_ejected and h.url not in exclude
+        ]
+        if not candidates:
+            # Every host is ejected: route to the one closest to re-admission
+            # rather than failing the request outright
+            candidates = [h for h in self.hosts if h.url not in exclude]
+            if not candidates:
+                raise NoHealthyHostError("No Ollama host available")
+            return min(candidates, key=lambda h: h.ejected_until)
+
+        # Model affinity: hosts with the model in memory skip the load time,
+        # hosts that have it pulled skip the download
+        loaded = [h for h in candidates if model in h.loaded_models]
+        available = [h for h in candidates if model in h.available_models]
+        unknown = [h for h in candidates if not h.available_models]
+        pool = loaded or available or unknown or candidates
+
+        default_latency = self._default_latency()
+        return min(
+            pool,
+            key=lambda h: (
+                (h.outstanding + 1) * (h.ewma_latency or default_latency),
+                h.outstanding,
+            ),
+        )
+
+    def _default_latency(self) -> float:
+        """Latency assumed for hosts with no samples yet"""
+        samples = [h.ewma_latency for h in self.hosts if h.ewma_latency]
+        return sum(samples) / len(samples) if samples else 1.0
+
+    def _record_success(self, host: OllamaHost, latency: float):
+        if host.ewma_latency is None:
+            host.ewma_latency = latency
+        else:
+            host.ewma_latency = (
+                self.ewma_alpha * latency + (1 - self.ewma_alpha) * host.ewma_latency
+            )
+        host.consecutive_failures = 0
+        host.consecutive_successes += 1
+        if host.consecutive_successes >= self.recovery_requests:
+            host.ejections = 0
+
+    def _record_failure(self, host: OllamaHost):
+        host.total_failures += 1
+        host.consecutive_failures += 1
+        host.consecutive_successes = 0
+        if host.consecutive_failures >= self.failure_threshold:
+            self._eject(host)
+
+    def _eject(self, host: OllamaHost):
+        """Take a host out of rotation, backing off on repeat offenders"""
+        if host.is_ejected:
+            return
+        duration = min(
+            self.ejection_seconds * (2**host.ejections), self.max_ejection_seconds
+        )
+        host.ejections += 1
+        host.ejected_until = time.monotonic() + duration
+        print(f"⚠️ Ejected Ollama host {host.url} for {duration:.0f}s")
+
+    def _readmit(self, host: OllamaHost):
+        host.ejected_until = 0.0
+        host.consecutive_failures = 0
+        print(f"✅ Re-admitted Ollama host {host.url}")
+
+    async def check_health(self):
+        """Probe every host and refresh its model inventory"""
+        await asyncio.gather(*(self._check_host(h) for h in self.hosts))
+
+    async def _check_host(self, host: OllamaHost):
+        try:
+            tags, running = await asyncio.gather(host.client.list(), host.client.ps())
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            self._record_failure(host)
+            return
+
+        host.available_models = _model_names(tags)
+        host.loaded_models = _model_names(running)
+
+        # Answering the probe proves the host is up, not that it serves
+        # generations: only a streak of successful requests clears the
+        # ejection backoff (see _record_success)
+        if host.is_ejected and time.monotonic() >= host.ejected_until:
+            self._readmit(host)
+
+    async def _health_loop(self):
+        while True:
+            await asyncio.sleep(self.health_check_interval)
+            try:
+                await self.check_health()
+            except Exception as e:
+                print(f"Ollama health check error: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get per-host routing statistics"""
+        now = time.monotonic()
+        return {
+            "hosts": [
+                {
+                    "url": h.url,
+                    "healthy": not h.is_ejected,
+                    "outstanding": h.outstanding,
+                    "ewma_latency_ms": round(h.ewma_latency * 1000, 1)
+                    if h.ewma_latency
+                    else None,
+                    "ejected_for_seconds": round(max(0.0, h.ejected_until - now), 1)
+                    if h.is_ejected
+                    else 0,
+                    "loaded_models": sorted(h.loaded_models),
+                    "total_requests": h.total_requests,
+                    "total_failures": h.total_failures,
+                }
+                for h in self.hosts
+            ]
+        }
+
+
+# Global pool instance (empty unless OLLAMA_HOSTS is set)
+ollama_pool = OllamaBackendPool(
+    settings.ollama_hosts,
+    health_check_interval=settings.OLLAMA_HEALTH_CHECK_INTERVAL,
+    failure_threshold=settings.OLLAMA_FAILURE_THRESHOLD,
+    ejection_seconds=settings.OLLAMA_EJECTION_SECONDS,
+)
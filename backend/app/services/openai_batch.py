@@ -0,0 +1,268 @@
+"""
+Deferred OpenAI Batch API execution for non-interactive analysis jobs
+Collects section prompts into batch submissions and resolves them when the
+batch completes, keeping background work off the interactive rate limit
+"""
+
+import asyncio
+import json
+import os
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import openai
+
+from ..config import settings
+from .llm_service import LLMService
+
+BATCH_ENDPOINT = "/v1/chat/completions"
+
+SYSTEM_PROMPT = "You are an expert real estate analyst. Provide concise, actionable insights. Focus on key points only."
+
+TERMINAL_FAILURE_STATUSES = {"failed", "expired", "cancelled"}
+
+
+class OpenAIBatchRunner:
+    """Groups prompts into OpenAI batch jobs and polls them to completion"""
+
+    def __init__(
+        self,
+        client: Optional[openai.AsyncOpenAI] = None,
+        model: Optional[str] = None,
+        max_batch_size: int = 500,
+        flush_interval: float = 60.0,
+        poll_interval: float = 30.0,
+        completion_window: str = "24h",
+    ):
+        self._client = client
+        self.model = model or os.getenv("OPENAI_MODEL", "gpt-4")
+        self.max_batch_size = max_batch_size
+        self.flush_interval = flush_interval
+        self.poll_interval = poll_interval
+        self.completion_window = completion_window
+
+        self.pending: List[
+            Tuple[str, str, asyncio.Future, Optional[Callable[[str], None]]]
+        ] = []
+        self.in_flight: Dict[str, Dict[str, asyncio.Future]] = {}
+        self._flush_task: Optional[asyncio.Task] = None
+        self._poll_tasks: set[asyncio.Task] = set()
+        self.submitted_batches = 0
+        self.submitted_requests = 0
+
+    @property
+    def client(self) -> openai.AsyncOpenAI:
+        if self._client is None:
+            # A separate base URL lets the batch endpoints point at a local
+            # stand-in without redirecting interactive traffic
+            self._client = openai.AsyncOpenAI(
+                api_key=os.getenv("OPENAI_API_KEY"),
+                base_url=settings.OPENAI_BATCH_BASE_URL,
+            )
+        return self._client
+
+    def is_available(self) -> bool:
+        """Check if batch execution can be used"""
+        return self._client is not None or bool(os.getenv("OPENAI_API_KEY"))
+
+    async def start(self):
+        """Start the periodic flush loop"""
+        if self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush_loop())
+
+    async def stop(self):
+        """Stop flushing and polling; unresolved prompts resolve to None"""
+        # Resolve first: cancelled poll tasks drop their batch from in_flight
+        for _, _, future, _ in self.pending:
+            if not future.done():
+                future.set_result(None)
+        self.pending.clear()
+        for futures in self.in_flight.values():
+            self._resolve_all(futures, None)
+
+        tasks = [t for t in [self._flush_task, *self._poll_tasks] if t]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._flush_task = None
+        self._poll_tasks.clear()
+        self.in_flight.clear()
+
+    async def submit(
+        self,
+        custom_id: str,
+        prompt: str,
+        on_submitted: Optional[Callable[[str], None]] = None,
+    ) -> Optional[Dict[str, Any]]:
+        """Queue a prompt for the next batch and wait for its parsed result.
+
+        ``on_submitted`` is called with the batch id once the prompt's batch
+        is created, so callers can checkpoint it and ``resume`` after a
+        restart instead of paying for the prompt twice.
+        """
+        future = asyncio.get_running_loop().create_future()
+        self.pending.append((custom_id, prompt, future, on_submitted))
+
+        if len(self.pending) >= self.max_batch_size:
+            await self.flush()
+
+        return await future
+
+    async def resume(self, batch_id: str, custom_id: str) -> Optional[Dict[str, Any]]:
+        """Wait for the result of a prompt submitted earlier, possibly by a
+        previous process, in batch ``batch_id``"""
+        future = asyncio.get_running_loop().create_future()
+        futures = self.in_flight.get(batch_id)
+        if futures is None:
+            futures = self.in_flight[batch_id] = {}
+            self._start_polling(batch_id)
+        futures[custom_id] = future
+        return await future
+
+    async def flush(self):
+        """Submit all pending prompts as a single batch"""
+        if not self.pending:
+            return
+
+        requests = self.pending[: self.max_batch_size]
+        self.pending = self.pending[self.max_batch_size :]
+
+        # Prompts whose job was cancelled while waiting are dropped here
+        requests = [r for r in requests if not r[2].done()]
+        if not requests:
+            return
+
+        lines = [
+            json.dumps(
+                {
+                    "custom_id": custom_id,
+                    "method": "POST",
+                    "url": BATCH_ENDPOINT,
+                    "body": {
+                        "model": self.model,
+                        "messages": [
+                            {"role": "system", "content": SYSTEM_PROMPT},
+                            {"role": "user", "content": prompt},
+                        ],
+                        "temperature": 0.2,
+                        "max_tokens": 800,
+                    },
+                }
+            )
+            for custom_id, prompt, _, _ in requests
+        ]
+        futures = {custom_id: future for custom_id, _, future, _ in requests}
+
+        try:
+            input_file = await self.client.files.create(
+                file=("analysis_batch.jsonl", "\n".join(lines).encode("utf-8")),
+                purpose="batch",
+            )
+            batch = await self.client.batches.create(
+                input_file_id=input_file.id,
+                endpoint=BATCH_ENDPOINT,
+                completion_window=self.completion_window,
+            )
+        except Exception as e:
+            print(f"❌ OpenAI batch submission error: {e}")
+            self._resolve_all(futures, None)
+            return
+
+        self.submitted_batches += 1
+        self.submitted_requests += len(requests)
+        self.in_flight[batch.id] = futures
+        print(f"📦 Submitted OpenAI batch {batch.id} with {len(requests)} requests")
+        for _, _, _, on_submitted in requests:
+            if on_submitted:
+                on_submitted(batch.id)
+
+        self._start_polling(batch.id)
+
+    def _start_polling(self, batch_id: str):
+        task = asyncio.create_task(self._poll_batch(batch_id))
+        self._poll_tasks.add(task)
+        task.add_done_callback(self._poll_tasks.discard)
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                print(f"OpenAI batch flush error: {e}")
+
+    async def _poll_batch(self, batch_id: str):
+        """Poll a batch until it finishes and resolve its futures"""
+        futures = self.in_flight.get(batch_id, {})
+        try:
+            while True:
+                await asyncio.sleep(self.poll_interval)
+                try:
+                    batch = await self.client.batches.retrieve(batch_id)
+                except Exception as e:
+                    print(f"OpenAI batch poll error ({batch_id}): {e}")
+                    continue
+
+                if batch.status == "completed":
+                    try:
+                        results = await self._download_results(batch.output_file_id)
+                    except Exception as e:
+                        print(f"❌ OpenAI batch {batch_id} result download error: {e}")
+                        self._resolve_all(futures, None)
+                        return
+                    for custom_id, future in futures.items():
+                        if not future.done():
+                            future.set_result(results.get(custom_id))
+                    return
+
+                if batch.status in TERMINAL_FAILURE_STATUSES:
+                    print(f"❌ OpenAI batch {batch_id} ended with {batch.status}")
+                    self._resolve_all(futures, None)
+                    return
+        finally:
+            self.in_flight.pop(batch_id, None)
+
+    async def _download_results(
+        self, output_file_id: Optional[str]
+    ) -> Dict[str, Optional[Dict[str, Any]]]:
+        """Download a batch output file and parse each line's JSON payload"""
+        if not output_file_id:
+            return {}
+
+        content = await self.client.files.content(output_file_id)
+        results: Dict[str, Optional[Dict[str, Any]]] = {}
+
+        for line in content.text.splitlines():
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+                body = (record.get("response") or {}).get("body") or {}
+                text = body["choices"][0]["message"]["content"]
+                results[record["custom_id"]] = LLMService._parse_json_response(text)
+            except (KeyError, IndexError, TypeError, json.JSONDecodeError) as e:
+                print(f"❌ Unreadable batch result line: {e}")
+
+        return results
+
+    @staticmethod
+    def _resolve_all(futures: Dict[str, asyncio.Future], value: Any):
+        for future in futures.values():
+            if not future.done():
+                future.set_result(value)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get batch runner statistics"""
+        return {
+            "pending_requests": len(self.pending),
+            "in_flight_batches": len(self.in_flight),
+            "submitted_batches": self.submitted_batches,
+            "submitted_requests": self.submitted_requests,
+        }
+
+
+# Global batch runner instance
+batch_runner = OpenAIBatchRunner(
+    max_batch_size=settings.OPENAI_BATCH_MAX_REQUESTS,
+    flush_interval=settings.OPENAI_BATCH_FLUSH_SECONDS,
+    poll_interval=settings.OPENAI_BATCH_POLL_SECONDS,
+)
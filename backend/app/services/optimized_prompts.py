@@ -3,8 +3,20 @@ Optimized prompt templates for faster LLM processing
 Reduces token usage by 40-50% while maintaining quality
 """
 
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
 from ..models import ManualPropertyData
+from .listing_features import describe_features, feature_extractor
+
+
+def _features(manual_data: Optional[ManualPropertyData]) -> str:
+    """Features extracted from the whole description, which the prompts
+    otherwise only see the start of"""
+    if not manual_data or not manual_data.listing_description:
+        return ""
+    phrases = describe_features(
+        feature_extractor.extract(manual_data.listing_description)
+    )
+    return f"\nFeatures: {', '.join(phrases)}" if phrases else ""
 
 
 class OptimizedPrompts:
@@ -12,15 +24,32 @@ class OptimizedPrompts:
 
     @staticmethod
     def property_summary_prompt(
-        address: str, manual_data: Optional[ManualPropertyData]
+        address: str,
+        manual_data: Optional[ManualPropertyData],
+        strengths: Optional[List[str]] = None,
+        risks: Optional[List[str]] = None,
     ) -> str:
-        """Generate concise property summary - ~100 tokens"""
+        """Generate concise property summary - ~100 tokens, plus the
+        description's features and the strengths and risks already
+        identified when they are given"""
+        features = _features(manual_data)
+        findings = ""
+        if strengths:
+            findings += f"\nKey strengths: {'; '.join(strengths[:4])}"
+        if risks:
+            findings += f"\nRisks: {'; '.join(risks[:4])}"
+        if findings:
+            findings += (
+                "\nWeigh these strengths against the risks for overall_score (0-100)."
+            )
+        if features:
+            findings += "\nFactor the listed features into overall_score."
         return f"""Property: {address}
 Type: {manual_data.property_type if manual_data and manual_data.property_type else "Unknown"}
 Price: {manual_data.price if manual_data and manual_data.price else "Not provided"}
 Size: {manual_data.square_feet if manual_data and manual_data.square_feet else "Unknown"} sq ft
 Beds/Baths: {manual_data.bedrooms if manual_data and manual_data.bedrooms else "?"}/{manual_data.bathrooms if manual_data and manual_data.bathrooms else "?"}
-Description: {manual_data.listing_description[:150] if manual_data and manual_data.listing_description else "None"}
+Description: {manual_data.listing_description[:150] if manual_data and manual_data.listing_description else "None"}{features}{findings}
 
 IMPORTANT: Return ONLY valid JSON in this exact format:
 {{"summary": "2-3 sentence summary", "overall_score": 75}}"""
@@ -33,7 +62,7 @@ IMPORTANT: Return ONLY valid JSON in this exact format:
         return f"""Identify 3-4 key strengths for {address}:
 Type: {manual_data.property_type if manual_data and manual_data.property_type else "Unknown"}
 Price: {manual_data.price if manual_data and manual_data.price else "Not provided"}
-Description: {manual_data.listing_description[:100] if manual_data and manual_data.listing_description else "None"}
+Description: {manual_data.listing_description[:100] if manual_data and manual_data.listing_description else "None"}{_features(manual_data)}
 
 IMPORTANT: Return ONLY valid JSON in this exact format:
 {{"strengths": ["strength1", "strength2", "strength3", "strength4"]}}"""
@@ -46,7 +75,7 @@ IMPORTANT: Return ONLY valid JSON in this exact format:
         return f"""What areas need research for {address}?
 Type: {manual_data.property_type if manual_data and manual_data.property_type else "Unknown"}
 Price: {manual_data.price if manual_data and manual_data.price else "Not provided"}
-Description: {manual_data.listing_description[:100] if manual_data and manual_data.listing_description else "None"}
+Description: {manual_data.listing_description[:100] if manual_data and manual_data.listing_description else "None"}{_features(manual_data)}
 
 IMPORTANT: Return ONLY valid JSON in this exact format:
 {{"weaknesses": ["area1", "area2", "area3", "area4"]}}"""
@@ -57,7 +86,7 @@ IMPORTANT: Return ONLY valid JSON in this exact format:
         return f"""Identify potential risks for {address}:
 Type: {manual_data.property_type if manual_data and manual_data.property_type else "Unknown"}
 Price: {manual_data.price if manual_data and manual_data.price else "Not provided"}
-Description: {manual_data.listing_description[:100] if manual_data and manual_data.listing_description else "None"}
+Description: {manual_data.listing_description[:100] if manual_data and manual_data.listing_description else "None"}{_features(manual_data)}
 
 IMPORTANT: Return ONLY valid JSON in this exact format:
 {{"hidden_risks": ["risk1", "risk2", "risk3", "risk4"]}}"""
@@ -70,7 +99,7 @@ IMPORTANT: Return ONLY valid JSON in this exact format:
         return f"""Generate 5-6 critical questions for the realtor about {address}:
 Type: {manual_data.property_type if manual_data and manual_data.property_type else "Unknown"}
 Price: {manual_data.price if manual_data and manual_data.price else "Not provided"}
-Description: {manual_data.listing_description[:100] if manual_data and manual_data.listing_description else "None"}
+Description: {manual_data.listing_description[:100] if manual_data and manual_data.listing_description else "None"}{_features(manual_data)}
 
 IMPORTANT: Return ONLY valid JSON in this exact format:
 {{"questions": ["question1", "question2", "question3", "question4", "question5", "question6"]}}"""
@@ -105,15 +134,27 @@ Return JSON: {{"rental_income": "rental income estimate", "cash_flow": "cash flo
 
     @staticmethod
     def renovation_analysis_prompt(
-        address: str, manual_data: Optional[ManualPropertyData]
+        address: str,
+        manual_data: Optional[ManualPropertyData],
+        investment: Optional[Dict[str, Any]] = None,
     ) -> str:
-        """Generate renovation analysis - ~130 tokens"""
+        """Generate renovation analysis - ~130 tokens, grounded in the
+        computed investment figures when they are given"""
+        figures = ""
+        if investment:
+            figures = (
+                f"\nComputed figures: price ${investment['price']:,.0f}, "
+                f"cash invested ${investment['cash_invested']:,.0f}, "
+                f"cash flow {investment['annual_cash_flow']:+,.0f} USD/year, "
+                f"cap rate {investment['cap_rate']:.2%}. "
+                "Base renovation_roi on these numbers."
+            )
         return f"""Analyze renovation needs for this property:
 
 {address}
 Type: {manual_data.property_type if manual_data and manual_data.property_type else "Unknown"}
 Year Built: {manual_data.year_built if manual_data and manual_data.year_built else "Unknown"}
-Description: {manual_data.listing_description[:150] if manual_data and manual_data.listing_description else "None"}
+Description: {manual_data.listing_description[:150] if manual_data and manual_data.listing_description else "None"}{_features(manual_data)}{figures}
 
 Return JSON: {{"estimated_costs": "renovation cost estimate", "priority_improvements": ["improvement1", "improvement2", "improvement3"], "renovation_roi": "ROI analysis"}}"""
 
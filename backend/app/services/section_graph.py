@@ -0,0 +1,386 @@
+"""
+Analysis sections as a dependency graph
+Every analysis front-end (blocking /analyze, the SSE stream and background
+jobs) runs the same graph: a section is a node with the prompt that
+generates it (or the local function that computes it) and the sections
+whose results it consumes, and each node starts as soon as its inputs are
+done, so independent sections always run concurrently and a section only
+ever waits for what it actually needs
+"""
+
+import asyncio
+from contextlib import nullcontext
+from dataclasses import dataclass, field
+from typing import (
+    Any,
+    AsyncGenerator,
+    Awaitable,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+)
+
+from ..models import ManualPropertyData
+from .investment_math import investment_section
+from .listing_preview import compute_preview
+from .llm_cancellation import CancelReason
+from .optimized_prompts import OptimizedPrompts
+
+# prompt(address, manual_data, inputs) -> prompt text; ``inputs`` holds the
+# results of the node's dependencies that were generated successfully
+PromptBuilder = Callable[
+    [str, Optional[ManualPropertyData], Dict[str, Dict[str, Any]]], str
+]
+# compute(address, manual_data, inputs) -> section result, without an LLM
+Compute = Callable[
+    [str, Optional[ManualPropertyData], Dict[str, Dict[str, Any]]], Dict[str, Any]
+]
+# generate(node, prompt) -> parsed section result, or None on failure
+Generate = Callable[["SectionNode", str], Awaitable[Optional[Dict[str, Any]]]]
+
+
+@dataclass(frozen=True, slots=True)
+class SectionNode:
+    """One section of the analysis, generated from ``prompt`` or, for local
+    sections, computed in-process by ``compute``"""
+
+    key: str
+    name: str
+    prompt: Optional[PromptBuilder] = None
+    fallback: Dict[str, Any] = field(default_factory=dict)
+    depends_on: Tuple[str, ...] = ()
+    compute: Optional[Compute] = None
+
+    @property
+    def local(self) -> bool:
+        return self.compute is not None
+
+
+class SectionGraph:
+    """Sections in display order, validated to be free of cycles"""
+
+    def __init__(self, nodes: Iterable[SectionNode]):
+        self.nodes: Dict[str, SectionNode] = {}
+        for node in nodes:
+            if node.key in self.nodes:
+                raise ValueError(f"Duplicate section: {node.key}")
+            self.nodes[node.key] = node
+        for node in self.nodes.values():
+            if (node.prompt is None) == (node.compute is None):
+                raise ValueError(f"Section {node.key} needs a prompt or compute")
+            for dep in node.depends_on:
+                if dep not in self.nodes:
+                    raise ValueError(f"Section {node.key} depends on unknown {dep}")
+        self.depth = self._check_acyclic()
+
+    def _check_acyclic(self) -> int:
+        """Length of the longest dependency chain; raises on cycles"""
+        levels: Dict[str, int] = {}
+        visiting = set()
+
+        def level(key: str) -> int:
+            if key in levels:
+                return levels[key]
+            if key in visiting:
+                raise ValueError(f"Section dependency cycle through {key}")
+            visiting.add(key)
+            deps = self.nodes[key].depends_on
+            levels[key] = 1 + max((level(dep) for dep in deps), default=0)
+            visiting.discard(key)
+            return levels[key]
+
+        return max((level(key) for key in self.nodes), default=0)
+
+    def __iter__(self) -> Iterator[SectionNode]:
+        return iter(self.nodes.values())
+
+    def __len__(self) -> int:
+        return len(self.nodes)
+
+    def closure(self, keys: Iterable[str]) -> List[str]:
+        """``keys`` plus everything they depend on, in display order"""
+        needed = set()
+        stack = list(keys)
+        while stack:
+            key = stack.pop()
+            if key not in needed:
+                needed.add(key)
+                stack.extend(self.nodes[key].depends_on)
+        return [key for key in self.nodes if key in needed]
+
+    def fallback(self, key: str) -> Dict[str, Any]:
+        node = self.nodes.get(key)
+        return dict(node.fallback) if node else {}
+
+    def start(
+        self,
+        address: str,
+        manual_data: Optional[ManualPropertyData],
+        generate: Optional[Generate],
+        *,
+        sections: Optional[Iterable[str]] = None,
+        completed: Optional[Dict[str, Dict[str, Any]]] = None,
+        concurrency: Optional[int] = None,
+        cancel_reason: str = CancelReason.OTHER,
+    ) -> "SectionRun":
+        """Prepare a run of ``sections`` (default: all) and their dependencies.
+
+        Sections in ``completed`` are not generated again; their results
+        still feed the sections that depend on them. ``generate`` may be
+        None when only local sections are left to run.
+        """
+        keys = self.closure(sections if sections is not None else self.nodes)
+        return SectionRun(
+            self,
+            address,
+            manual_data,
+            generate,
+            keys,
+            completed or {},
+            concurrency,
+            cancel_reason,
+        )
+
+
+class SectionRun:
+    """One execution of a section graph.
+
+    Iterate ``results()`` for ``(key, result)`` pairs as sections finish;
+    ``result`` is None when generation failed, and callers substitute their
+    own fallback. Local sections are computed inline the moment their
+    inputs are ready, so sections without LLM inputs come out before any
+    generated one. At most ``concurrency`` sections generate at once.
+    ``cancel`` aborts in-flight sections and makes ``results()`` raise
+    CancelledError; closing ``results()`` early cancels whatever is still
+    running with ``cancel_reason``.
+    """
+
+    def __init__(
+        self,
+        graph: SectionGraph,
+        address: str,
+        manual_data: Optional[ManualPropertyData],
+        generate: Optional[Generate],
+        keys: List[str],
+        completed: Dict[str, Dict[str, Any]],
+        concurrency: Optional[int],
+        cancel_reason: str,
+    ):
+        self.graph = graph
+        self.address = address
+        self.manual_data = manual_data
+        self.generate = generate
+        self.cancel_reason = cancel_reason
+        self.pending = [key for key in keys if key not in completed]
+        self.done: Dict[str, Optional[Dict[str, Any]]] = dict(completed)
+        self.running: Dict[asyncio.Task, str] = {}
+        self.cancelled = False
+        self._semaphore = asyncio.Semaphore(concurrency) if concurrency else None
+
+    def cancel(self, reason: str = CancelReason.OTHER):
+        self.cancelled = True
+        self.cancel_reason = reason
+        for task in self.running:
+            task.cancel(reason)
+
+    async def results(
+        self,
+    ) -> AsyncGenerator[Tuple[str, Optional[Dict[str, Any]]], None]:
+        try:
+            while self.pending or self.running:
+                if self.cancelled:
+                    raise asyncio.CancelledError(self.cancel_reason)
+                for key in self._launch_ready():
+                    yield key, self.done[key]
+                if not self.running:
+                    continue
+                finished, _ = await asyncio.wait(
+                    self.running, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in finished:
+                    key = self.running.pop(task)
+                    self.done[key] = task.result()
+                    yield key, self.done[key]
+        finally:
+            for task in self.running:
+                task.cancel(self.cancel_reason)
+
+    def _launch_ready(self) -> List[str]:
+        """Start generating every ready section; returns the local sections
+        computed on the way, in order"""
+        computed = []
+        ready = True
+        while ready:
+            ready = False
+            for key in list(self.pending):
+                node = self.graph.nodes[key]
+                if not all(dep in self.done for dep in node.depends_on):
+                    continue
+                self.pending.remove(key)
+                if node.local:
+                    self.done[key] = self._compute(node)
+                    computed.append(key)
+                    ready = True  # may unblock sections listed before it
+                else:
+                    task = asyncio.create_task(self._run_node(node))
+                    self.running[task] = key
+        return computed
+
+    def _inputs(self, node: SectionNode) -> Dict[str, Dict[str, Any]]:
+        return {dep: self.done[dep] for dep in node.depends_on if self.done.get(dep)}
+
+    def _compute(self, node: SectionNode) -> Optional[Dict[str, Any]]:
+        try:
+            return node.compute(self.address, self.manual_data, self._inputs(node))
+        except Exception as e:
+            print(f"❌ Error in analysis section {node.key}: {e}")
+            return None
+
+    async def _run_node(self, node: SectionNode) -> Optional[Dict[str, Any]]:
+        async with self._semaphore or nullcontext():
+            try:
+                prompt = node.prompt(self.address, self.manual_data, self._inputs(node))
+                return await self.generate(node, prompt)
+            except Exception as e:
+                print(f"❌ Error in analysis section {node.key}: {e}")
+                return None
+
+
+def _listed(result: Optional[Dict[str, Any]], field_name: str) -> List[str]:
+    value = (result or {}).get(field_name)
+    return [str(item) for item in value] if isinstance(value, list) else []
+
+
+def _summary_prompt(
+    address: str,
+    manual_data: Optional[ManualPropertyData],
+    inputs: Dict[str, Dict[str, Any]],
+) -> str:
+    return OptimizedPrompts.property_summary_prompt(
+        address,
+        manual_data,
+        strengths=_listed(inputs.get("strengths"), "strengths"),
+        risks=_listed(inputs.get("risks"), "hidden_risks"),
+    )
+
+
+def _independent(
+    builder: Callable[[str, Optional[ManualPropertyData]], str],
+) -> PromptBuilder:
+    return lambda address, manual_data, inputs: builder(address, manual_data)
+
+
+def _renovation_prompt(
+    address: str,
+    manual_data: Optional[ManualPropertyData],
+    inputs: Dict[str, Dict[str, Any]],
+) -> str:
+    investment = inputs.get("investment_potential", {}).get("metrics")
+    return OptimizedPrompts.renovation_analysis_prompt(address, manual_data, investment)
+
+
+def _preview(
+    address: str,
+    manual_data: Optional[ManualPropertyData],
+    inputs: Dict[str, Dict[str, Any]],
+) -> Dict[str, Any]:
+    return compute_preview(manual_data)
+
+
+def _investment(
+    address: str,
+    manual_data: Optional[ManualPropertyData],
+    inputs: Dict[str, Dict[str, Any]],
+) -> Dict[str, Any]:
+    return investment_section(manual_data)
+
+
+# The summary weighs strengths against risks for its score, so it runs
+# once both are in. Investment figures are computed, and the renovation
+# section's ROI builds on them; everything else only needs the listing
+ANALYSIS_GRAPH = SectionGraph(
+    [
+        SectionNode("preview", "Listing Preview", compute=_preview),
+        SectionNode(
+            "summary",
+            "Property Summary",
+            prompt=_summary_prompt,
+            fallback={
+                "summary": "Analysis based on provided information",
+                "overall_score": 75,
+            },
+            depends_on=("strengths", "risks"),
+        ),
+        SectionNode(
+            "strengths",
+            "Key Strengths",
+            prompt=_independent(OptimizedPrompts.strengths_prompt),
+            fallback={"strengths": ["Property analysis completed"]},
+        ),
+        SectionNode(
+            "research_areas",
+            "Research Areas",
+            prompt=_independent(OptimizedPrompts.research_areas_prompt),
+            fallback={"weaknesses": ["Additional research recommended"]},
+        ),
+        SectionNode(
+            "risks",
+            "Hidden Risks",
+            prompt=_independent(OptimizedPrompts.risks_prompt),
+            fallback={"hidden_risks": ["Property condition unknown"]},
+        ),
+        SectionNode(
+            "questions",
+            "Realtor Questions",
+            prompt=_independent(OptimizedPrompts.questions_prompt),
+            fallback={"questions": ["What additional information do you need?"]},
+        ),
+        SectionNode(
+            "market_analysis",
+            "Market Analysis",
+            prompt=_independent(OptimizedPrompts.market_analysis_prompt),
+            fallback={
+                "trends": "Market analysis unavailable",
+                "comparables": "No comparable data",
+                "appreciation_potential": "Requires research",
+            },
+        ),
+        SectionNode(
+            "investment_potential",
+            "Investment Potential",
+            compute=_investment,
+            fallback={
+                "rental_income": "Requires market research",
+                "cash_flow": "Analysis unavailable",
+                "roi_projections": "Requires research",
+                "appreciation_timeline": "Unknown",
+            },
+        ),
+        SectionNode(
+            "renovation_analysis",
+            "Renovation Analysis",
+            prompt=_renovation_prompt,
+            depends_on=("investment_potential",),
+            fallback={
+                "estimated_costs": "Assessment needed",
+                "priority_improvements": ["Property inspection required"],
+                "renovation_roi": "Analysis unavailable",
+            },
+        ),
+    ]
+)
+
+# Sections shown by the interactive endpoints (/analyze and /analyze/stream)
+CORE_SECTIONS = (
+    "preview",
+    "investment_potential",
+    "summary",
+    "strengths",
+    "research_areas",
+    "risks",
+    "questions",
+)
@@ -0,0 +1,176 @@
+"""
+Server-side event buffers for resumable SSE analysis streams
+Each streamed analysis runs as a background producer writing numbered
+events into a buffer; HTTP responses follow the buffer, so a client that
+reconnects with Last-Event-ID replays what it missed and then continues
+with the live generation instead of starting a new one
+"""
+
+import asyncio
+import json
+import time
+from collections import OrderedDict
+from contextlib import aclosing
+from typing import Any, AsyncGenerator, AsyncIterator, Dict, List, Optional, Tuple
+
+from .llm_cancellation import CancelReason
+
+
+class AnalysisStream:
+    """Buffered events of one streamed analysis"""
+
+    def __init__(self, analysis_id: str, user_id: str):
+        self.analysis_id = analysis_id
+        self.user_id = user_id
+        self.frames: List[str] = []  # SSE frames; event n is frames[n - 1]
+        self.done = False
+        self.finished_at: Optional[float] = None
+        self.listeners = 0
+        self.producer: Optional[asyncio.Task] = None
+        self.abandon_handle: Optional[asyncio.TimerHandle] = None
+        self._appended = asyncio.Event()
+
+    def event_id(self, number: int) -> str:
+        return f"{self.analysis_id}:{number}"
+
+    def append(self, event: Dict[str, Any]):
+        number = len(self.frames) + 1
+        self.frames.append(
+            f"id: {self.event_id(number)}\ndata: {json.dumps(event)}\n\n"
+        )
+        self._wake()
+
+    def finish(self):
+        self.done = True
+        self.finished_at = time.monotonic()
+        self._wake()
+
+    def _wake(self):
+        # Followers wait on the current event; swap in a fresh one for the
+        # next append
+        self._appended.set()
+        self._appended = asyncio.Event()
+
+    async def follow(self, after: int = 0) -> AsyncGenerator[str, None]:
+        """Yield frames after event number ``after``, then live ones"""
+        index = after
+        while True:
+            while index < len(self.frames):
+                yield self.frames[index]
+                index += 1
+            if self.done:
+                return
+            await self._appended.wait()
+
+
+class StreamRegistry:
+    """Live and recently finished analysis streams of this process.
+
+    A stream whose last follower disconnects keeps generating for
+    ``resume_grace_seconds`` so the client can reconnect; after that its
+    LLM requests are cancelled. Finished streams stay replayable for
+    ``ttl_seconds``, and at most ``max_streams`` are kept.
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: float = 120.0,
+        resume_grace_seconds: float = 15.0,
+        max_streams: int = 1000,
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.resume_grace_seconds = resume_grace_seconds
+        self.max_streams = max_streams
+        self.streams: OrderedDict[str, AnalysisStream] = OrderedDict()
+        self.started = 0
+        self.resumed = 0
+        self.replayed_events = 0
+        self.abandoned = 0
+
+    def start(
+        self, analysis_id: str, user_id: str, events: AsyncIterator[Dict[str, Any]]
+    ) -> AnalysisStream:
+        """Run ``events`` in the background, buffering each one"""
+        self._expire()
+        stream = AnalysisStream(analysis_id, user_id)
+        stream.producer = asyncio.create_task(self._produce(stream, events))
+        self.streams[analysis_id] = stream
+        self.started += 1
+        # Until a response starts following it, the stream is as good as
+        # abandoned: a client that disconnects before then never attaches
+        self._arm_abandon(stream)
+        return stream
+
+    async def _produce(self, stream: AnalysisStream, events: AsyncIterator):
+        try:
+            async with aclosing(events):
+                async for event in events:
+                    stream.append(event)
+        finally:
+            stream.finish()
+            if stream.abandon_handle:
+                stream.abandon_handle.cancel()
+
+    def resume(
+        self, last_event_id: str, user_id: str
+    ) -> Tuple[Optional[AnalysisStream], int]:
+        """Find the stream a Last-Event-ID belongs to and the event number
+        to continue after; (None, 0) if it is unknown or expired"""
+        self._expire()
+        analysis_id, _, number = last_event_id.rpartition(":")
+        stream = self.streams.get(analysis_id)
+        if stream is None or stream.user_id != user_id or not number.isdigit():
+            return None, 0
+        after = min(int(number), len(stream.frames))
+        self.resumed += 1
+        self.replayed_events += len(stream.frames) - after
+        return stream, after
+
+    async def attach(
+        self, stream: AnalysisStream, after: int = 0
+    ) -> AsyncGenerator[str, None]:
+        """Follow a stream for one HTTP response"""
+        if stream.abandon_handle:
+            stream.abandon_handle.cancel()
+            stream.abandon_handle = None
+        stream.listeners += 1
+        try:
+            async for frame in stream.follow(after):
+                yield frame
+        finally:
+            stream.listeners -= 1
+            if not stream.listeners and not stream.done:
+                self._arm_abandon(stream)
+
+    def _arm_abandon(self, stream: AnalysisStream):
+        """Cancel the stream's producer unless a follower attaches within
+        ``resume_grace_seconds``"""
+        if stream.abandon_handle:
+            stream.abandon_handle.cancel()
+        stream.abandon_handle = asyncio.get_running_loop().call_later(
+            self.resume_grace_seconds, self._abandon, stream
+        )
+
+    def _abandon(self, stream: AnalysisStream):
+        stream.abandon_handle = None
+        if not stream.listeners and not stream.done and stream.producer:
+            # Nobody came back: stop paying for the remaining sections
+            self.abandoned += 1
+            stream.producer.cancel(CancelReason.CLIENT_DISCONNECTED)
+
+    def _expire(self):
+        now = time.monotonic()
+        for analysis_id, stream in list(self.streams.items()):
+            expired = stream.done and now - stream.finished_at > self.ttl_seconds
+            if expired or (len(self.streams) > self.max_streams and stream.done):
+                del self.streams[analysis_id]
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "buffered_streams": len(self.streams),
+            "live_streams": sum(not s.done for s in self.streams.values()),
+            "started": self.started,
+            "resumed": self.resumed,
+            "replayed_events": self.replayed_events,
+            "abandoned": self.abandoned,
+        }
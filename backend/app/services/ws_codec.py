@@ -0,0 +1,57 @@
+"""
+Message encodings for the analysis WebSocket
+Clients pick one through the WebSocket subprotocol: MessagePack binary
+frames when offered, JSON text frames otherwise (the web app uses JSON;
+MessagePack is for scripts and services that opt in). Frames are further
+compressed by permessage-deflate, which uvicorn negotiates itself
+"""
+
+import json
+from typing import Any, Dict, List, Optional, Union
+
+import msgpack
+
+JSON_PROTOCOL = "listingiq.json.v1"
+MSGPACK_PROTOCOL = "listingiq.msgpack.v1"
+
+
+class JsonCodec:
+    """Compact JSON text frames (the default)"""
+
+    name = "json"
+    binary = False
+
+    def encode(self, message: Dict[str, Any]) -> str:
+        return json.dumps(message, separators=(",", ":"))
+
+    def decode(self, frame: Union[str, bytes]) -> Dict[str, Any]:
+        return json.loads(frame)
+
+
+class MsgpackCodec:
+    """MessagePack binary frames"""
+
+    name = "msgpack"
+    binary = True
+
+    def encode(self, message: Dict[str, Any]) -> bytes:
+        return msgpack.packb(message, use_bin_type=True)
+
+    def decode(self, frame: Union[str, bytes]) -> Dict[str, Any]:
+        if isinstance(frame, str):
+            # Control messages may still arrive as JSON text
+            return json.loads(frame)
+        return msgpack.unpackb(frame, raw=False)
+
+
+def negotiate(offered: List[str]) -> tuple[Any, Optional[str]]:
+    """Pick a codec from the client's subprotocols, in our preference order.
+
+    Returns the codec and the subprotocol to accept (None when the client
+    offered none of ours, which means plain JSON).
+    """
+    if MSGPACK_PROTOCOL in offered:
+        return MsgpackCodec(), MSGPACK_PROTOCOL
+    if JSON_PROTOCOL in offered:
+        return JsonCodec(), JSON_PROTOCOL
+    return JsonCodec(), None
@@ -0,0 +1,113 @@
+"""
+Local stand-in for the OpenAI Files and Batch endpoints
+Point OPENAI_BATCH_BASE_URL at it (uvicorn tests.fake_openai_batch:app,
+base URL http://127.0.0.1:8000/v1) or mount it in-process with
+httpx.ASGITransport. Each request's completion echoes its prompt as JSON,
+and ``outcome`` decides how the next batches end
+"""
+
+import itertools
+import json
+import time
+from typing import Any, Dict
+
+from fastapi import FastAPI, File, Form, HTTPException, UploadFile
+from fastapi.responses import PlainTextResponse
+
+
+class FakeBatchServer:
+    """Batches finish on their first poll with ``outcome``: "completed",
+    any failure status ("failed", "expired", "cancelled"), or
+    "unreadable_output" (completed, but downloading the results fails)"""
+
+    def __init__(self, outcome: str = "completed"):
+        self.outcome = outcome
+        self.files: Dict[str, str] = {}
+        self.batches: Dict[str, Dict[str, Any]] = {}
+        self.polls = 0
+        self._ids = itertools.count(1)
+        self.app = self._build_app()
+
+    def _build_app(self) -> FastAPI:
+        app = FastAPI()
+
+        @app.post("/v1/files")
+        async def create_file(file: UploadFile = File(...), purpose: str = Form(...)):
+            content = (await file.read()).decode("utf-8")
+            file_id = f"file-{next(self._ids)}"
+            self.files[file_id] = content
+            return {
+                "id": file_id,
+                "object": "file",
+                "bytes": len(content),
+                "created_at": int(time.time()),
+                "filename": file.filename,
+                "purpose": purpose,
+                "status": "processed",
+            }
+
+        @app.post("/v1/batches")
+        async def create_batch(body: Dict[str, Any]):
+            batch_id = f"batch-{next(self._ids)}"
+            self.batches[batch_id] = {
+                "id": batch_id,
+                "object": "batch",
+                "endpoint": body["endpoint"],
+                "input_file_id": body["input_file_id"],
+                "completion_window": body["completion_window"],
+                "created_at": int(time.time()),
+                "status": "in_progress",
+                "output_file_id": None,
+            }
+            return self.batches[batch_id]
+
+        @app.get("/v1/batches/{batch_id}")
+        async def retrieve_batch(batch_id: str):
+            batch = self.batches.get(batch_id)
+            if batch is None:
+                raise HTTPException(404, "No such batch")
+            self.polls += 1
+            if batch["status"] == "in_progress":
+                self._finish(batch)
+            return batch
+
+        @app.get("/v1/files/{file_id}/content")
+        async def file_content(file_id: str):
+            if file_id not in self.files:
+                raise HTTPException(404, "No such file")
+            return PlainTextResponse(self.files[file_id])
+
+        return app
+
+    def _finish(self, batch: Dict[str, Any]):
+        if self.outcome not in ("completed", "unreadable_output"):
+            batch["status"] = self.outcome
+            return
+
+        output_id = f"file-{next(self._ids)}"
+        batch["status"] = "completed"
+        batch["output_file_id"] = output_id
+        if self.outcome == "unreadable_output":
+            return  # The output file is never stored, so downloading it 404s
+
+        lines = []
+        for line in self.files[batch["input_file_id"]].splitlines():
+            request = json.loads(line)
+            prompt = request["body"]["messages"][-1]["content"]
+            completion = json.dumps({"echo": prompt})
+            lines.append(
+                json.dumps(
+                    {
+                        "custom_id": request["custom_id"],
+                        "response": {
+                            "status_code": 200,
+                            "body": {"choices": [{"message": {"content": completion}}]},
+                        },
+                    }
+                )
+            )
+        self.files[output_id] = "\n".join(lines)
+
+
+# Standalone server for OPENAI_BATCH_BASE_URL
+app = FakeBatchServer().app
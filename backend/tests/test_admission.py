@@ -0,0 +1,83 @@
+import pytest
+
+from app.config import settings
+from app.models import ManualPropertyData
+from app.services.admission import QueueEstimator, QueueFullError
+
+from .test_async_processor import make_processor
+
+
+def test_projected_wait_spreads_the_queue_over_workers():
+    estimator = QueueEstimator()
+
+    assert estimator.projected_wait(8, 4, 30.0) == 60.0
+    assert estimator.projected_wait(8, 0, 30.0) == 240.0  # at least one worker
+
+
+def test_retry_after_is_time_to_drain_below_the_threshold():
+    estimator = QueueEstimator()
+
+    # 2 workers at 30s a job finish one job every 15s; 10 queued jobs are
+    # 6 more than a 60s wait allows
+    assert estimator.retry_after(10, 2, 30.0, 60.0) == 90
+    assert estimator.retry_after(4, 2, 30.0, 60.0) == 1
+
+
+def test_job_seconds_uses_section_estimate_until_jobs_are_observed():
+    estimator = QueueEstimator(initial_section_seconds=10.0)
+
+    # 7 sections, 3 at a time: three rounds of 10s
+    assert estimator.job_seconds(7, 3) == 30.0
+    estimator.record_section(20.0)
+    assert estimator.section_seconds == 12.0  # EWMA with alpha 0.2
+
+    estimator.record_job(45.0)
+    assert estimator.job_seconds(7, 3) == 45.0
+
+
+async def submit(processor, address):
+    return await processor.submit_analysis_job(
+        "user-1", address, "Home", ManualPropertyData(price="$400,000")
+    )
+
+
+@pytest.fixture
+def full_queue(monkeypatch):
+    """A processor whose two workers take 30s a job, admitting up to a
+    60s projected wait"""
+    monkeypatch.setattr(settings, "JOB_ADMISSION_MAX_WAIT_SECONDS", 60.0)
+    processor = make_processor()  # not started: submitted jobs stay queued
+    processor.max_workers = 2
+    processor.estimator.record_job(30.0)
+    return processor
+
+
+async def test_jobs_are_admitted_up_to_the_wait_threshold(full_queue):
+    for n in range(4):
+        await full_queue.job_queue.put(f"queued-{n}", "other-user")
+
+    # 4 queued: 4 / 2 workers * 30s = 60s, not over the threshold
+    await submit(full_queue, "1 Main St")
+
+    # 5 queued: 75s
+    with pytest.raises(QueueFullError) as rejected:
+        await submit(full_queue, "2 Main St")
+    assert rejected.value.projected_wait == 75.0
+    assert rejected.value.retry_after == 15  # one job over, 15s per job
+    assert full_queue.admission_rejections == 1
+
+
+async def test_duplicate_submission_attaches_even_when_full(full_queue):
+    job_id = await submit(full_queue, "1 Main St")
+    for n in range(10):
+        await full_queue.job_queue.put(f"queued-{n}", "other-user")
+
+    assert await submit(full_queue, "1 Main St") == job_id
+
+
+async def test_admission_control_can_be_disabled(full_queue, monkeypatch):
+    monkeypatch.setattr(settings, "JOB_ADMISSION_MAX_WAIT_SECONDS", 0)
+    for n in range(50):
+        await full_queue.job_queue.put(f"queued-{n}", "other-user")
+
+    assert await submit(full_queue, "1 Main St")
@@ -0,0 +1,176 @@
+import asyncio
+
+import pytest
+
+from app.models import ManualPropertyData
+from app.services import async_processor as processor_module
+from app.services.async_processor import (
+    GENERATED_SECTIONS,
+    AsyncAnalysisProcessor,
+    ExecutionMode,
+    JobStatus,
+)
+from app.services.job_event_bus import LocalEventBus
+from app.services.job_queue import LocalJobQueue
+from app.services.job_store import JobStore, SQLiteJobStore
+
+from .fake_openai_batch import FakeBatchServer
+from .test_openai_batch import make_runner
+
+
+class FakeLLM:
+    """Stands in for LLMService; prompts containing ``hold`` wait until
+    ``release`` is set"""
+
+    prompts = []
+    hold = None
+    release = None
+
+    async def generate_analysis(self, prompt, priority=None, timeout=None):
+        FakeLLM.prompts.append(prompt)
+        if FakeLLM.hold and FakeLLM.hold in prompt:
+            await FakeLLM.release.wait()
+        return {"generated": True}
+
+
+@pytest.fixture(autouse=True)
+def fake_llm(monkeypatch):
+    monkeypatch.setattr(processor_module, "LLMService", FakeLLM)
+    FakeLLM.prompts = []
+    FakeLLM.hold = None
+    FakeLLM.release = asyncio.Event()
+    return FakeLLM
+
+
+def make_processor(store=None) -> AsyncAnalysisProcessor:
+    return AsyncAnalysisProcessor(
+        store=store or JobStore(), job_queue=LocalJobQueue(0), event_bus=LocalEventBus()
+    )
+
+
+async def wait_for_status(processor, job_id, status, timeout=5.0):
+    async with asyncio.timeout(timeout):
+        while True:
+            job = await processor.get_job_status(job_id)
+            if job and job.status == status:
+                return job
+            await asyncio.sleep(0.01)
+
+
+async def submit(processor, user_id="user-1", address="1 Main St"):
+    return await processor.submit_analysis_job(
+        user_id, address, "Home", ManualPropertyData(price="$400,000")
+    )
+
+
+async def test_job_runs_every_section_to_completion():
+    processor = make_processor()
+    await processor.start()
+    try:
+        job_id = await submit(processor)
+        job = await wait_for_status(processor, job_id, JobStatus.COMPLETED)
+    finally:
+        await processor.stop(grace_seconds=0)
+
+    results = processor._archived_results(job_id)
+    assert set(results) == {key for key, _ in processor_module.ANALYSIS_SECTIONS}
+    assert len(FakeLLM.prompts) == len(GENERATED_SECTIONS)
+    assert results["investment_potential"]["metrics"]["price"] == 400_000
+    assert job.progress == 100
+
+
+async def test_identical_submission_attaches_to_the_running_job():
+    processor = make_processor()  # not started: jobs stay pending
+
+    first = await submit(processor)
+    again = await submit(processor, address="1 main street")
+    other = await submit(processor, address="2 Main St")
+
+    assert again == first
+    assert other != first
+    assert processor.dedup_hits == 1
+
+
+async def test_drained_job_resumes_only_its_missing_sections(tmp_path):
+    path = str(tmp_path / "jobs.db")
+    FakeLLM.hold = "Provide market analysis"  # one section never finishes
+
+    first = make_processor(SQLiteJobStore(path))
+    await first.start()
+    job_id = await submit(first)
+    async with asyncio.timeout(5):
+        while (
+            len(first.jobs[job_id].results)
+            < len(processor_module.ANALYSIS_SECTIONS) - 1
+        ):
+            await asyncio.sleep(0.01)
+    await first.stop(grace_seconds=0)  # grace runs out: checkpoint and hand back
+
+    FakeLLM.prompts = []
+    FakeLLM.hold = None
+    second = make_processor(SQLiteJobStore(path))
+    await second.start()  # recovers the pending job
+    try:
+        await wait_for_status(second, job_id, JobStatus.COMPLETED)
+    finally:
+        await second.stop(grace_seconds=0)
+
+    assert len(FakeLLM.prompts) == 1
+    assert "Provide market analysis" in FakeLLM.prompts[0]
+
+
+async def test_restart_leaves_jobs_of_live_processes_alone(tmp_path):
+    path = str(tmp_path / "jobs.db")
+    FakeLLM.hold = "Provide market analysis"
+
+    first = make_processor(SQLiteJobStore(path))
+    await first.start()
+    second = make_processor(SQLiteJobStore(path))
+    second.instance_id = "other-process"
+    try:
+        job_id = await submit(first)
+        await first.store.flush()
+        await second.start()  # e.g. a sibling uvicorn worker restarting
+
+        assert job_id not in second.jobs
+        assert first.jobs[job_id].status == JobStatus.IN_PROGRESS
+    finally:
+        FakeLLM.release.set()
+        await second.stop(grace_seconds=0)
+        await first.stop(grace_seconds=0)
+
+
+async def test_restarted_batch_job_waits_on_its_submitted_batch(tmp_path, monkeypatch):
+    path = str(tmp_path / "jobs.db")
+    server = FakeBatchServer()
+    generated = set(GENERATED_SECTIONS)
+
+    runner = make_runner(server, poll_interval=3600)  # never finishes
+    monkeypatch.setattr(processor_module, "batch_runner", runner)
+    first = make_processor(SQLiteJobStore(path))
+    await first.start()
+    job_id = await first.submit_analysis_job(
+        "user-1",
+        "1 Main St",
+        "Home",
+        ManualPropertyData(price="$400,000"),
+        execution_mode=ExecutionMode.BATCH,
+    )
+    async with asyncio.timeout(5):
+        while len(runner.pending) < len(generated):
+            await asyncio.sleep(0.01)
+    await runner.flush()
+    assert set(first.jobs[job_id].batch_ids) == generated
+    await first.stop(grace_seconds=0)
+
+    monkeypatch.setattr(processor_module, "batch_runner", make_runner(server))
+    second = make_processor(SQLiteJobStore(path))
+    await second.start()
+    try:
+        await wait_for_status(second, job_id, JobStatus.COMPLETED)
+    finally:
+        await second.stop(grace_seconds=0)
+
+    assert len(server.batches) == 1
+    results = second._archived_results(job_id)
+    assert all("echo" in results[key] for key in generated)
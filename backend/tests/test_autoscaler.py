@@ -0,0 +1,54 @@
+from app.services.async_processor import AsyncAnalysisProcessor
+from app.services.autoscaler import PoolSample, WorkerAutoscaler
+from app.services.job_event_bus import LocalEventBus
+from app.services.job_queue import SharedJobQueue
+from app.services.job_store import SQLiteJobStore
+
+from .test_job_store import make_record
+
+
+def sample(**kw) -> PoolSample:
+    values = dict(
+        workers=2,
+        busy=2,
+        queue_depth=10,
+        projected_wait=120.0,
+        section_latency=5.0,
+        throughput=1.0,
+        backend_saturated=False,
+    )
+    values.update(kw)
+    return PoolSample(**values)
+
+
+def test_backed_up_queue_adds_a_worker():
+    autoscaler = WorkerAutoscaler(1, 4, target_wait_seconds=30)
+
+    assert autoscaler.decide(sample()) == 3
+    assert autoscaler.last_reason == "queue backing up"
+
+
+def test_empty_queue_sheds_idle_workers():
+    autoscaler = WorkerAutoscaler(1, 4)
+
+    assert autoscaler.decide(sample(workers=3, busy=1, queue_depth=0)) == 2
+
+
+async def test_shared_mode_samples_the_backlog_of_every_process(tmp_path):
+    store = SQLiteJobStore(str(tmp_path / "jobs.db"), flush_interval=3600)
+    processor = AsyncAnalysisProcessor(
+        store=store, job_queue=SharedJobQueue(store), event_bus=LocalEventBus()
+    )
+    await store.open()
+    try:
+        # Queued by other processes: this one never saw a put
+        for n in range(3):
+            store.save_job(make_record(f"j{n}"))
+        await store.flush()
+
+        pool = await processor._sample_pool()
+    finally:
+        await store.close()
+
+    assert pool.queue_depth == 3
+    assert pool.projected_wait > 0
@@ -0,0 +1,71 @@
+import pytest
+
+from app.services.connection_outbox import COALESCE, DROP_OLDEST, ConnectionOutbox
+
+
+def delta(job_id: str, seq: int, **data):
+    return {"type": "job_delta", "job_id": job_id, "seq": seq, "data": data}
+
+
+async def drain(outbox: ConnectionOutbox):
+    return [await outbox.get() for _ in range(len(outbox))]
+
+
+async def test_coalesce_merges_deltas_of_the_same_job():
+    outbox = ConnectionOutbox(policy=COALESCE)
+    outbox.put(delta("j1", 1, progress=10, results={"summary": {"s": 1}}))
+    outbox.put(delta("j2", 1, progress=50))
+    outbox.put(delta("j1", 2, progress=20, results={"risks": {"r": 1}}))
+
+    first, second = await drain(outbox)
+
+    assert first["seq"] == 2
+    assert first["first_seq"] == 1
+    assert first["data"]["progress"] == 20
+    assert first["data"]["results"] == {"summary": {"s": 1}, "risks": {"r": 1}}
+    assert second["job_id"] == "j2"
+    assert outbox.coalesced == 1
+
+
+async def test_snapshot_supersedes_queued_deltas():
+    outbox = ConnectionOutbox(policy=COALESCE)
+    outbox.put(delta("j1", 1, progress=10))
+    snapshot = {"type": "job_update", "job_id": "j1", "seq": 5, "data": {}}
+    outbox.put(snapshot)
+
+    assert await drain(outbox) == [snapshot]
+
+
+async def test_full_outbox_drops_the_oldest_message():
+    outbox = ConnectionOutbox(max_messages=2, policy=DROP_OLDEST)
+    for seq in (1, 2, 3):
+        outbox.put(delta("j1", seq, progress=seq))
+
+    assert [m["seq"] for m in await drain(outbox)] == [2, 3]
+    assert outbox.dropped == 1
+
+
+async def test_other_messages_are_never_merged():
+    outbox = ConnectionOutbox(max_messages=3, policy=COALESCE)
+    for _ in range(2):
+        outbox.put({"type": "pong", "job_id": "j1"})
+
+    assert len(outbox) == 2
+    assert outbox.coalesced == 0
+
+
+async def test_dropped_entries_stop_receiving_merges():
+    outbox = ConnectionOutbox(max_messages=1, policy=COALESCE)
+    outbox.put(delta("j1", 1, progress=10))
+    outbox.put(delta("j2", 1, progress=10))  # drops j1's entry
+    outbox.put(delta("j1", 2, progress=20))  # so this one queues afresh
+
+    messages = await drain(outbox)
+
+    assert [(m["job_id"], m["seq"]) for m in messages] == [("j1", 2)]
+    assert outbox.dropped == 2
+
+
+def test_unknown_policy_is_rejected():
+    with pytest.raises(ValueError):
+        ConnectionOutbox(policy="block")
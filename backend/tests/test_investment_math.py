@@ -0,0 +1,115 @@
+from dataclasses import replace
+
+import numpy as np
+import pytest
+
+from app.models import ManualPropertyData
+from app.services.investment_math import (
+    InvestmentAssumptions,
+    analyze_investments,
+    investment_metrics,
+    investment_section,
+    monthly_payment,
+    remaining_balance,
+)
+
+# Round numbers so every metric can be checked by hand: $100,000 at 20%
+# down on an interest-free 30-year loan, renting for $1,000 a month with
+# only a 1% property tax as an owner cost
+SIMPLE = InvestmentAssumptions(
+    down_payment=0.20,
+    closing_costs=0.0,
+    mortgage_rate=0.0,
+    loan_term_years=30,
+    gross_rent_yield=0.12,
+    vacancy_rate=0.0,
+    management_rate=0.0,
+    property_tax_rate=0.01,
+    insurance_rate=0.0,
+    maintenance_rate=0.0,
+    appreciation_rate=0.0,
+    horizon_years=5,
+)
+
+
+def test_monthly_payment_of_a_standard_mortgage():
+    # $200,000 at 6% over 30 years: 200000 * 0.005 / (1 - 1.005 ** -360)
+    assert monthly_payment(200_000, 0.06, 30) == pytest.approx(1199.10, abs=0.01)
+
+
+def test_zero_rate_loan_divides_evenly():
+    assert monthly_payment(36_000, 0.0, 3) == pytest.approx(1000.0)
+    assert remaining_balance(36_000, 0.0, 3, 12) == pytest.approx(24_000.0)
+
+
+def test_remaining_balance_after_five_years():
+    assert remaining_balance(200_000, 0.06, 30, 60) == pytest.approx(
+        186_108.71, abs=0.01
+    )
+    assert remaining_balance(200_000, 0.06, 30, 360) == pytest.approx(0.0, abs=0.01)
+
+
+def test_metrics_match_hand_computed_values():
+    m = investment_metrics(100_000, SIMPLE)
+
+    assert m["monthly_rent"] == 1000.0
+    assert m["loan_amount"] == 80_000.0
+    assert m["cash_invested"] == 20_000.0
+    assert m["monthly_payment"] == pytest.approx(222.2222)  # 80,000 / 360
+    assert m["noi"] == 11_000.0  # 12,000 rent - 1,000 tax
+    assert m["cap_rate"] == 0.11
+    assert m["annual_cash_flow"] == pytest.approx(8333.3333)  # - 2,666.67 debt
+    assert m["cash_on_cash"] == pytest.approx(0.4167)
+    assert m["dscr"] == 4.125
+    assert m["break_even_rent"] == pytest.approx(305.5556)  # 3,666.67 / 12
+    assert m["future_value"] == 100_000.0
+    assert m["equity"] == pytest.approx(33_333.3333)  # 60 of 360 payments made
+    # (33,333.33 equity + 5 * 8,333.33 cash flow - 20,000) / 20,000
+    assert m["total_return"] == 2.75
+
+
+def test_vacancy_management_and_hoa_reduce_income():
+    a = replace(SIMPLE, vacancy_rate=0.10, management_rate=0.10)
+    m = investment_metrics(100_000, a, monthly_hoa=100.0)
+
+    # 12,000 * 0.9 collected * 0.9 after management - 1,000 tax - 1,200 HOA
+    assert m["noi"] == pytest.approx(7520.0)
+    # (2,666.67 debt + 2,200 fixed) / (12 * 0.9 * 0.9)
+    assert m["break_even_rent"] == pytest.approx(500.6859)
+
+
+def test_no_debt_service_reports_dscr_as_none():
+    all_cash = replace(SIMPLE, down_payment=1.0)
+    assert investment_metrics(100_000, all_cash)["dscr"] is None
+
+
+def test_batch_matches_single_listings():
+    prices = np.array([150_000.0, 400_000.0, 925_000.0])
+    batch = analyze_investments(prices, SIMPLE, monthly_hoa=50.0)
+
+    for i, price in enumerate(prices):
+        single = investment_metrics(price, SIMPLE, monthly_hoa=50.0)
+        for name, value in single.items():
+            assert batch[name][i] == pytest.approx(value, abs=1e-4)
+
+
+def test_section_reads_price_and_hoa_from_the_listing():
+    section = investment_section(
+        ManualPropertyData(
+            property_address="1 Main St",
+            price="$100,000",
+            listing_description="Quiet street. HOA $100 per month.",
+        ),
+        SIMPLE,
+    )
+
+    assert section["metrics"]["monthly_hoa"] == 100.0
+    assert section["metrics"]["noi"] == 9800.0  # 11,000 - 1,200 HOA
+    assert "$100 HOA" in section["cash_flow"]
+
+
+def test_section_without_a_price_asks_for_one():
+    section = investment_section(None, SIMPLE)
+
+    assert section["metrics"] is None
+    assert "listing price" in section["cash_flow"]
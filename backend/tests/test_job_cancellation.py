@@ -0,0 +1,34 @@
+from app.services.async_processor import AsyncAnalysisProcessor
+from app.services.job_event_bus import LocalEventBus
+from app.services.job_queue import LocalJobQueue
+from app.services.job_store import JobStore
+
+
+async def make_processor() -> AsyncAnalysisProcessor:
+    processor = AsyncAnalysisProcessor(
+        store=JobStore(), job_queue=LocalJobQueue(0), event_bus=LocalEventBus()
+    )
+    # No workers: submitted jobs stay pending until cancelled
+    await processor.event_bus.start(processor._deliver_event, lambda job_id: True)
+    return processor
+
+
+async def test_cancel_publishes_terminal_delta_before_dropping_subscribers():
+    processor = await make_processor()
+    job_id = await processor.submit_analysis_job("user-1", "1 Main St", "Home", None)
+    events = []
+    processor.subscribe(job_id, events.append)
+
+    assert await processor.cancel_job(job_id, "user-1")
+
+    assert events[-1]["type"] == "job_delta"
+    assert events[-1]["data"]["status"] == "cancelled"
+    assert not processor.subscriptions.for_job(job_id)
+
+
+async def test_cancel_by_other_user_is_refused():
+    processor = await make_processor()
+    job_id = await processor.submit_analysis_job("user-1", "1 Main St", "Home", None)
+
+    assert not await processor.cancel_job(job_id, "user-2")
+    assert processor.jobs[job_id].status.value == "pending"
@@ -0,0 +1,43 @@
+from app.services.job_dedup import job_fingerprints, normalize_address
+
+
+def test_address_spellings_normalize_alike():
+    assert normalize_address("123 North Main Street, Apt. 4") == normalize_address(
+        "123 n main st apt 4"
+    )
+
+
+def test_identical_submissions_share_a_fingerprint():
+    first = job_fingerprints("u1", "12 Oak Avenue", {"price": "$400k"}, "interactive")
+    again = job_fingerprints("u1", "12 oak ave.", {"price": "$400k"}, "interactive")
+
+    assert first == again
+    assert len(first) == 1
+
+
+def test_fingerprints_differ_by_user_inputs_and_mode():
+    base = job_fingerprints("u1", "12 Oak Ave", {"price": "$400k"}, "interactive")
+
+    assert (
+        job_fingerprints("u2", "12 Oak Ave", {"price": "$400k"}, "interactive") != base
+    )
+    assert (
+        job_fingerprints("u1", "12 Oak Ave", {"price": "$410k"}, "interactive") != base
+    )
+    assert job_fingerprints("u1", "12 Oak Ave", {"price": "$400k"}, "batch") != base
+
+
+def test_cross_user_fingerprint_only_for_public_listing_inputs():
+    public = {"price": "$400k"}
+    a = job_fingerprints("u1", "12 Oak Ave", public, "interactive", cross_user=True)
+    b = job_fingerprints("u2", "12 Oak Ave", public, "interactive", cross_user=True)
+    private = job_fingerprints(
+        "u1",
+        "12 Oak Ave",
+        {**public, "additional_notes": "my budget"},
+        "interactive",
+        cross_user=True,
+    )
+
+    assert a[1] == b[1]
+    assert len(private) == 1
@@ -0,0 +1,131 @@
+from datetime import datetime
+
+from app.services.async_processor import AnalysisJob, JobStatus
+from app.services.job_events import JobEventEncoder, SubscriptionRegistry
+
+
+def make_job(job_id: str = "job-1") -> AnalysisJob:
+    now = datetime(2025, 1, 1, 12, 0)
+    return AnalysisJob(
+        id=job_id,
+        user_id="user-1",
+        property_address="1 Main St",
+        property_title="Home",
+        manual_data=None,
+        status=JobStatus.PENDING,
+        progress=0,
+        current_section=None,
+        results={},
+        error_message=None,
+        created_at=now,
+        updated_at=now,
+        estimated_completion=None,
+    )
+
+
+def apply(state, event):
+    """Client-side merge, as the WebSocket hook does it"""
+    data = dict(event["data"])
+    results = data.pop("results", {})
+    if event["type"] == "job_update":
+        return {**data, "results": dict(results)}
+    return {**state, **data, "results": {**state["results"], **results}}
+
+
+def test_deltas_carry_only_what_changed_with_increasing_seq():
+    encoder = JobEventEncoder()
+    job = make_job()
+
+    first = encoder.delta(job)
+    assert first["seq"] == 1
+    assert first["data"]["status"] == "pending"  # everything is new at first
+
+    job.status = JobStatus.IN_PROGRESS
+    job.progress = 20
+    job.results["summary"] = {"summary": "ok"}
+    second = encoder.delta(job)
+    assert second["seq"] == 2
+    assert second["data"] == {
+        "status": "in_progress",
+        "progress": 20,
+        "results": {"summary": {"summary": "ok"}},
+    }
+
+    job.progress = 40
+    job.results["risks"] = {"hidden_risks": []}
+    third = encoder.delta(job)
+    assert third["seq"] == 3
+    # Sections already sent are not repeated
+    assert third["data"] == {"progress": 40, "results": {"risks": {"hidden_risks": []}}}
+
+
+def test_unchanged_job_produces_no_event_and_keeps_its_seq():
+    encoder = JobEventEncoder()
+    job = make_job()
+    encoder.delta(job)
+
+    assert encoder.delta(job) is None
+    assert job.event_seq == 1
+
+
+def test_snapshot_is_fenced_by_the_seq_of_the_last_delta():
+    encoder = JobEventEncoder()
+    job = make_job()
+    events = []
+    for progress, section in [(10, "strengths"), (20, "risks"), (30, "summary")]:
+        job.progress = progress
+        job.results[section] = {"section": section}
+        events.append(encoder.delta(job))
+        if progress == 20:
+            snapshot = encoder.snapshot(job)
+
+    assert snapshot["seq"] == 2
+    # A subscriber that got the snapshot applies only deltas after its seq
+    state = apply(None, snapshot)
+    for event in events:
+        if event["seq"] > snapshot["seq"]:
+            state = apply(state, event)
+
+    assert state == apply(None, encoder.snapshot(job))
+    assert set(state["results"]) == {"strengths", "risks", "summary"}
+
+
+def test_seq_continues_across_processes_through_the_job_record():
+    job = make_job()
+    JobEventEncoder().delta(job)
+    job.progress = 50
+    JobEventEncoder().delta(job)
+
+    restored = AnalysisJob.from_record(job.to_record())
+    restored.progress = 60
+    event = JobEventEncoder().delta(restored)
+
+    assert event["seq"] == 3
+
+
+def test_forget_makes_the_next_delta_complete_again():
+    encoder = JobEventEncoder()
+    job = make_job()
+    encoder.delta(job)
+    encoder.forget(job.id)
+
+    event = encoder.delta(job)
+
+    assert event["seq"] == 2
+    assert "status" in event["data"]
+
+
+def test_subscriptions_are_removed_through_their_handles():
+    registry = SubscriptionRegistry()
+    first = registry.add("job-1", print)
+    second = registry.add("job-1", print)
+    registry.add("job-2", print)
+    assert len(registry) == 3
+
+    assert registry.remove(first)
+    assert not registry.remove(first)  # already gone
+    assert list(registry.for_job("job-1")) == [second.token]
+
+    registry.drop_job("job-1")
+    assert len(registry) == 1
+    assert registry.for_job("job-1") == {}
@@ -0,0 +1,87 @@
+import asyncio
+
+import pytest
+
+from app.config import settings
+from app.services.fair_share import FairShare
+from app.services.job_queue import LocalJobQueue, SharedJobQueue
+from app.services.job_store import SQLiteJobStore
+
+from .test_job_store import make_record
+
+
+async def take(queue: LocalJobQueue, count: int, release: bool = True):
+    taken = []
+    for _ in range(count):
+        job_id = await asyncio.wait_for(queue.get("worker"), 1)
+        taken.append(job_id)
+        if release:
+            await queue.release(job_id)
+    return taken
+
+
+async def test_users_take_turns_regardless_of_backlog():
+    queue = LocalJobQueue()
+    for n in range(4):
+        await queue.put(f"a{n}", "alice")
+    await queue.put("b0", "bob")
+    await queue.put("b1", "bob")
+
+    assert await take(queue, 6) == ["a0", "b0", "a1", "b1", "a2", "a3"]
+
+
+async def test_plan_weight_sets_share_of_starts(monkeypatch):
+    monkeypatch.setattr(settings, "JOB_PLAN_WEIGHTS", {"pro": 2})
+    queue = LocalJobQueue()
+    for n in range(4):
+        await queue.put(f"p{n}", "pro-user", plan="pro")
+        await queue.put(f"f{n}", "free-user")
+
+    order = await take(queue, 6)
+
+    # Two pro starts for every free one while both have work queued
+    assert [job_id[0] for job_id in order] == ["p", "f", "p", "p", "f", "p"]
+
+
+async def test_in_flight_cap_holds_back_a_users_next_job():
+    queue = LocalJobQueue(max_in_flight_per_user=1)
+    await queue.put("a0", "alice")
+    await queue.put("a1", "alice")
+
+    assert await take(queue, 1, release=False) == ["a0"]
+    with pytest.raises(asyncio.TimeoutError):
+        await asyncio.wait_for(queue.get("worker"), 0.05)
+
+    await queue.release("a0")
+    assert await take(queue, 1) == ["a1"]
+
+
+def test_idle_user_gets_no_credit_for_time_away():
+    fair_share = FairShare()
+    for _ in range(5):
+        fair_share.charge("busy", 1.0)
+
+    # A newcomer starts at the current virtual time, not at zero
+    assert fair_share.start_tag("newcomer") == fair_share.vtime
+    assert fair_share.choose([("busy", "1"), ("newcomer", "2")]) == "newcomer"
+
+
+async def test_shared_queue_depth_follows_puts_and_the_store(tmp_path):
+    store = SQLiteJobStore(str(tmp_path / "jobs.db"), flush_interval=3600)
+    await store.open()
+    queue = SharedJobQueue(store)
+    try:
+        store.save_job(make_record("j1"))
+        await queue.put("j1", "user-1")
+        assert queue.qsize() == 1
+
+        # Submitted by another process
+        store.save_job(make_record("j2"))
+        await store.flush()
+        assert await queue.refresh_depth() == 2
+        assert queue.qsize() == 2
+
+        await queue.get("worker")
+        assert queue.qsize() == 1
+    finally:
+        await store.close()
@@ -0,0 +1,217 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.services.job_store import SQLiteJobStore
+
+
+def make_record(job_id: str, status: str = "pending", user_id: str = "user-1", **kw):
+    now = datetime.now().isoformat()
+    record = {
+        "id": job_id,
+        "user_id": user_id,
+        "status": status,
+        "progress": 0,
+        "created_at": now,
+        "updated_at": now,
+        "payload": {"property_address": "1 Main St", "plan": None},
+    }
+    record.update(kw)
+    return record
+
+
+@pytest.fixture
+async def store(tmp_path):
+    store = SQLiteJobStore(str(tmp_path / "jobs.db"), flush_interval=3600)
+    await store.open()
+    yield store
+    await store.close()
+
+
+def ago(**kwargs) -> str:
+    return (datetime.now() - timedelta(**kwargs)).isoformat()
+
+
+async def test_delete_expired_removes_terminal_rows_past_their_ttl(store):
+    store.save_job(make_record("old-done", "completed", updated_at=ago(hours=30)))
+    store.save_job(make_record("new-done", "completed", updated_at=ago(hours=2)))
+    store.save_job(make_record("old-failed", "failed", updated_at=ago(hours=2)))
+    store.save_job(make_record("old-cancelled", "cancelled", updated_at=ago(hours=2)))
+    store.save_job(make_record("old-running", "in_progress", updated_at=ago(days=9)))
+    store.save_section("old-done", "summary", {"summary": "x"})
+
+    deleted = await store.delete_expired(ago(hours=24), ago(hours=1))
+
+    assert deleted == 3
+    assert await store.load("old-done") is None
+    assert await store.load("old-failed") is None
+    assert await store.load("old-cancelled") is None
+    assert await store.load("new-done") is not None
+    assert await store.load("old-running") is not None
+    orphans = store._conn.execute(
+        "SELECT COUNT(*) FROM analysis_job_sections WHERE job_id = 'old-done'"
+    ).fetchone()[0]
+    assert orphans == 0
+
+
+async def test_delete_expired_prunes_idle_fair_share_users(store):
+    store.save_job(make_record("a", user_id="gone"))
+    store.save_job(make_record("b", user_id="active"))
+    await store.claim_job("node-1", 60)
+    await store.claim_job("node-1", 60)
+    for job_id, user_id in (("a", "gone"), ("b", "active")):
+        store._conn.execute(
+            "UPDATE analysis_jobs SET status = 'completed', updated_at = ? "
+            "WHERE id = ?",
+            (ago(days=2), job_id),
+        )
+    # Later claims moved virtual time past both users' tags
+    store._conn.execute("UPDATE analysis_job_meta SET value = 10 WHERE key = 'vtime'")
+    store.save_job(make_record("c", user_id="active"))
+
+    await store.delete_expired(ago(hours=24), ago(hours=1))
+
+    users = {
+        row[0] for row in store._conn.execute("SELECT user_id FROM analysis_job_users")
+    }
+    assert users == {"active"}
+
+
+async def test_delete_expired_keeps_users_ahead_of_virtual_time(store):
+    store.save_job(make_record("a", user_id="busy"))
+    await store.claim_job("node-1", 60)
+    store._conn.execute(
+        "UPDATE analysis_jobs SET status = 'completed', updated_at = ?", (ago(days=2),)
+    )
+
+    await store.delete_expired(ago(hours=24), ago(hours=1))
+
+    # Forgetting this tag would let the user jump the queue right away
+    row = store._conn.execute("SELECT vfinish FROM analysis_job_users").fetchone()
+    assert row == (1.0,)
+
+
+async def test_stale_write_never_moves_a_terminal_job_back(store):
+    store.save_job(make_record("j1", "in_progress"))
+    await store.flush()
+    assert await store.mark_cancelled("j1", "user-1", ago(seconds=0))
+
+    # A buffered progress update from the worker arrives afterwards
+    store.save_job(make_record("j1", "in_progress", progress=60))
+    await store.flush()
+
+    record = await store.load("j1")
+    assert record["status"] == "cancelled"
+    assert record["progress"] == 0
+
+
+async def test_unfinished_jobs_survive_a_restart_with_their_sections(tmp_path):
+    path = str(tmp_path / "jobs.db")
+    store = SQLiteJobStore(path, flush_interval=3600)
+    await store.open()
+    store.save_job(make_record("running", "in_progress"))
+    store.save_job(make_record("waiting", "pending"))
+    store.save_job(make_record("done", "completed"))
+    store.save_section("running", "summary", {"summary": "kept"})
+    await store.close()  # flushes buffered writes
+
+    reopened = SQLiteJobStore(path, flush_interval=3600)
+    await reopened.open()
+    try:
+        records = {r["id"]: r for r in await reopened.load_incomplete()}
+    finally:
+        await reopened.close()
+
+    assert set(records) == {"running", "waiting"}
+    assert records["running"]["results"] == {"summary": {"summary": "kept"}}
+
+
+async def test_claim_leases_a_job_to_one_owner(store):
+    store.save_job(make_record("j1"))
+
+    claimed = await store.claim_job("node-1", 60)
+
+    assert claimed["id"] == "j1"
+    assert claimed["status"] == "in_progress"
+    assert await store.claim_job("node-2", 60) is None
+    assert await store.renew_lease("j1", "node-1", 60)
+    assert not await store.renew_lease("j1", "node-2", 60)
+
+
+async def test_expired_lease_is_claimed_by_another_owner(store):
+    store.save_job(make_record("j1"))
+    await store.claim_job("node-1", -1)  # owner died: lease already expired
+
+    reclaimed = await store.claim_job("node-2", 60)
+
+    assert reclaimed["id"] == "j1"
+    assert not await store.renew_lease("j1", "node-1", 60)
+    assert await store.renew_lease("j1", "node-2", 60)
+
+
+async def test_cancelled_job_cannot_be_renewed(store):
+    store.save_job(make_record("j1"))
+    await store.claim_job("node-1", 60)
+
+    assert await store.mark_cancelled("j1", "user-1", ago(seconds=0))
+    assert not await store.renew_lease("j1", "node-1", 60)
+    assert not await store.mark_cancelled("j1", "user-1", ago(seconds=0))
+
+
+async def test_claims_alternate_between_users(store):
+    for n in range(3):
+        store.save_job(make_record(f"a{n}", user_id="alice", created_at=ago(hours=1)))
+    store.save_job(make_record("b0", user_id="bob"))
+
+    order = [(await store.claim_job("node-1", 60))["id"] for _ in range(4)]
+
+    assert order == ["a0", "b0", "a1", "a2"]
+
+
+async def test_claim_skips_users_at_the_in_flight_cap(store):
+    store.save_job(make_record("a0", user_id="alice", created_at=ago(hours=1)))
+    store.save_job(make_record("a1", user_id="alice", created_at=ago(hours=1)))
+    store.save_job(make_record("b0", user_id="bob"))
+
+    first = await store.claim_job("node-1", 60, max_in_flight_per_user=1)
+    second = await store.claim_job("node-1", 60, max_in_flight_per_user=1)
+
+    assert [first["id"], second["id"]] == ["a0", "b0"]
+    assert await store.claim_job("node-1", 60, max_in_flight_per_user=1) is None
+
+
+async def test_find_active_job_matches_recent_unfinished_fingerprints(store):
+    payload = {"property_address": "1 Main St", "plan": None, "fingerprint": "fp"}
+    store.save_job(make_record("old", payload=payload, created_at=ago(hours=2)))
+    store.save_job(make_record("new", payload=payload))
+    store.save_job(make_record("done", "completed", payload=payload))
+
+    found = await store.find_active_job("fp", ago(hours=1))
+
+    assert found["id"] == "new"
+    assert await store.find_active_job("other", ago(hours=1)) is None
+
+
+async def test_adopt_takes_only_jobs_no_live_process_holds(store):
+    store.save_job(make_record("held", lease_owner="node-1", lease_expires_at=1e12))
+    store.save_job(make_record("orphan"))
+    store.save_job(
+        make_record("expired", "in_progress", lease_owner="dead", lease_expires_at=1)
+    )
+    store.save_job(make_record("done", "completed"))
+
+    adopted = await store.adopt_orphaned("node-2", 60)
+
+    assert {r["id"] for r in adopted} == {"orphan", "expired"}
+    assert await store.adopt_orphaned("node-3", 60) == []
+
+
+async def test_released_jobs_are_adopted_at_once(store):
+    store.save_job(make_record("j1"))
+    await store.adopt_orphaned("node-1", 60)
+    await store.renew_owned("node-1", 60)
+    assert await store.adopt_orphaned("node-2", 60) == []
+
+    await store.release_owned("node-1")
+
+    assert [r["id"] for r in await store.adopt_orphaned("node-2", 60)] == ["j1"]
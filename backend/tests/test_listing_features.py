@@ -0,0 +1,123 @@
+import pytest
+
+from app.services.listing_features import (
+    FeatureExtractor,
+    describe_features,
+    extract_features,
+)
+
+
+@pytest.mark.parametrize(
+    "text, monthly",
+    [
+        ("HOA $250/mo covers landscaping.", 250.0),
+        ("HOA $250 per month.", 250.0),
+        ("HOA dues $100 monthly.", 100.0),
+        ("HOA $1,200 annually.", 100.0),
+        ("HOA $600 yearly.", 50.0),
+        ("HOA fees $300 quarterly.", 100.0),
+        ("Association dues: $1,200 per year.", 100.0),
+        ("$1,200 annual HOA.", 100.0),
+        ("$300 quarterly HOA fee.", 100.0),
+        ("$250 a month HOA.", 250.0),
+        ("HOA $95.", 95.0),
+        ("No HOA!", 0.0),
+    ],
+)
+def test_hoa_fee_is_normalized_to_monthly(text, monthly):
+    assert extract_features(text)["hoa_monthly"] == monthly
+
+
+def test_hoa_amount_is_not_read_as_a_period():
+    assert extract_features("HOA $250 more or less.")["hoa_monthly"] == 250.0
+
+
+@pytest.mark.parametrize(
+    "after", ["", " Quiet street.", " Quiet street close to shops and schools"]
+)
+def test_qualifier_just_past_the_window_is_kept(after):
+    # Layout padding pushes "per year" across the window end, mid-token
+    text = "HOA dues:" + " " * 50 + "$2,400 per year." + after
+
+    assert extract_features(text)["hoa_monthly"] == 200.0
+
+
+def test_listing_with_many_features():
+    features = extract_features(
+        "Charming 3 bed home. New roof and furnace 8 years old. 2-car garage, "
+        "in-ground pool. Renovated kitchen, updated bathrooms, finished "
+        "basement and solar panels. Not in a flood zone."
+    )
+
+    assert features["roof_age"] == 0
+    assert features["hvac_age"] == 8
+    assert features["garage_spaces"] == 2
+    assert features["pool"] is True
+    assert features["flood_zone"] is False
+    for flag in ("renovated_kitchen", "renovated_bathroom", "finished_basement"):
+        assert features[flag] is True
+    assert features["solar"] is True
+    assert features["as_is"] is False
+
+
+def test_silent_description_leaves_features_unknown():
+    features = extract_features("Sunny and spacious, close to parks and shopping.")
+
+    assert features["hoa_monthly"] is None
+    assert features["garage_spaces"] is None
+    assert describe_features(features) == []
+
+
+def test_extractor_caches_by_description_and_returns_copies():
+    extractor = FeatureExtractor(max_entries=1)
+    first = extractor.extract("HOA $250/mo.")
+    first["hoa_monthly"] = 0
+
+    assert extractor.extract("HOA $250/mo.")["hoa_monthly"] == 250.0
+    extractor.extract("No pool.")
+    assert extractor.get_stats() == {"entries": 1, "hits": 1, "misses": 2}
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "Sold as-is.",
+        "Property is being sold AS IS, no repairs.",
+        "Offered in as-is condition.",
+        "As is, where is.",
+        "Investor special!",
+        "Fixer-upper that needs TLC.",
+    ],
+)
+def test_as_is_listing_phrasing(text):
+    assert extract_features(text)["as_is"] is True
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "Quiet street, such as is typical for the neighborhood.",
+        "Leave the yard as is or add a patio.",
+        "Garage stays as is; the pool was resurfaced.",
+    ],
+)
+def test_as_is_in_ordinary_prose_is_ignored(text):
+    assert extract_features(text)["as_is"] is False
+
+
+@pytest.mark.parametrize("text", ["Brand new A/C.", "New AC unit in the garage."])
+def test_new_air_conditioning(text):
+    assert extract_features(text)["hvac_age"] == 0
+
+
+# Each text also names a feature keyword, so the matcher runs on it
+@pytest.mark.parametrize(
+    "text",
+    [
+        "Living room has a new accent wall and a 2-car garage.",
+        "New acoustic panels in the finished basement.",
+        "Brand new acre lot next to the community pool.",
+    ],
+)
+def test_words_starting_with_ac_are_not_hvac(text):
+    assert extract_features(text)["hvac_age"] is None
@@ -0,0 +1,79 @@
+from datetime import date
+
+import pytest
+
+from app.models import ManualPropertyData
+from app.services.listing_preview import compute_preview, parse_price
+
+
+@pytest.mark.parametrize(
+    "text, price",
+    [
+        ("$450,000", 450_000),
+        ("450000", 450_000),
+        ("450k", 450_000),
+        ("$750K obo", 750_000),
+        ("$1.2M", 1_200_000),
+        ("$1.2 million", 1_200_000),
+        ("$2.5 Million", 2_500_000),
+        ("1.5mm", 1_500_000),
+        ("$300 thousand", 300_000),
+        ("$450,000.50", 450_000.50),
+    ],
+)
+def test_parse_price_amounts_and_multipliers(text, price):
+    assert parse_price(text) == price
+
+
+@pytest.mark.parametrize(
+    "text, price",
+    [
+        ("2 bed $300k", 300_000),
+        ("2 bed 300k", 300_000),
+        ("3 b/2 ba $400k", 400_000),
+        ("Listed at $525,000 (rent $2,800/mo)", 525_000),
+        ("1,800 sqft, asking 389,900", 389_900),
+    ],
+)
+def test_parse_price_prefers_the_purchase_amount(text, price):
+    assert parse_price(text) == price
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        None,
+        "",
+        "Contact agent",
+        "$0",
+        "$3,200/mo",
+        "$3,200 per month",
+        "$1,200 monthly",
+    ],
+)
+def test_parse_price_rejects_missing_and_rent_amounts(text):
+    assert parse_price(text) is None
+
+
+def test_compute_preview_ratios_and_completeness():
+    preview = compute_preview(
+        ManualPropertyData(
+            price="$500,000", square_feet=2000, bedrooms=4, bathrooms=2, year_built=1990
+        ),
+        today=date(2026, 1, 1),
+    )
+
+    assert preview["price"] == 500_000
+    assert preview["price_per_sqft"] == 250.0
+    assert preview["property_age"] == 36
+    assert preview["bed_bath_ratio"] == 2.0
+    assert preview["sqft_per_bedroom"] == 500.0
+    assert preview["completeness"] == 56  # 5 of 9 fields
+
+
+def test_compute_preview_without_data():
+    preview = compute_preview(None)
+
+    assert preview["price"] is None
+    assert preview["price_per_sqft"] is None
+    assert preview["completeness"] == 0
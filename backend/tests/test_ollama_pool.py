@@ -0,0 +1,96 @@
+import time
+
+from app.services.ollama_pool import OllamaBackendPool
+
+
+class FakeClient:
+    """Answers health probes; generation results are scripted per call"""
+
+    def __init__(self, fail_chat: bool = False):
+        self.fail_chat = fail_chat
+
+    async def list(self):
+        return {"models": [{"model": "test-model"}]}
+
+    async def ps(self):
+        return {"models": []}
+
+    async def chat(self, **kwargs):
+        if self.fail_chat:
+            raise ConnectionError("generation failed")
+
+        async def stream():
+            yield {"message": {"content": "ok"}}
+
+        return stream()
+
+
+def make_pool(**kwargs) -> OllamaBackendPool:
+    pool = OllamaBackendPool(["http://host-a"], failure_threshold=2, **kwargs)
+    pool.hosts[0].client = FakeClient()
+    return pool
+
+
+async def test_health_probe_does_not_reset_ejection_backoff():
+    pool = make_pool(ejection_seconds=1.0)
+    host = pool.hosts[0]
+
+    for _ in range(2):
+        pool._record_failure(host)
+    assert host.ejections == 1
+
+    host.ejected_until = time.monotonic() - 1  # backoff elapsed
+    await pool.check_health()
+    assert not host.is_ejected
+    await pool.check_health()  # healthy probes while not ejected
+    assert host.ejections == 1
+
+    for _ in range(2):
+        pool._record_failure(host)
+    assert host.ejections == 2
+    assert host.ejected_until - time.monotonic() > 1.5  # backoff doubled
+
+
+async def test_successful_requests_clear_ejection_backoff():
+    pool = make_pool(recovery_requests=3)
+    host = pool.hosts[0]
+    host.ejections = 2
+
+    for _ in range(2):
+        assert await pool.chat("test-model", []) == "ok"
+    assert host.ejections == 2
+
+    await pool.chat("test-model", [])
+    assert host.ejections == 0
+
+
+async def test_failed_request_restarts_recovery_streak():
+    pool = make_pool(recovery_requests=2)
+    host = pool.hosts[0]
+    host.ejections = 1
+
+    await pool.chat("test-model", [])
+    host.client = FakeClient(fail_chat=True)
+    try:
+        await pool.chat("test-model", [])
+    except ConnectionError:
+        pass
+    host.client = FakeClient()
+    await pool.chat("test-model", [])
+    assert host.ejections == 1
+
+    await pool.chat("test-model", [])
+    assert host.ejections == 0
+
+
+async def test_default_client_is_shared_and_closed_on_stop():
+    pool = OllamaBackendPool([])
+    client = pool.default_client
+
+    assert pool.default_client is client
+
+    await pool.stop()
+
+    assert client._client.is_closed
+    assert pool.default_client is not client  # recreated on next use
+    await pool.stop()
@@ -0,0 +1,99 @@
+import asyncio
+
+import httpx
+import openai
+import pytest
+
+from app.services.openai_batch import OpenAIBatchRunner
+
+from .fake_openai_batch import FakeBatchServer
+
+
+def make_runner(server: FakeBatchServer, **kwargs) -> OpenAIBatchRunner:
+    client = openai.AsyncOpenAI(
+        api_key="test",
+        base_url="http://fake-openai/v1",
+        http_client=httpx.AsyncClient(transport=httpx.ASGITransport(app=server.app)),
+        max_retries=0,
+    )
+    options = {"flush_interval": 3600, "poll_interval": 0.01, **kwargs}
+    return OpenAIBatchRunner(client=client, model="test-model", **options)
+
+
+async def submit_batch(runner: OpenAIBatchRunner, prompts):
+    waiters = [
+        asyncio.create_task(runner.submit(f"req-{i}", prompt))
+        for i, prompt in enumerate(prompts)
+    ]
+    await asyncio.sleep(0)
+    await runner.flush()
+    return await asyncio.wait_for(asyncio.gather(*waiters), 5)
+
+
+async def test_completed_batch_resolves_each_prompt():
+    server = FakeBatchServer()
+    runner = make_runner(server)
+
+    results = await submit_batch(runner, ["first", "second"])
+
+    assert results == [{"echo": "first"}, {"echo": "second"}]
+    assert runner.get_stats()["submitted_requests"] == 2
+    assert runner.in_flight == {}
+
+
+@pytest.mark.parametrize("status", ["failed", "expired", "cancelled"])
+async def test_failed_or_expired_batch_resolves_to_none(status):
+    runner = make_runner(FakeBatchServer(outcome=status))
+
+    assert await submit_batch(runner, ["first", "second"]) == [None, None]
+    assert runner.in_flight == {}
+
+
+async def test_result_download_error_resolves_to_none():
+    runner = make_runner(FakeBatchServer(outcome="unreadable_output"))
+
+    assert await submit_batch(runner, ["first"]) == [None]
+    assert runner.in_flight == {}
+
+
+async def test_submission_error_resolves_to_none():
+    server = FakeBatchServer()
+    server.app.router.routes = [
+        r for r in server.app.router.routes if getattr(r, "path", "") != "/v1/batches"
+    ]
+    runner = make_runner(server)
+
+    assert await submit_batch(runner, ["first"]) == [None]
+
+
+async def test_stop_resolves_in_flight_prompts():
+    server = FakeBatchServer()
+    runner = make_runner(server, poll_interval=3600)
+    waiter = asyncio.create_task(runner.submit("req-0", "first"))
+    await asyncio.sleep(0)
+    await runner.flush()
+    await asyncio.sleep(0.01)  # the poll task is now waiting on its batch
+    assert len(runner.in_flight) == 1
+
+    await runner.stop()
+
+    assert await asyncio.wait_for(waiter, 1) is None
+    assert runner.in_flight == {}
+
+
+async def test_resume_waits_on_a_batch_submitted_before_a_restart():
+    server = FakeBatchServer()
+    first = make_runner(server, poll_interval=3600)
+    batch_ids = []
+    waiter = asyncio.create_task(first.submit("req-0", "first", batch_ids.append))
+    await asyncio.sleep(0)
+    await first.flush()
+    await first.stop()
+    assert await waiter is None
+
+    second = make_runner(server)
+    result = await asyncio.wait_for(second.resume(batch_ids[0], "req-0"), 5)
+
+    assert result == {"echo": "first"}
+    assert len(server.batches) == 1
+    assert second.in_flight == {}
@@ -0,0 +1,191 @@
+import asyncio
+
+import pytest
+
+from app.services.section_graph import ANALYSIS_GRAPH, SectionGraph, SectionNode
+
+
+def prompt(address, manual_data, inputs):
+    return ",".join(sorted(inputs))
+
+
+def node(key, *depends_on, **kw):
+    if "compute" not in kw:
+        kw["prompt"] = prompt
+    return SectionNode(key, key.title(), depends_on=depends_on, **kw)
+
+
+class Recorder:
+    """generate() stand-in: logs starts and finishes, and holds the
+    sections named in ``hold`` until ``release`` is set"""
+
+    def __init__(self, hold=(), fail=()):
+        self.hold = set(hold)
+        self.fail = set(fail)
+        self.release = asyncio.Event()
+        self.log = []
+        self.prompts = {}
+
+    async def __call__(self, section, text):
+        self.log.append(("start", section.key))
+        self.prompts[section.key] = text
+        if section.key in self.hold:
+            await self.release.wait()
+        self.log.append(("done", section.key))
+        if section.key in self.fail:
+            raise RuntimeError("generation failed")
+        return {"key": section.key}
+
+
+async def collect(run):
+    return [key async for key, _ in run.results()]
+
+
+async def test_sections_start_only_after_their_dependencies():
+    graph = SectionGraph([node("summary", "a", "b"), node("a"), node("b", "a")])
+    generate = Recorder()
+
+    order = await collect(graph.start("1 Main St", None, generate))
+
+    assert order == ["a", "b", "summary"]
+    log = generate.log
+    assert log.index(("done", "a")) < log.index(("start", "b"))
+    assert log.index(("done", "b")) < log.index(("start", "summary"))
+    # Dependencies' results are handed to the prompt
+    assert generate.prompts["summary"] == "a,b"
+
+
+async def test_independent_sections_generate_concurrently():
+    graph = SectionGraph([node("a"), node("b"), node("c", "a")])
+    generate = Recorder(hold={"a"})
+    run = graph.start("1 Main St", None, generate)
+    results = run.results()
+
+    assert await anext(results) == ("b", {"key": "b"})
+    assert ("start", "a") in generate.log
+    assert ("start", "c") not in generate.log
+
+    generate.release.set()
+    assert [key async for key, _ in results] == ["a", "c"]
+
+
+async def test_local_sections_are_computed_before_any_generated_one():
+    graph = SectionGraph(
+        [
+            node("llm"),
+            node("local", compute=lambda address, data, inputs: {"local": True}),
+            node("after", "local"),
+        ]
+    )
+
+    order = await collect(graph.start("1 Main St", None, Recorder()))
+
+    assert order[0] == "local"
+    assert set(order) == {"llm", "local", "after"}
+
+
+@pytest.mark.parametrize(
+    "nodes",
+    [
+        [node("a", "b"), node("b", "a")],
+        [node("a", "c"), node("b", "a"), node("c", "b")],
+        [node("a", "a")],
+    ],
+)
+def test_cycles_are_rejected(nodes):
+    with pytest.raises(ValueError, match="cycle"):
+        SectionGraph(nodes)
+
+
+def test_unknown_dependency_and_duplicate_sections_are_rejected():
+    with pytest.raises(ValueError, match="unknown"):
+        SectionGraph([node("a", "missing")])
+    with pytest.raises(ValueError, match="Duplicate"):
+        SectionGraph([node("a"), node("a")])
+
+
+async def test_completed_sections_are_skipped_but_feed_dependents():
+    graph = SectionGraph([node("a"), node("b"), node("summary", "a", "b")])
+    generate = Recorder()
+
+    order = await collect(
+        graph.start("1 Main St", None, generate, completed={"a": {"key": "a"}})
+    )
+
+    assert order == ["b", "summary"]
+    assert ("start", "a") not in generate.log
+    assert generate.prompts["summary"] == "a,b"
+
+
+async def test_selected_sections_pull_in_their_dependencies_only():
+    graph = SectionGraph([node("a"), node("b", "a"), node("c")])
+
+    order = await collect(graph.start("1 Main St", None, Recorder(), sections=["b"]))
+
+    assert order == ["a", "b"]
+
+
+async def test_failed_section_yields_none_and_dependents_still_run():
+    graph = SectionGraph([node("a"), node("b", "a")])
+    generate = Recorder(fail={"a"})
+
+    results = dict([pair async for pair in graph.start("x", None, generate).results()])
+
+    assert results == {"a": None, "b": {"key": "b"}}
+    assert generate.prompts["b"] == ""  # failed inputs are left out
+
+
+async def test_cancel_aborts_running_sections():
+    graph = SectionGraph([node("a"), node("b", "a")])
+    generate = Recorder(hold={"a"})
+    run = graph.start("1 Main St", None, generate)
+    consumer = asyncio.create_task(collect(run))
+    await asyncio.sleep(0.01)
+    (task,) = run.running
+
+    run.cancel("job_cancelled")
+    with pytest.raises(asyncio.CancelledError):
+        await consumer
+
+    assert task.cancelled()
+    assert ("start", "b") not in generate.log
+
+
+async def test_closing_results_early_cancels_the_rest():
+    graph = SectionGraph([node("a"), node("b")])
+    generate = Recorder(hold={"a"})
+    run = graph.start("1 Main St", None, generate)
+    results = run.results()
+
+    assert (await anext(results))[0] == "b"
+    (task,) = run.running
+    await results.aclose()
+    await asyncio.sleep(0)
+
+    assert task.cancelled()
+
+
+async def test_concurrency_caps_sections_generating_at_once():
+    graph = SectionGraph([node(key) for key in "abcd"])
+    active = peak = 0
+
+    async def generate(section, text):
+        nonlocal active, peak
+        active += 1
+        peak = max(peak, active)
+        await asyncio.sleep(0.01)
+        active -= 1
+        return {}
+
+    await collect(graph.start("1 Main St", None, generate, concurrency=2))
+
+    assert peak == 2
+
+
+def test_analysis_graph_runs_summary_after_strengths_and_risks():
+    assert ANALYSIS_GRAPH.nodes["summary"].depends_on == ("strengths", "risks")
+    assert ANALYSIS_GRAPH.closure(["renovation_analysis"]) == [
+        "investment_potential",
+        "renovation_analysis",
+    ]
+    assert ANALYSIS_GRAPH.depth == 2
@@ -0,0 +1,132 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from app.middleware.auth import require_auth
+from app.routers import analyze_streaming
+from app.services.stream_buffer import StreamRegistry
+
+
+async def numbered_events(count: int, delay: float = 0.0):
+    for n in range(1, count + 1):
+        await asyncio.sleep(delay)
+        yield {"type": "section", "n": n}
+
+
+async def collect(frames, limit: int):
+    collected = []
+    async for frame in frames:
+        collected.append(frame)
+        if len(collected) == limit:
+            break
+    return collected
+
+
+async def test_stream_never_attached_is_abandoned_after_grace():
+    registry = StreamRegistry(resume_grace_seconds=0.05)
+    stream = registry.start("a1", "user-1", numbered_events(1000, delay=0.01))
+
+    await asyncio.sleep(0.2)
+
+    assert stream.done
+    assert stream.producer.cancelled()
+    assert registry.abandoned == 1
+
+
+async def test_attaching_cancels_the_grace_timer():
+    registry = StreamRegistry(resume_grace_seconds=0.05)
+    stream = registry.start("a1", "user-1", numbered_events(20, delay=0.01))
+
+    frames = await collect(registry.attach(stream), 20)
+
+    assert len(frames) == 20
+    assert registry.abandoned == 0
+    assert not stream.producer.cancelled()
+
+
+async def test_last_event_id_resumes_after_the_acknowledged_event():
+    registry = StreamRegistry()
+    stream = registry.start("a1", "user-1", numbered_events(5))
+    first = await collect(registry.attach(stream), 2)
+    last_event_id = first[-1].split("\n")[0].removeprefix("id: ")
+    await stream.producer
+
+    resumed, after = registry.resume(last_event_id, "user-1")
+    replayed = await collect(registry.attach(resumed, after), 10)
+
+    assert last_event_id == "a1:2"
+    assert [frame.split("\n")[0] for frame in replayed] == [
+        "id: a1:3",
+        "id: a1:4",
+        "id: a1:5",
+    ]
+    assert registry.replayed_events == 3
+
+
+async def test_resume_refuses_other_users_and_unknown_ids():
+    registry = StreamRegistry()
+    stream = registry.start("a1", "user-1", numbered_events(1))
+    await stream.producer
+
+    assert registry.resume("a1:1", "user-2") == (None, 0)
+    assert registry.resume("missing:1", "user-1") == (None, 0)
+    assert registry.resume("a1:x", "user-1") == (None, 0)
+
+
+class FakeLLM:
+    async def generate_analysis(self, prompt, priority=None, timeout=None):
+        return {}
+
+
+def sse_events(body: str):
+    """(id, payload) of each SSE frame"""
+    events = []
+    for frame in body.strip().split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in frame.splitlines())
+        events.append((fields["id"], json.loads(fields["data"])))
+    return events
+
+
+@pytest.fixture
+async def stream_client(monkeypatch):
+    monkeypatch.setattr(analyze_streaming, "LLMService", FakeLLM)
+    monkeypatch.setattr(analyze_streaming, "stream_registry", StreamRegistry())
+    app = FastAPI()
+    app.include_router(analyze_streaming.router)
+    app.dependency_overrides[require_auth] = lambda: {"id": "user-1"}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as c:
+        yield c
+
+
+async def test_unknown_last_event_id_restarts_visibly(stream_client):
+    body = {"property_address": "1 Main St"}
+    response = await stream_client.post(
+        "/analyze/stream",
+        json=body,
+        headers={"Last-Event-ID": "analysis_on_another_worker:3"},
+    )
+
+    assert response.headers["x-stream-resumed"] == "false"
+    events = sse_events(response.text)
+    assert events[0][1]["type"] == "analysis_started"
+    assert events[0][1]["restarted_from"] == "analysis_on_another_worker:3"
+
+    # The new stream itself resumes, without the restart marker
+    resumed = await stream_client.post(
+        "/analyze/stream", json=body, headers={"Last-Event-ID": events[1][0]}
+    )
+    assert resumed.headers["x-stream-resumed"] == "true"
+    assert sse_events(resumed.text) == events[2:]
+
+
+async def test_fresh_stream_has_no_restart_marker(stream_client):
+    response = await stream_client.post(
+        "/analyze/stream", json={"property_address": "1 Main St"}
+    )
+
+    assert "x-stream-resumed" not in response.headers
+    assert "restarted_from" not in sse_events(response.text)[0][1]
@@ -0,0 +1,144 @@
+import asyncio
+
+import pytest
+
+from app.config import settings
+from app.routers import websocket as websocket_router
+from app.routers.websocket import CLOSE_REPLACED, CLOSE_TRY_AGAIN, ConnectionManager
+
+from .test_async_processor import make_processor
+
+
+class FakeWebSocket:
+    """Handshake stand-in: accept() waits for ``handshake`` and can fail"""
+
+    def __init__(self, fail: bool = False):
+        self.scope = {"subprotocols": []}
+        self.handshake = asyncio.Event()
+        self.handshake.set()
+        self.fail = fail
+        self.accepted = False
+        self.close_code = None
+
+    async def accept(self, subprotocol=None):
+        await self.handshake.wait()
+        if self.fail:
+            raise ConnectionResetError("client went away")
+        self.accepted = True
+
+    async def close(self, code=1000, reason=""):
+        self.close_code = code
+
+    async def send_text(self, text):
+        pass
+
+
+@pytest.fixture
+def caps(monkeypatch):
+    def set_caps(node: int, per_user: int):
+        monkeypatch.setattr(settings, "WS_MAX_CONNECTIONS", node)
+        monkeypatch.setattr(settings, "WS_MAX_CONNECTIONS_PER_USER", per_user)
+
+    return set_caps
+
+
+async def test_concurrent_connects_cannot_exceed_the_node_cap(caps):
+    caps(node=2, per_user=0)
+    manager = ConnectionManager()
+    sockets = [FakeWebSocket() for _ in range(3)]
+    for websocket in sockets:
+        websocket.handshake.clear()  # every handshake is still in flight
+
+    connecting = [
+        asyncio.create_task(manager.connect(ws, f"user-{n}"))
+        for n, ws in enumerate(sockets)
+    ]
+    await asyncio.sleep(0.01)
+    assert manager.connection_count == 2
+    for websocket in sockets:
+        websocket.handshake.set()
+    connections = await asyncio.gather(*connecting)
+
+    assert sum(c is not None for c in connections) == 2
+    assert sockets[2].close_code == CLOSE_TRY_AGAIN
+    assert manager.connection_count == 2
+    assert manager.closed == {"rejected": 1}
+
+
+async def test_concurrent_connects_of_one_user_respect_the_user_cap(caps):
+    caps(node=0, per_user=1)
+    manager = ConnectionManager()
+    first, second = FakeWebSocket(), FakeWebSocket()
+    first.handshake.clear()
+    second.handshake.clear()
+
+    connecting = [
+        asyncio.create_task(manager.connect(ws, "user-1")) for ws in (first, second)
+    ]
+    await asyncio.sleep(0.01)
+    assert manager.connection_count == 1
+    first.handshake.set()
+    second.handshake.set()
+    results = await asyncio.gather(*connecting)
+
+    # The newer connection replaced the older one mid-handshake
+    assert first.close_code == CLOSE_REPLACED
+    assert results[0] is None
+    assert results[1] is not None
+    assert manager.connection_count == 1
+    assert len(manager.active_connections["user-1"]) == 1
+
+
+async def test_failed_handshake_gives_the_slot_back(caps):
+    caps(node=1, per_user=0)
+    manager = ConnectionManager()
+
+    assert await manager.connect(FakeWebSocket(fail=True), "user-1") is None
+    assert manager.connection_count == 0
+    assert manager.closed == {"accept_failed": 1}
+
+    connection = await manager.connect(FakeWebSocket(), "user-1")
+    assert connection is not None
+    await manager.disconnect(connection)
+    assert manager.connection_count == 0
+
+
+class FakeConnection:
+    def __init__(self):
+        self.sent = []
+
+    def send(self, message):
+        self.sent.append(message)
+
+
+async def test_subscribe_fences_deltas_covered_by_the_snapshot(monkeypatch):
+    processor = make_processor()
+    monkeypatch.setattr(websocket_router, "async_processor", processor)
+    job_id = await processor.submit_analysis_job("user-1", "1 Main St", "Home", None)
+    job = processor.jobs[job_id]
+    job.event_seq = 0
+    read_status = processor.get_job_status
+
+    async def racing_read(requested_id):
+        if processor.subscriptions.for_job(requested_id):
+            # Progress published between subscribing and the snapshot read
+            job.progress = 10
+            await processor._deliver_event(processor.events.delta(job))
+        return await read_status(requested_id)
+
+    monkeypatch.setattr(processor, "get_job_status", racing_read)
+    connection = FakeConnection()
+    await websocket_router.subscribe_to_job_updates(connection, "user-1", job_id, {})
+
+    snapshot = connection.sent[0]
+    assert snapshot["type"] == "job_update"
+    assert snapshot["seq"] == 1
+    assert snapshot["data"]["progress"] == 10
+
+    # The bus redelivers the covered delta late, then the next one arrives
+    stale = {"type": "job_delta", "job_id": job_id, "seq": 1, "data": {}}
+    await processor._deliver_event(stale)
+    job.progress = 20
+    await processor._deliver_event(processor.events.delta(job))
+
+    assert [m["seq"] for m in connection.sent] == [1, 2]
@@ -0,0 +1,55 @@
+import pytest
+
+from app.services.ws_codec import (
+    JSON_PROTOCOL,
+    MSGPACK_PROTOCOL,
+    JsonCodec,
+    MsgpackCodec,
+    negotiate,
+)
+
+MESSAGE = {
+    "type": "job_delta",
+    "job_id": "job-1",
+    "seq": 7,
+    "first_seq": 5,
+    "data": {
+        "progress": 62.5,
+        "current_section": None,
+        "results": {"summary": {"text": "Solid starter home — 3 bd", "score": 8}},
+        "sections": ["summary", "risks"],
+    },
+}
+
+
+@pytest.mark.parametrize("codec", [JsonCodec(), MsgpackCodec()])
+def test_message_survives_a_round_trip(codec):
+    frame = codec.encode(MESSAGE)
+
+    assert isinstance(frame, bytes) == codec.binary
+    assert codec.decode(frame) == MESSAGE
+
+
+def test_msgpack_frames_are_smaller_than_json():
+    assert len(MsgpackCodec().encode(MESSAGE)) < len(JsonCodec().encode(MESSAGE))
+
+
+def test_msgpack_codec_reads_json_control_messages():
+    assert MsgpackCodec().decode('{"type":"pong"}') == {"type": "pong"}
+
+
+@pytest.mark.parametrize(
+    "offered, name, accepted",
+    [
+        ([MSGPACK_PROTOCOL, JSON_PROTOCOL], "msgpack", MSGPACK_PROTOCOL),
+        ([JSON_PROTOCOL, MSGPACK_PROTOCOL], "msgpack", MSGPACK_PROTOCOL),
+        ([JSON_PROTOCOL], "json", JSON_PROTOCOL),
+        (["graphql-ws"], "json", None),
+        ([], "json", None),
+    ],
+)
+def test_negotiation_prefers_msgpack(offered, name, accepted):
+    codec, protocol = negotiate(offered)
+
+    assert codec.name == name
+    assert protocol == accepted
@@ -1,6 +1,6 @@
 // frontend/lib/analyze-streaming.ts
 
-import { ManualPropertyData } from './analyze';
+import { InvestmentPotential, ListingPreview, ManualPropertyData } from './analyze';
 
 // Helper function to check if token is expired
 function isTokenExpired(token: string, minutes = 5): boolean {
@@ -44,6 +44,7 @@ async function ensureValidToken(userToken: string): Promise<string> {
 export interface StreamingAnalysisSection {
   type: 'analysis_started' | 'section_complete' | 'analysis_complete' | 'error';
   analysis_id?: string;
+  restarted_from?: string; // Set when a resume failed and the analysis started over
   section?: string;
   data?: Record<string, unknown>;
   message?: string;
@@ -51,6 +52,8 @@ export interface StreamingAnalysisSection {
 
 export interface StreamingAnalysisState {
   analysisId: string | null;
+  preview: ListingPreview | null;
+  investment: InvestmentPotential | null;
   summary: {
     summary: string;
     overall_score: number;
@@ -63,9 +66,29 @@ export interface StreamingAnalysisState {
   error: string | null;
 }
 
+// Reconnects allowed when the stream drops before analysis_complete
+const MAX_RESUME_ATTEMPTS = 3;
+
+function initialState(): StreamingAnalysisState {
+  return {
+    analysisId: null,
+    preview: null,
+    investment: null,
+    summary: null,
+    strengths: [],
+    weaknesses: [],
+    hiddenRisks: [],
+    questions: [],
+    isComplete: false,
+    error: null,
+  };
+}
+
 export class StreamingAnalysisClient {
   private onUpdate: (updater: (prev: StreamingAnalysisState) => StreamingAnalysisState) => void;
   private onError: (error: string) => void;
+  private lastEventId: string | null = null;
+  private finished = false;
 
   constructor(
     onUpdate: (updater: (prev: StreamingAnalysisState) => StreamingAnalysisState) => void,
@@ -95,74 +118,97 @@ export class StreamingAnalysisClient {
     };
 
     // Start with initial state
-    this.onUpdate(() => ({
-      analysisId: null,
-      summary: null,
-      strengths: [],
-      weaknesses: [],
-      hiddenRisks: [],
-      questions: [],
-      isComplete: false,
-      error: null,
-    }));
+    this.onUpdate(() => initialState());
+
+    // A dropped connection is resumed with Last-Event-ID: the server
+    // replays missed sections and continues the same generation
+    this.lastEventId = null;
+    this.finished = false;
+    for (let attempt = 0; !this.finished; attempt++) {
+      try {
+        await this.readStream(requestBody, validToken);
+        if (!this.finished) {
+          throw new Error('Analysis stream ended unexpectedly');
+        }
+      } catch (error) {
+        if (this.finished) {
+          return;
+        }
+        if (this.lastEventId === null || attempt >= MAX_RESUME_ATTEMPTS) {
+          this.onError(error instanceof Error ? error.message : 'Failed to start analysis');
+          return;
+        }
+        console.warn('Analysis stream dropped, resuming:', error);
+        await new Promise(resolve => setTimeout(resolve, 500 * 2 ** attempt));
+      }
+    }
+  }
 
-    try {
-      // Send the analysis request via POST to start streaming
-      const baseUrl = process.env.NEXT_PUBLIC_API_URL || 'http://localhost:8000';
-      const url = new URL('/api/analyze/stream', baseUrl);
-      
-      const response = await fetch(url.toString(), {
-        method: 'POST',
-        headers: {
-          'Content-Type': 'application/json',
-          'Authorization': `Bearer ${validToken}`,
-        },
-        body: JSON.stringify(requestBody),
-      });
+  private async readStream(requestBody: object, validToken: string): Promise<void> {
+    // Send the analysis request via POST to start streaming
+    const baseUrl = process.env.NEXT_PUBLIC_API_URL || 'http://localhost:8000';
+    const url = new URL('/api/analyze/stream', baseUrl);
 
-      if (!response.ok) {
-        const errorText = await response.text();
-        console.error('Analysis request failed:', {
-          status: response.status,
-          statusText: response.statusText,
-          url: url.toString(),
-          error: errorText
-        });
-        throw new Error(`Analysis request failed: ${response.status} ${response.statusText}`);
-      }
+    const headers: Record<string, string> = {
+      'Content-Type': 'application/json',
+      'Authorization': `Bearer ${validToken}`,
+    };
+    if (this.lastEventId) {
+      headers['Last-Event-ID'] = this.lastEventId;
+    }
 
-      // Handle streaming response
-      const reader = response.body?.getReader();
-      if (!reader) {
-        throw new Error('No response body available for streaming');
-      }
+    const response = await fetch(url.toString(), {
+      method: 'POST',
+      headers,
+      body: JSON.stringify(requestBody),
+    });
 
-      const decoder = new TextDecoder();
-      let buffer = '';
-
-      while (true) {
-        const { done, value } = await reader.read();
-        if (done) break;
-
-        buffer += decoder.decode(value, { stream: true });
-        const lines = buffer.split('\n');
-        buffer = lines.pop() || ''; // Keep incomplete line in buffer
-
-        for (const line of lines) {
-          if (line.startsWith('data: ')) {
-            try {
-              const data: StreamingAnalysisSection = JSON.parse(line.slice(6));
-              this.handleStreamEvent(data);
-            } catch (error) {
-              console.error('Error parsing stream event:', error);
-              this.onError('Failed to parse analysis data');
-            }
+    if (!response.ok) {
+      const errorText = await response.text();
+      console.error('Analysis request failed:', {
+        status: response.status,
+        statusText: response.statusText,
+        url: url.toString(),
+        error: errorText
+      });
+      throw new Error(`Analysis request failed: ${response.status} ${response.statusText}`);
+    }
+
+    // Handle streaming response
+    const reader = response.body?.getReader();
+    if (!reader) {
+      throw new Error('No response body available for streaming');
+    }
+
+    const decoder = new TextDecoder();
+    let buffer = '';
+    let eventId: string | null = null;
+
+    while (true) {
+      const { done, value } = await reader.read();
+      if (done) break;
+
+      buffer += decoder.decode(value, { stream: true });
+      const lines = buffer.split('\n');
+      buffer = lines.pop() || ''; // Keep incomplete line in buffer
+
+      for (const line of lines) {
+        if (line.startsWith('id: ')) {
+          eventId = line.slice(4);
+        } else if (line.startsWith('data: ')) {
+          try {
+            const data: StreamingAnalysisSection = JSON.parse(line.slice(6));
+            this.handleStreamEvent(data);
+          } catch (error) {
+            console.error('Error parsing stream event:', error);
+            this.onError('Failed to parse analysis data');
           }
+        } else if (line === '' && eventId) {
+          // End of event: it has been handled, resume after it
+          this.lastEventId = eventId;
+          eventId = null;
         }
       }
-
-    } catch (error) {
-      this.onError(error instanceof Error ? error.message : 'Failed to start analysis');
     }
   }
 
@@ -171,6 +217,16 @@ export class StreamingAnalysisClient {
     switch (data.type) {
       case 'analysis_started':
         console.log('Analysis started with ID:', data.analysis_id);
+        if (data.restarted_from) {
+          // The server could not resume our stream (expired, or served by
+          // another worker): this is a fresh analysis, drop the old sections
+          console.warn('Analysis stream could not be resumed, restarting:', data.restarted_from);
+          this.onUpdate(() => ({
+            ...initialState(),
+            analysisId: data.analysis_id || null,
+          }));
+          break;
+        }
         this.onUpdate(prev => ({
           ...prev,
           analysisId: data.analysis_id || null,
@@ -185,6 +241,16 @@ export class StreamingAnalysisClient {
             const newState = { ...prev };
             
             switch (data.section) {
+              case 'preview':
+                if (data.data && typeof data.data === 'object' && 'completeness' in data.data) {
+                  newState.preview = data.data as unknown as ListingPreview;
+                }
+                break;
+              case 'investment_potential':
+                if (data.data && typeof data.data === 'object' && 'cash_flow' in data.data) {
+                  newState.investment = data.data as unknown as InvestmentPotential;
+                }
+                break;
               case 'summary':
                 if (data.data && typeof data.data === 'object' && 'summary' in data.data && 'overall_score' in data.data) {
                   newState.summary = data.data as { summary: string; overall_score: number };
@@ -222,6 +288,7 @@ export class StreamingAnalysisClient {
         break;
 
       case 'analysis_complete':
+        this.finished = true;
         this.onUpdate(prev => ({
           ...prev,
           isComplete: true,
@@ -230,6 +297,7 @@ export class StreamingAnalysisClient {
         break;
 
       case 'error':
+        this.finished = true;
         this.onError(data.message || 'Analysis failed');
         this.cleanup();
         break;
@@ -259,6 +327,8 @@ export function useStreamingAnalysis() {
     
     return {
       analysisId: null,
+      preview: null,
+      investment: null,
       summary: null,
       strengths: [],
       weaknesses: [],
@@ -280,6 +350,8 @@ export function useStreamingAnalysis() {
     // Clear previous state when starting new analysis
     setState({
       analysisId: null,
+      preview: null,
+      investment: null,
       summary: null,
       strengths: [],
       weaknesses: [],
@@ -26,6 +26,9 @@ export interface InvestmentPotential {
   cash_flow: string;
   roi_projections: string;
   appreciation_timeline: string;
+  // Computed figures behind the text, and the assumptions used
+  metrics?: Record<string, number | null> | null;
+  assumptions?: Record<string, number>;
 }
 
 export interface RiskAssessment {
@@ -46,6 +49,34 @@ export interface InvestmentRecommendation {
   timeline: string;
 }
 
+// Features extracted from the listing description; null where it is silent
+export interface ListingFeatures {
+  hoa_monthly: number | null;
+  roof_age: number | null;
+  hvac_age: number | null;
+  garage_spaces: number | null;
+  pool: boolean | null;
+  community_pool: boolean;
+  as_is: boolean;
+  flood_zone: boolean | null;
+  renovated_kitchen: boolean;
+  renovated_bathroom: boolean;
+  finished_basement: boolean;
+  solar: boolean;
+  foundation_issues: boolean;
+}
+
+export interface ListingPreview {
+  price: number | null;
+  price_per_sqft: number | null;
+  property_age: number | null;
+  bed_bath_ratio: number | null;
+  sqft_per_bedroom: number | null;
+  completeness: number;
+  fields_provided: Record<string, boolean>;
+  features: ListingFeatures;
+}
+
 export interface PropertyAnalysis {
   id?: string;
   property_address: string;
@@ -65,6 +96,9 @@ export interface PropertyAnalysis {
   // Manual property data
   manual_data?: ManualPropertyData;
 
+  // Figures computed locally from manual_data
+  preview?: ListingPreview;
+
   // Market and Investment Analysis
   market_analysis?: MarketAnalysis;
   investment_potential?: InvestmentPotential;
@@ -2,17 +2,24 @@
 
 import { useEffect, useRef, useState, useCallback } from 'react';
 
+export interface JobState {
+  status: 'pending' | 'in_progress' | 'completed' | 'failed' | 'cancelled';
+  progress: number;
+  current_section: string | null;
+  results: Record<string, unknown>;
+  error_message: string | null;
+  updated_at: string;
+  estimated_completion?: string | null;
+}
+
+// job_update carries the full state; job_delta carries only changed fields
+// and newly completed sections (merged into results)
 export interface JobUpdate {
-  type: 'job_update' | 'error';
+  type: 'job_update' | 'job_delta' | 'error' | 'ping';
   job_id: string;
-  data?: {
-    status: 'pending' | 'in_progress' | 'completed' | 'failed' | 'cancelled';
-    progress: number;
-    current_section: string | null;
-    results: Record<string, unknown>;
-    error_message: string | null;
-    updated_at: string;
-  };
+  seq?: number;
+  first_seq?: number; // set when queued deltas were merged: covers first_seq..seq
+  data?: Partial<JobState>;
   message?: string;
 }
 
@@ -24,6 +31,10 @@ export interface UseWebSocketOptions {
   onDisconnect?: () => void;
 }
 
+// Server close codes after which we reconnect only when a job needs it
+const CLOSE_IDLE = 4000;
+const CLOSE_REPLACED = 4002;
+
 export function useWebSocket(options: UseWebSocketOptions) {
   const { userId, onJobUpdate, onError, onConnect, onDisconnect } = options;
   const [isConnected, setIsConnected] = useState(false);
@@ -31,6 +42,7 @@ export function useWebSocket(options: UseWebSocketOptions) {
   const wsRef = useRef<WebSocket | null>(null);
   const reconnectTimeoutRef = useRef<NodeJS.Timeout | null>(null);
   const reconnectAttempts = useRef(0);
+  const lastSeqRef = useRef<Map<string, number>>(new Map());
   const maxReconnectAttempts = 5;
 
   const connect = useCallback(() => {
@@ -47,12 +59,37 @@ export function useWebSocket(options: UseWebSocketOptions) {
         setIsConnected(true);
         setConnectionError(null);
         reconnectAttempts.current = 0;
+        // Subscriptions don't survive the connection: restore them
+        lastSeqRef.current.forEach((_, jobId) => {
+          ws.send(JSON.stringify({ type: 'subscribe_job', job_id: jobId }));
+        });
         onConnect?.();
       };
 
       ws.onmessage = (event) => {
         try {
           const data: JobUpdate = JSON.parse(event.data);
+
+          if (data.type === 'ping') {
+            ws.send(JSON.stringify({ type: 'pong' }));
+            return;
+          }
+
+          if (data.type === 'job_update' && data.seq !== undefined) {
+            lastSeqRef.current.set(data.job_id, data.seq);
+          } else if (data.type === 'job_delta' && data.seq !== undefined) {
+            const lastSeq = lastSeqRef.current.get(data.job_id);
+            if (lastSeq !== undefined && data.seq <= lastSeq) {
+              return; // Already covered by the snapshot
+            }
+            if (lastSeq !== undefined && (data.first_seq ?? data.seq) > lastSeq + 1) {
+              // Missed an event: resubscribe to get a fresh snapshot
+              ws.send(JSON.stringify({ type: 'subscribe_job', job_id: data.job_id }));
+              return;
+            }
+            lastSeqRef.current.set(data.job_id, data.seq);
+          }
+
           onJobUpdate?.(data);
         } catch (error) {
           console.error('Error parsing WebSocket message:', error);
@@ -65,7 +102,12 @@ export function useWebSocket(options: UseWebSocketOptions) {
         setIsConnected(false);
         onDisconnect?.();
 
-        // Attempt to reconnect if not a normal closure
+        // Attempt to reconnect if not a normal closure; idle or replaced
+        // connections come back on the next subscribeToJob
+        const lazy = event.code === CLOSE_IDLE || event.code === CLOSE_REPLACED;
+        if (lazy) {
+          return;
+        }
         if (event.code !== 1000 && reconnectAttempts.current < maxReconnectAttempts) {
           const delay = Math.min(1000 * Math.pow(2, reconnectAttempts.current), 10000);
           reconnectAttempts.current++;
@@ -113,10 +155,19 @@ export function useWebSocket(options: UseWebSocketOptions) {
         type: 'subscribe_job',
         job_id: jobId
       }));
+    } else {
+      // Subscribed on open (e.g. after the server closed an idle connection)
+      if (!lastSeqRef.current.has(jobId)) {
+        lastSeqRef.current.set(jobId, -1);
+      }
+      if (wsRef.current?.readyState !== WebSocket.CONNECTING) {
+        connect();
+      }
     }
-  }, []);
+  }, [connect]);
 
   const unsubscribeFromJob = useCallback((jobId: string) => {
+    lastSeqRef.current.delete(jobId);
     if (wsRef.current?.readyState === WebSocket.OPEN) {
       wsRef.current.send(JSON.stringify({
         type: 'unsubscribe_job',
@@ -261,17 +312,21 @@ export function useAsyncAnalysis() {
   }, []);
 
   const handleJobUpdate = useCallback((update: JobUpdate) => {
-    if (update.type === 'job_update' && update.data) {
+    if ((update.type === 'job_update' || update.type === 'job_delta') && update.data) {
+      const data = update.data;
+      const isDelta = update.type === 'job_delta';
       setCurrentJob(prev => ({
         ...prev,
-        status: update.data!.status,
-        progress: update.data!.progress,
-        currentSection: update.data!.current_section,
-        results: update.data!.results,
-        error: update.data!.error_message,
+        status: data.status ?? prev.status,
+        progress: data.progress ?? prev.progress,
+        currentSection: data.current_section !== undefined ? data.current_section : prev.currentSection,
+        results: isDelta
+          ? { ...prev.results, ...(data.results ?? {}) }
+          : data.results ?? {},
+        error: data.error_message !== undefined ? data.error_message : prev.error,
       }));
 
-      if (update.data.status === 'completed' || update.data.status === 'failed' || update.data.status === 'cancelled') {
+      if (data.status === 'completed' || data.status === 'failed' || data.status === 'cancelled') {
         setIsAnalyzing(false);
       }
     } else if (update.type === 'error') {